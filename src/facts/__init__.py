@@ -1,5 +1,6 @@
 """High-level orchestration primitives for fact synthesis."""
 
+from .cache import CacheEntry, MemoryResultCache, RedisResultCache, ResultCache
 from .pipeline import (
     FactPipeline,
     FactPipelineError,
@@ -8,12 +9,47 @@ from .pipeline import (
     AggregationError,
     SearchError,
 )
+from .plan import PipelinePlan, PlanError, compile_plan, load_plan
+from .ranking import (
+    NearDuplicateFilter,
+    TopK,
+    aselect_top_k,
+    select_top_k,
+    suppress_near_duplicates,
+)
+from .singleflight import (
+    FlightCoordinator,
+    LocalResult,
+    RedisSingleFlight,
+    SingleFlight,
+    StreamFlight,
+)
+from .workers import ProcessingPool
 
 __all__ = [
+    "CacheEntry",
     "FactPipeline",
     "FactPipelineError",
     "EmptyQueryError",
     "NoFactsFoundError",
     "AggregationError",
     "SearchError",
+    "MemoryResultCache",
+    "RedisResultCache",
+    "ResultCache",
+    "FlightCoordinator",
+    "LocalResult",
+    "RedisSingleFlight",
+    "SingleFlight",
+    "StreamFlight",
+    "NearDuplicateFilter",
+    "TopK",
+    "ProcessingPool",
+    "PipelinePlan",
+    "PlanError",
+    "compile_plan",
+    "load_plan",
+    "aselect_top_k",
+    "select_top_k",
+    "suppress_near_duplicates",
 ]
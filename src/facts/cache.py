@@ -0,0 +1,162 @@
+"""Result caches for :class:`~facts.pipeline.FactPipeline` runs.
+
+Entries are keyed by the normalized query plus the pipeline configuration and
+carry their creation time so callers can distinguish fresh hits from stale
+entries that may be served while a refresh runs in the background.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from hashlib import sha256
+from typing import Any, Protocol, runtime_checkable
+
+from cachetools import LRUCache
+
+from factsynth_ultimate.tokenization import normalize
+
+logger = logging.getLogger(__name__)
+
+Clock = Callable[[], float]
+
+
+@dataclass(frozen=True, slots=True)
+class CacheEntry:
+    """Cached pipeline output and the time it was produced."""
+
+    value: str
+    created: float
+
+
+@runtime_checkable
+class ResultCache(Protocol):
+    """Async key/value store used by :class:`FactPipeline`."""
+
+    name: str
+
+    def now(self) -> float:
+        """Return the clock reading used for :attr:`CacheEntry.created`."""
+
+    async def get(self, key: str) -> CacheEntry | None:
+        """Return the entry stored under ``key`` if still retained."""
+
+    async def set(self, key: str, entry: CacheEntry, retain: float) -> None:
+        """Store ``entry`` under ``key`` for ``retain`` seconds."""
+
+    async def aclose(self) -> None:  # pragma: no cover - optional
+        """Release any open resources."""
+
+
+def retriever_id(retriever: Any) -> str:
+    """Return a stable identifier for ``retriever`` used in cache keys."""
+
+    explicit = getattr(retriever, "cache_id", None)
+    if explicit:
+        return str(explicit)
+    kind = type(retriever)
+    return f"{kind.__module__}.{kind.__qualname__}"
+
+
+def cache_key(query: str, *, top_k: int, retriever: str) -> str:
+    """Return the cache key for ``query`` under the given pipeline config."""
+
+    normalized = normalize(query).casefold()
+    digest = sha256(f"{retriever}\x1f{top_k}\x1f{normalized}".encode()).hexdigest()
+    return digest
+
+
+class MemoryResultCache:
+    """Process-local LRU cache whose entries expire after ``retain`` seconds."""
+
+    name = "memory"
+
+    def __init__(self, maxsize: int = 1024, *, clock: Clock | None = None) -> None:
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self._clock = clock or time.monotonic
+        self._entries: LRUCache[str, tuple[float, CacheEntry]] = LRUCache(maxsize=maxsize)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def now(self) -> float:
+        """Return the clock reading used for entry ages."""
+
+        return self._clock()
+
+    async def get(self, key: str) -> CacheEntry | None:
+        stored = self._entries.get(key)
+        if stored is None:
+            return None
+        expires_at, entry = stored
+        if self._clock() >= expires_at:
+            self._entries.pop(key, None)
+            return None
+        return entry
+
+    async def set(self, key: str, entry: CacheEntry, retain: float) -> None:
+        self._entries[key] = (self._clock() + max(0.0, retain), entry)
+
+    def clear(self) -> None:
+        """Drop all cached entries."""
+
+        self._entries.clear()
+
+    async def aclose(self) -> None:
+        self.clear()
+
+
+class RedisResultCache:
+    """Shared cache storing JSON entries in Redis with server-side expiry."""
+
+    name = "redis"
+
+    def __init__(
+        self,
+        client: Any,
+        *,
+        prefix: str = "factsynth:pipeline:",
+        clock: Clock | None = None,
+    ) -> None:
+        self.client = client
+        self.prefix = prefix
+        self._clock = clock or time.time
+
+    async def get(self, key: str) -> CacheEntry | None:
+        raw = await self.client.get(self.prefix + key)
+        if raw is None:
+            return None
+        try:
+            data = json.loads(raw)
+            return CacheEntry(value=str(data["value"]), created=float(data["created"]))
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Discarding malformed pipeline cache entry %s", key)
+            return None
+
+    async def set(self, key: str, entry: CacheEntry, retain: float) -> None:
+        payload = json.dumps({"value": entry.value, "created": entry.created})
+        await self.client.set(self.prefix + key, payload, ex=max(1, int(retain + 0.5)))
+
+    def now(self) -> float:
+        """Return the wall-clock time used for entry ages."""
+
+        return self._clock()
+
+    async def aclose(self) -> None:
+        close = getattr(self.client, "aclose", None)
+        if callable(close):
+            await close()
+
+
+__all__ = [
+    "CacheEntry",
+    "MemoryResultCache",
+    "RedisResultCache",
+    "ResultCache",
+    "cache_key",
+    "retriever_id",
+]
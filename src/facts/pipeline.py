@@ -2,12 +2,37 @@
 
 from __future__ import annotations
 
-from collections.abc import AsyncIterable, Callable, Iterable, Sequence
-from dataclasses import dataclass
-
+import asyncio
+import logging
+from collections.abc import (
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    Sequence,
+)
+from contextlib import AbstractContextManager, aclosing, nullcontext
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import TYPE_CHECKING, Any
+
+from factsynth_ultimate.core.metrics import PIPELINE_CACHE, PIPELINE_STAGE_SECONDS
+from factsynth_ultimate.core.tracing import get_tracer
 from factsynth_ultimate.formatting import ensure_period, sanitize
-from factsynth_ultimate.services.retrievers.base import RetrievedDoc, Retriever
+from factsynth_ultimate.services.retrievers.base import RetrievedDoc, Retriever, is_partial
 from factsynth_ultimate.services.retrievers.local import create_fixture_retriever
+from factsynth_ultimate.services.retrievers.offload import OffloadedRetriever
+
+from .cache import CacheEntry, ResultCache, cache_key, retriever_id
+from .ranking import TopK, aselect_top_k, select_top_k
+from .singleflight import FlightCoordinator, LocalResult, SingleFlight, StreamFlight
+
+if TYPE_CHECKING:
+    from .plan import PipelinePlan
+    from .workers import ProcessingPool
+
+logger = logging.getLogger(__name__)
 
 
 class FactPipelineError(RuntimeError):
@@ -33,22 +58,17 @@ class AggregationError(FactPipelineError):
 Ranker = Callable[[Iterable[RetrievedDoc], int], Sequence[RetrievedDoc]]
 Aggregator = Callable[[Sequence[RetrievedDoc]], str]
 Formatter = Callable[[str], str]
+StageTimer = Callable[[str], AbstractContextManager[Any]]
 
 
 def default_ranker(results: Iterable[RetrievedDoc], limit: int) -> list[RetrievedDoc]:
-    """Return the top ``limit`` results sorted by score."""
+    """Return the top ``limit`` distinct results sorted by score.
 
-    ranked = sorted(results, key=lambda doc: doc.score, reverse=True)
-    seen: set[str] = set()
-    unique: list[RetrievedDoc] = []
-    for doc in ranked:
-        if doc.id in seen:
-            continue
-        unique.append(doc)
-        seen.add(doc.id)
-        if len(unique) >= max(1, limit):
-            break
-    return unique
+    Uses a bounded heap, so ranking ``n`` candidates takes ``O(n log limit)``
+    time and ``O(limit)`` memory.
+    """
+
+    return select_top_k(results, limit)
 
 
 def default_aggregator(docs: Sequence[RetrievedDoc]) -> str:
@@ -82,97 +102,541 @@ def default_formatter(text: str) -> str:
     return ensure_period(cleaned)
 
 
+def _untimed(name: str) -> AbstractContextManager[None]:
+    return nullcontext()
+
+
+def process_documents(
+    docs: Sequence[RetrievedDoc],
+    prepared: str,
+    *,
+    top_k: int,
+    ranker: Ranker = default_ranker,
+    aggregator: Aggregator = default_aggregator,
+    formatter: Formatter = default_formatter,
+    stage: StageTimer | None = None,
+) -> str:
+    """Rank, aggregate and format ``docs`` retrieved for ``prepared``.
+
+    ``stage`` wraps each step in a context manager, which
+    :class:`FactPipeline` uses to record per-stage timings.
+    """
+
+    timed = stage or _untimed
+    if not docs:
+        raise NoFactsFoundError(f"No facts found for '{prepared}'")
+
+    with timed("rank"):
+        ranked = list(ranker(docs, top_k))
+    if not ranked:
+        raise NoFactsFoundError(f"No facts found for '{prepared}'")
+
+    try:
+        with timed("aggregate"):
+            aggregated = aggregator(ranked)
+    except FactPipelineError:
+        raise
+    except Exception as exc:  # pragma: no cover - defensive
+        raise AggregationError("Failed to aggregate supporting facts") from exc
+
+    if not aggregated.strip():
+        raise AggregationError("Aggregation produced empty output")
+
+    try:
+        with timed("format"):
+            formatted = formatter(aggregated)
+    except FactPipelineError:
+        raise
+    except Exception as exc:  # pragma: no cover - defensive
+        raise AggregationError("Failed to format aggregated facts") from exc
+
+    if not formatted.strip():
+        raise AggregationError("Formatted output is empty")
+
+    return formatted
+
+
+def _retriever_kind(retriever: Retriever | None) -> type:
+    """Return the type of ``retriever``, looking through executor adapters."""
+
+    while isinstance(retriever, OffloadedRetriever):
+        retriever = retriever.retriever
+    return type(retriever)
+
+
+class _SearchOutcome:
+    """What a streamed search learned about its ranking once it finished."""
+
+    __slots__ = ("partial",)
+
+    def __init__(self) -> None:
+        self.partial = False
+
+
+class _Stage:
+    """Context manager timing one pipeline stage and wrapping it in a span."""
+
+    __slots__ = ("_histogram", "_span", "_started")
+
+    def __init__(self, histogram: Any, span: Any | None) -> None:
+        self._histogram = histogram
+        self._span = span
+        self._started = 0.0
+
+    def __enter__(self) -> None:
+        if self._span is not None:
+            self._span.__enter__()
+        self._started = perf_counter()
+
+    def __exit__(self, *exc_info: object) -> bool:
+        self._histogram.observe(perf_counter() - self._started)
+        if self._span is not None:
+            return bool(self._span.__exit__(*exc_info))
+        return False
+
+
 @dataclass
 class FactPipeline:
-    """Execute retrieval, ranking, aggregation and formatting for ``query``."""
+    """Execute retrieval, ranking, aggregation and formatting for ``query``.
+
+    When ``cache`` is set, :meth:`arun` serves results younger than
+    ``cache_ttl`` seconds directly. Results up to ``cache_stale_ttl`` seconds
+    past that are still returned immediately while a background run refreshes
+    the entry (stale-while-revalidate).
+
+    Concurrent :meth:`arun` calls for the same key share one computation when
+    ``coalesce`` is enabled; ``coordinator`` additionally deduplicates work
+    across worker processes. Concurrent :meth:`astream` calls likewise share
+    one producer within the process. Results built from a ranking the
+    retriever flags as ``partial`` are returned but neither cached nor
+    published to other workers.
+
+    :meth:`astream` yields formatted sentences as soon as their supporting
+    documents are final. Retrievers may implement ``astream(query, k)`` to
+    hand over documents as they arrive and set ``score_sorted = True`` when
+    documents come in descending score order, which lets the first sentence
+    go out before retrieval has finished.
+
+    Each run records the duration of its prepare, search, rank, aggregate and
+    format stages in ``factsynth_pipeline_stage_seconds``, labelled by
+    retriever type, and opens matching spans once OpenTelemetry is enabled.
+
+    With a ``processing_pool``, :meth:`arun` hands large result sets to
+    worker processes for ranking, aggregation and formatting, timed as the
+    ``offload`` stage.
+
+    A ``plan`` compiled from a declarative spec (see :mod:`facts.plan`) adds
+    optional stages: document stages run between search and ranking, output
+    stages on the formatted text. Plans with document stages make
+    :meth:`astream` wait for the full result before yielding.
+    """
 
     retriever: Retriever | None = None
     top_k: int = 3
     ranker: Ranker = default_ranker
     aggregator: Aggregator = default_aggregator
     formatter: Formatter = default_formatter
+    cache: ResultCache | None = None
+    cache_ttl: float = 60.0
+    cache_stale_ttl: float = 0.0
+    coalesce: bool = True
+    coordinator: FlightCoordinator | None = None
+    processing_pool: ProcessingPool | None = None
+    plan: PipelinePlan | None = None
+    _refreshing: dict[str, asyncio.Task[None]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+    _flights: SingleFlight = field(
+        default_factory=SingleFlight, init=False, repr=False, compare=False
+    )
+    _streams: StreamFlight = field(
+        default_factory=StreamFlight, init=False, repr=False, compare=False
+    )
+    _stage_histograms: dict[tuple[str, type], Any] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
 
     def __post_init__(self) -> None:
         if self.retriever is None:
             self.retriever = create_fixture_retriever()
         if self.top_k <= 0:
             raise ValueError("top_k must be positive")
+        if self.cache_ttl <= 0:
+            raise ValueError("cache_ttl must be positive")
+        if self.cache_stale_ttl < 0:
+            raise ValueError("cache_stale_ttl must not be negative")
+
+    def _stage(self, name: str) -> _Stage:
+        kind = _retriever_kind(self.retriever)
+        histogram = self._stage_histograms.get((name, kind))
+        if histogram is None:
+            histogram = PIPELINE_STAGE_SECONDS.labels(name, kind.__name__)
+            self._stage_histograms[(name, kind)] = histogram
+        tracer = get_tracer()
+        span = None
+        if tracer is not None:
+            span = tracer.start_as_current_span(
+                f"factsynth.pipeline.{name}",
+                attributes={"factsynth.retriever": kind.__name__},
+            )
+        return _Stage(histogram, span)
 
     def _prepare_query(self, query: str) -> str:
-        prepared = query.strip()
+        with self._stage("prepare"):
+            prepared = query.strip()
         if not prepared:
             raise EmptyQueryError("Query must not be empty")
         return prepared
 
     def _process_documents(self, docs: Sequence[RetrievedDoc], prepared: str) -> str:
-        if not docs:
-            raise NoFactsFoundError(f"No facts found for '{prepared}'")
-
-        ranked = list(self.ranker(docs, self.top_k))
-        if not ranked:
-            raise NoFactsFoundError(f"No facts found for '{prepared}'")
-
-        try:
-            aggregated = self.aggregator(ranked)
-        except FactPipelineError:
-            raise
-        except Exception as exc:  # pragma: no cover - defensive
-            raise AggregationError("Failed to aggregate supporting facts") from exc
-
-        if not aggregated.strip():
-            raise AggregationError("Aggregation produced empty output")
-
-        try:
-            formatted = self.formatter(aggregated)
-        except FactPipelineError:
-            raise
-        except Exception as exc:  # pragma: no cover - defensive
-            raise AggregationError("Failed to format aggregated facts") from exc
-
-        if not formatted.strip():
-            raise AggregationError("Formatted output is empty")
-
-        return formatted
+        return process_documents(
+            docs,
+            prepared,
+            top_k=self.top_k,
+            ranker=self.ranker,
+            aggregator=self.aggregator,
+            formatter=self.formatter,
+            stage=self._stage,
+        )
+
+    @property
+    def _search_k(self) -> int:
+        candidates = self.plan.candidates if self.plan is not None else None
+        return max(1, self.top_k, candidates or 0)
+
+    @property
+    def _filtered(self) -> bool:
+        return self.plan is not None and bool(self.plan.documents)
+
+    def _finish(self, text: str) -> str:
+        if self.plan is None or not self.plan.output:
+            return text
+        return self.plan.apply_output(text, self._stage)
+
+    @property
+    def _score_sorted(self) -> bool:
+        return bool(getattr(self.retriever, "score_sorted", False))
 
     async def _collect_async_results(
         self, results: Iterable[RetrievedDoc] | AsyncIterable[RetrievedDoc]
     ) -> list[RetrievedDoc]:
+        if self.ranker is default_ranker and not self._filtered:
+            return await aselect_top_k(results, self.top_k, score_sorted=self._score_sorted)
         if isinstance(results, AsyncIterable):
             return [doc async for doc in results]
         return list(results)
 
     def run(self, query: str) -> str:
-        """Execute the pipeline and return formatted supporting facts."""
+        """Execute the pipeline and return formatted supporting facts.
+
+        Plan document stages run in a fresh event loop, so async callers
+        should use :meth:`arun` instead.
+        """
 
         prepared = self._prepare_query(query)
 
         try:
-            results = list(self.retriever.search(prepared, k=max(1, self.top_k)))
+            with self._stage("search"):
+                results = self.retriever.search(prepared, k=self._search_k)
+                if self.ranker is default_ranker and not self._filtered:
+                    results = select_top_k(results, self.top_k, score_sorted=self._score_sorted)
+                else:
+                    results = list(results)
         except FactPipelineError:
             raise
         except Exception as exc:  # pragma: no cover - defensive
             raise SearchError("Search backend failed") from exc
 
-        return self._process_documents(results, prepared)
+        if self._filtered:
+            results = asyncio.run(self.plan.apply_documents(results, prepared, self._stage))
+        return self._finish(self._process_documents(results, prepared))
+
+    def _retriever_key(self) -> str:
+        retriever = retriever_id(self.retriever)
+        if self.plan is not None:
+            retriever = f"{retriever}+plan:{self.plan.fingerprint}"
+        return retriever
+
+    def cache_key(self, query: str) -> str:
+        """Return the result cache key for ``query`` under this configuration."""
+
+        return cache_key(query, top_k=self.top_k, retriever=self._retriever_key())
+
+    def stream_cache_key(self, query: str) -> str:
+        """Return the cache key for the streamed text of ``query``.
+
+        Streamed sentences are formatted one at a time and may differ from
+        the text :meth:`arun` returns, so they are cached separately.
+        """
+
+        return cache_key(query, top_k=self.top_k, retriever=f"{self._retriever_key()}+stream")
+
+    async def _cache_get(self, cache: ResultCache, key: str) -> CacheEntry | None:
+        try:
+            return await cache.get(key)
+        except Exception:
+            logger.warning("Pipeline cache lookup failed", exc_info=True)
+            return None
+
+    async def _cache_store(self, cache: ResultCache, key: str, value: str) -> None:
+        entry = CacheEntry(value=value, created=cache.now())
+        try:
+            await cache.set(key, entry, self.cache_ttl + self.cache_stale_ttl)
+        except Exception:
+            logger.warning("Pipeline cache store failed", exc_info=True)
+
+    async def _produce(self, key: str, prepared: str) -> str:
+        value = await self._execute_async(prepared)
+        if self.cache is not None and not isinstance(value, LocalResult):
+            await self._cache_store(self.cache, key, value)
+        return value
+
+    async def _run_shared(self, key: str, prepared: str) -> str:
+        coordinator = self.coordinator
+
+        async def compute() -> str:
+            if coordinator is not None:
+                return await coordinator.run(key, lambda: self._produce(key, prepared))
+            return await self._produce(key, prepared)
+
+        if self.coalesce:
+            return await self._flights.do(key, compute)
+        return await compute()
+
+    async def _refresh(self, key: str, compute: Callable[[], Awaitable[object]]) -> None:
+        try:
+            await compute()
+        except Exception as exc:
+            logger.warning("Background pipeline refresh failed: %s", exc)
+        finally:
+            self._refreshing.pop(key, None)
+
+    def _schedule_refresh(self, key: str, compute: Callable[[], Awaitable[object]]) -> None:
+        if key in self._refreshing:
+            return
+        self._refreshing[key] = asyncio.get_running_loop().create_task(
+            self._refresh(key, compute)
+        )
 
     async def arun(self, query: str) -> str:
         """Asynchronously execute the pipeline for ``query``."""
 
         prepared = self._prepare_query(query)
+        cache = self.cache
+        key = self.cache_key(prepared)
+        if cache is None:
+            if not self.coalesce and self.coordinator is None:
+                return str(await self._execute_async(prepared))
+            return str(await self._run_shared(key, prepared))
+
+        cached = await self._cached_value(cache, key, prepared)
+        if cached is not None:
+            return cached
+        return str(await self._run_shared(key, prepared))
+
+    async def _cached_value(
+        self,
+        cache: ResultCache,
+        key: str,
+        prepared: str,
+        refresh: Callable[[], Awaitable[object]] | None = None,
+    ) -> str | None:
+        entry = await self._cache_get(cache, key)
+        if entry is not None:
+            age = cache.now() - entry.created
+            if age < self.cache_ttl:
+                PIPELINE_CACHE.labels(cache.name, "hit").inc()
+                return entry.value
+            if age < self.cache_ttl + self.cache_stale_ttl:
+                PIPELINE_CACHE.labels(cache.name, "stale").inc()
+                self._schedule_refresh(
+                    key, refresh or (lambda: self._run_shared(key, prepared))
+                )
+                return entry.value
+        PIPELINE_CACHE.labels(cache.name, "miss").inc()
+        return None
+
+    async def _execute_async(self, prepared: str) -> str:
+        """Return the formatted result, as :class:`LocalResult` if the search was partial."""
+
+        with self._stage("search"):
+            try:
+                results = await self.retriever.asearch(prepared, k=self._search_k)
+            except FactPipelineError:
+                raise
+            except Exception as exc:  # pragma: no cover - defensive
+                raise SearchError("Search backend failed") from exc
+
+            collected = await self._collect_async_results(results)
+        text = await self._format_async(collected, prepared)
+        return LocalResult(text) if is_partial(results) else text
+
+    async def _format_async(self, collected: list[RetrievedDoc], prepared: str) -> str:
+        if self._filtered:
+            collected = await self.plan.apply_documents(collected, prepared, self._stage)
+        pool = self.processing_pool
+        if pool is not None and pool.should_offload(
+            collected, self.ranker, self.aggregator, self.formatter
+        ):
+            with self._stage("offload"):
+                formatted = await pool.process(
+                    collected,
+                    prepared,
+                    top_k=self.top_k,
+                    ranker=self.ranker,
+                    aggregator=self.aggregator,
+                    formatter=self.formatter,
+                )
+            return self._finish(formatted)
+        return self._finish(self._process_documents(collected, prepared))
+
+    async def astream(self, query: str) -> AsyncIterator[str]:
+        """Yield formatted fact sentences for ``query`` as they become final.
+
+        Joining the yielded fragments with spaces gives the facts :meth:`arun`
+        returns, with the default formatter applied per sentence. Custom
+        aggregators or formatters cannot be applied incrementally, so their
+        whole output is yielded at once.
+        """
 
+        prepared = self._prepare_query(query)
+        cache = self.cache
+        key = self.stream_cache_key(prepared)
+        if cache is not None:
+
+            async def refresh() -> None:
+                async with aclosing(self._stream_shared(key, prepared)) as stream:
+                    async for _ in stream:
+                        pass
+
+            cached = await self._cached_value(cache, key, prepared, refresh)
+            if cached is not None:
+                yield cached
+                return
+
+        async with aclosing(self._stream_shared(key, prepared)) as stream:
+            async for fragment in stream:
+                yield fragment
+
+    def _stream_shared(self, key: str, prepared: str) -> AsyncIterator[str]:
+        if self.coalesce:
+            return self._streams.stream(key, lambda: self._produce_stream(key, prepared))
+        return self._produce_stream(key, prepared)
+
+    async def _produce_stream(self, key: str, prepared: str) -> AsyncIterator[str]:
+        fragments: list[str] = []
+        search = _SearchOutcome()
+        async with aclosing(self._stream_fragments(prepared, search)) as stream:
+            async for fragment in stream:
+                fragment = self._finish(fragment)
+                fragments.append(fragment)
+                yield fragment
+        if self.cache is not None and not search.partial:
+            await self._cache_store(self.cache, key, " ".join(fragments))
+
+    async def _iter_documents(
+        self, prepared: str, search: _SearchOutcome | None = None
+    ) -> AsyncIterator[RetrievedDoc]:
+        k = self._search_k
         try:
-            results = await self.retriever.asearch(prepared, k=max(1, self.top_k))
+            stream = getattr(self.retriever, "astream", None)
+            if callable(stream):
+                source = stream(prepared, k=k)
+            else:
+                source = await self.retriever.asearch(prepared, k=k)
         except FactPipelineError:
             raise
         except Exception as exc:  # pragma: no cover - defensive
             raise SearchError("Search backend failed") from exc
 
-        collected = await self._collect_async_results(results)
-        return self._process_documents(collected, prepared)
+        if not isinstance(source, AsyncIterable):
+            if search is not None:
+                search.partial = is_partial(source)
+            for doc in source:
+                yield doc
+            return
+        iterator = source.__aiter__()
+        try:
+            while True:
+                try:
+                    doc = await iterator.__anext__()
+                except StopAsyncIteration:
+                    return
+                except FactPipelineError:
+                    raise
+                except Exception as exc:
+                    raise SearchError("Search backend failed") from exc
+                yield doc
+        finally:
+            if search is not None:
+                search.partial = is_partial(source)
+            close = getattr(iterator, "aclose", None)
+            if close is not None:
+                await close()
+
+    async def _stream_ranked(
+        self, prepared: str, search: _SearchOutcome | None = None
+    ) -> AsyncIterator[RetrievedDoc]:
+        limit = max(1, self.top_k)
+        async with aclosing(self._iter_documents(prepared, search)) as docs:
+            if self.ranker is not default_ranker:
+                collected = [doc async for doc in docs]
+                for doc in self.ranker(collected, self.top_k) if collected else ():
+                    yield doc
+                return
+            if self._score_sorted:
+                seen: set[str] = set()
+                async for doc in docs:
+                    if doc.id in seen:
+                        continue
+                    seen.add(doc.id)
+                    yield doc
+                    if len(seen) >= limit:
+                        return
+                return
+            top = TopK(limit)
+            async for doc in docs:
+                top.push(doc)
+        for doc in top.results():
+            yield doc
+
+    async def _stream_fragments(
+        self, prepared: str, search: _SearchOutcome | None = None
+    ) -> AsyncIterator[str]:
+        if (
+            self._filtered
+            or self.aggregator is not default_aggregator
+            or self.formatter is not default_formatter
+        ):
+            async with aclosing(self._iter_documents(prepared, search)) as docs:
+                collected = [doc async for doc in docs]
+            if self._filtered and collected:
+                collected = await self.plan.apply_documents(collected, prepared, self._stage)
+            yield self._process_documents(collected, prepared)
+            return
+
+        found = emitted = False
+        async with aclosing(self._stream_ranked(prepared, search)) as ranked:
+            async for doc in ranked:
+                found = True
+                if not doc.text.strip():
+                    continue
+                try:
+                    fragment = default_formatter(default_aggregator([doc]))
+                except AggregationError:
+                    continue
+                emitted = True
+                yield fragment
+        if not found:
+            raise NoFactsFoundError(f"No facts found for '{prepared}'")
+        if not emitted:
+            raise AggregationError("No supporting text to aggregate")
 
 
 __all__ = [
     "Aggregator",
+    "CacheEntry",
+    "ResultCache",
     "FactPipeline",
     "FactPipelineError",
     "EmptyQueryError",
@@ -180,4 +644,6 @@ __all__ = [
     "AggregationError",
     "Ranker",
     "SearchError",
+    "process_documents",
+    "TopK",
 ]
@@ -0,0 +1,474 @@
+"""Declarative stage plans for :class:`~facts.pipeline.FactPipeline`.
+
+A plan adds optional stages around the pipeline's fixed search, rank,
+aggregate and format steps. It is described in YAML::
+
+    candidates: 10            # documents to fetch before filtering
+    documents:                # run after search, before ranking
+      - dedupe
+      - near_dedupe:          # drop mirrored copies by MinHash similarity
+          threshold: 0.8
+      - parallel:             # branches run concurrently; documents must pass all
+          - quality:
+              policy: quality_policy.yaml
+          - nli:
+              threshold: 0.3
+    output:                   # applied to the formatted text
+      - redact
+
+:func:`load_plan` compiles a spec file once and reuses the plan until the
+file or a policy file it names changes. Every stage is timed under its own
+name. A stage that leaves no documents short-circuits the run with
+:class:`~facts.pipeline.NoFactsFoundError` and cancels sibling branches that
+are still running.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections.abc import Callable, Mapping, Sequence
+from dataclasses import dataclass, replace
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, Protocol
+
+import regex
+import yaml
+
+from factsynth_ultimate.services.nli import NLI
+from factsynth_ultimate.services.redaction import redact_pii
+from factsynth_ultimate.services.retrievers.base import RetrievedDoc
+from factsynth_ultimate.tokenization import normalize, tokenize
+
+from .pipeline import FactPipelineError, NoFactsFoundError, StageTimer, _untimed
+from .ranking import suppress_near_duplicates
+
+logger = logging.getLogger(__name__)
+
+
+class PlanError(ValueError):
+    """Raised when a pipeline spec cannot be compiled."""
+
+
+class DocumentStage(Protocol):
+    """Stage transforming or filtering retrieved documents."""
+
+    name: str
+
+    async def __call__(self, docs: list[RetrievedDoc], query: str) -> list[RetrievedDoc]:
+        """Return the documents that continue to the next stage."""
+
+
+class TextStage(Protocol):
+    """Stage transforming the formatted pipeline output."""
+
+    name: str
+
+    def __call__(self, text: str) -> str:
+        """Return the transformed ``text``."""
+
+
+class DedupeStage:
+    """Drop repeated documents, keeping the best-scoring copy.
+
+    Documents are duplicates when they share an ``id`` or their normalized
+    text is identical. The first occurrence keeps its position.
+    """
+
+    name = "dedupe"
+
+    async def __call__(self, docs: list[RetrievedDoc], query: str) -> list[RetrievedDoc]:
+        kept: list[RetrievedDoc] = []
+        slots: dict[str, int] = {}
+        for doc in docs:
+            keys = (f"id:{doc.id}", f"text:{normalize(doc.text).casefold()}")
+            index = next((slots[key] for key in keys if key in slots), None)
+            if index is None:
+                index = len(kept)
+                kept.append(doc)
+            elif doc.score > kept[index].score:
+                kept[index] = doc
+            for key in keys:
+                slots.setdefault(key, index)
+        return kept
+
+
+class NearDuplicateStage:
+    """Drop documents whose text nearly duplicates a better-scoring one.
+
+    Similarity is the Jaccard similarity of word shingles estimated from
+    MinHash signatures, taken from the documents when their index stored
+    them. Survivors are returned by descending score.
+    """
+
+    name = "near_dedupe"
+
+    def __init__(self, threshold: float = 0.8) -> None:
+        if not 0 < threshold <= 1:
+            raise PlanError("near_dedupe threshold must be in (0, 1]")
+        self.threshold = threshold
+
+    async def __call__(self, docs: list[RetrievedDoc], query: str) -> list[RetrievedDoc]:
+        return suppress_near_duplicates(docs, threshold=self.threshold)
+
+
+class RedactStage:
+    """Replace PII in document texts with redaction tokens."""
+
+    name = "redact"
+
+    async def __call__(self, docs: list[RetrievedDoc], query: str) -> list[RetrievedDoc]:
+        return [replace(doc, text=redact_pii(doc.text)) for doc in docs]
+
+
+class RedactOutputStage:
+    """Replace PII in the formatted output with redaction tokens."""
+
+    name = "redact_output"
+
+    def __call__(self, text: str) -> str:
+        return redact_pii(text)
+
+
+class NLIStage:
+    """Keep documents that entail the query with at least ``threshold``."""
+
+    name = "nli"
+
+    def __init__(self, threshold: float = 0.3, nli: NLI | None = None) -> None:
+        if not 0 <= threshold <= 1:
+            raise PlanError("nli threshold must be between 0 and 1")
+        self.threshold = threshold
+        self.nli = nli or NLI()
+
+    async def __call__(self, docs: list[RetrievedDoc], query: str) -> list[RetrievedDoc]:
+        scores = await asyncio.gather(*(self.nli.classify(doc.text, query) for doc in docs))
+        return [doc for doc, score in zip(docs, scores) if score >= self.threshold]
+
+
+def _source_quality(doc: RetrievedDoc, query: str) -> float:
+    return min(1.0, max(0.0, doc.score))
+
+
+def _evidence_support(doc: RetrievedDoc, query: str) -> float:
+    wanted = {token.casefold() for token in tokenize(query)}
+    if not wanted:
+        return 0.0
+    found = {token.casefold() for token in tokenize(doc.text)}
+    return len(wanted & found) / len(wanted)
+
+
+QualitySignal = Callable[[RetrievedDoc, str], float]
+
+QUALITY_SIGNALS: dict[str, QualitySignal] = {
+    "SQS": _source_quality,
+    "ESS": _evidence_support,
+}
+
+
+class QualityGate:
+    """Filter documents by a weighted quality score and banned topics.
+
+    ``weights`` combine the named :data:`QUALITY_SIGNALS` (``SQS``, the
+    retrieval score clipped to ``[0, 1]``, and ``ESS``, the share of query
+    tokens found in the document) into a score normalized by the total
+    weight. Documents scoring below ``min_score`` or mentioning a banned
+    topic are dropped.
+    """
+
+    name = "quality"
+
+    def __init__(
+        self,
+        weights: Mapping[str, float],
+        *,
+        min_score: float = 0.0,
+        banned_topics: Sequence[str] = (),
+    ) -> None:
+        unknown = sorted(set(weights) - set(QUALITY_SIGNALS))
+        if unknown:
+            raise PlanError(f"unknown quality signals: {', '.join(unknown)}")
+        total = sum(weights.values())
+        if total <= 0 or any(weight < 0 for weight in weights.values()):
+            raise PlanError("quality weights must be non-negative with a positive sum")
+        self.weights = {name: weight / total for name, weight in weights.items()}
+        self.min_score = float(min_score)
+        topics = [topic.strip() for topic in banned_topics if topic.strip()]
+        self._banned = (
+            regex.compile(
+                r"\b(?:" + "|".join(regex.escape(topic) for topic in topics) + r")\b",
+                regex.IGNORECASE,
+            )
+            if topics
+            else None
+        )
+
+    def score(self, doc: RetrievedDoc, query: str) -> float:
+        """Return the weighted quality score of ``doc`` for ``query``."""
+
+        return sum(
+            weight * QUALITY_SIGNALS[name](doc, query) for name, weight in self.weights.items()
+        )
+
+    async def __call__(self, docs: list[RetrievedDoc], query: str) -> list[RetrievedDoc]:
+        banned = self._banned
+        return [
+            doc
+            for doc in docs
+            if (banned is None or not banned.search(doc.text))
+            and self.score(doc, query) >= self.min_score
+        ]
+
+
+async def _run_stages(
+    stages: Sequence[DocumentStage],
+    docs: list[RetrievedDoc],
+    query: str,
+    timed: StageTimer,
+) -> list[RetrievedDoc]:
+    for stage in stages:
+        try:
+            with timed(stage.name):
+                if isinstance(stage, ParallelStage):
+                    docs = await stage.run(docs, query, timed)
+                else:
+                    docs = await stage(docs, query)
+        except FactPipelineError:
+            raise
+        except Exception as exc:
+            raise FactPipelineError(f"Pipeline stage '{stage.name}' failed") from exc
+        if not docs:
+            logger.debug("Pipeline stage %s left no documents", stage.name)
+            return []
+    return docs
+
+
+class ParallelStage:
+    """Run branches of stages concurrently on the same documents.
+
+    A document survives when every branch keeps its ``id``; survivors keep
+    their input order and take their content from the first branch. As soon
+    as one branch comes back empty the others are cancelled.
+    """
+
+    name = "parallel"
+
+    def __init__(self, branches: Sequence[Sequence[DocumentStage]]) -> None:
+        if len(branches) < 2:
+            raise PlanError("parallel needs at least two branches")
+        self.branches = [tuple(branch) for branch in branches]
+
+    async def __call__(self, docs: list[RetrievedDoc], query: str) -> list[RetrievedDoc]:
+        return await self.run(docs, query, _untimed)
+
+    async def run(
+        self, docs: list[RetrievedDoc], query: str, timed: StageTimer
+    ) -> list[RetrievedDoc]:
+        """Run every branch, timing each of their stages with ``timed``."""
+
+        tasks = [
+            asyncio.ensure_future(_run_stages(branch, list(docs), query, timed))
+            for branch in self.branches
+        ]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                if not await finished:
+                    return []
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        results = [task.result() for task in tasks]
+        survivors = set.intersection(*({doc.id for doc in result} for result in results))
+        first = {doc.id: doc for doc in results[0]}
+        return [first[doc.id] for doc in docs if doc.id in survivors]
+
+
+@dataclass(frozen=True)
+class PipelinePlan:
+    """Compiled stage plan shared by every request of a pipeline."""
+
+    documents: tuple[DocumentStage, ...] = ()
+    output: tuple[TextStage, ...] = ()
+    candidates: int | None = None
+    fingerprint: str = ""
+    sources: tuple[str, ...] = ()
+
+    async def apply_documents(
+        self, docs: list[RetrievedDoc], query: str, stage: StageTimer | None = None
+    ) -> list[RetrievedDoc]:
+        """Run the document stages, raising when none of ``docs`` survive."""
+
+        kept = await _run_stages(self.documents, list(docs), query, stage or _untimed)
+        if not kept:
+            raise NoFactsFoundError(f"No facts found for '{query}'")
+        return kept
+
+    def apply_output(self, text: str, stage: StageTimer | None = None) -> str:
+        """Run the output stages over the formatted ``text``."""
+
+        timed = stage or _untimed
+        for item in self.output:
+            try:
+                with timed(item.name):
+                    text = item(text)
+            except FactPipelineError:
+                raise
+            except Exception as exc:
+                raise FactPipelineError(f"Pipeline stage '{item.name}' failed") from exc
+        return text
+
+
+def _split_entry(entry: Any) -> tuple[str, dict[str, Any]]:
+    if isinstance(entry, str):
+        return entry, {}
+    if isinstance(entry, Mapping) and len(entry) == 1:
+        ((name, options),) = entry.items()
+        if options is None:
+            options = {}
+        if name != "parallel" and not isinstance(options, Mapping):
+            raise PlanError(f"options for stage '{name}' must be a mapping")
+        return str(name), options
+    raise PlanError(f"invalid stage entry: {entry!r}")
+
+
+def _read_yaml(path: Path) -> Any:
+    try:
+        return yaml.safe_load(path.read_text(encoding="utf-8"))
+    except (OSError, yaml.YAMLError) as exc:
+        raise PlanError(f"cannot read {path}: {exc}") from exc
+
+
+def _quality_gate(
+    options: Mapping[str, Any], base_dir: Path, policies: dict[str, Any]
+) -> QualityGate:
+    policy: Mapping[str, Any] = options
+    if "policy" in options:
+        path = (base_dir / str(options["policy"])).resolve()
+        loaded = _read_yaml(path)
+        if not isinstance(loaded, Mapping):
+            raise PlanError("quality policy must be a mapping")
+        policies[str(path)] = loaded
+        policy = loaded
+    weights = policy.get("weights") or {}
+    filters = policy.get("filters") or {}
+    if not weights:
+        raise PlanError("quality stage needs weights")
+    return QualityGate(
+        {str(name): float(weight) for name, weight in weights.items()},
+        min_score=float(filters.get("min_score", 0.0)),
+        banned_topics=[str(topic) for topic in filters.get("banned_topics") or ()],
+    )
+
+
+def _document_stage(entry: Any, base_dir: Path, policies: dict[str, Any]) -> DocumentStage:
+    name, options = _split_entry(entry)
+    if name == "parallel":
+        if not isinstance(options, Sequence) or isinstance(options, str):
+            raise PlanError("parallel expects a list of branches")
+        branches = [
+            [_document_stage(item, base_dir, policies) for item in branch]
+            if isinstance(branch, list)
+            else [_document_stage(branch, base_dir, policies)]
+            for branch in options
+        ]
+        return ParallelStage(branches)
+    if name == "dedupe":
+        return DedupeStage()
+    if name == "near_dedupe":
+        return NearDuplicateStage(float(options.get("threshold", 0.8)))
+    if name == "redact":
+        return RedactStage()
+    if name == "nli":
+        return NLIStage(float(options.get("threshold", 0.3)))
+    if name == "quality":
+        return _quality_gate(options, base_dir, policies)
+    raise PlanError(f"unknown document stage '{name}'")
+
+
+def _output_stage(entry: Any) -> TextStage:
+    name, _ = _split_entry(entry)
+    if name == "redact":
+        return RedactOutputStage()
+    raise PlanError(f"unknown output stage '{name}'")
+
+
+def compile_plan(spec: Mapping[str, Any], *, base_dir: Path | str = ".") -> PipelinePlan:
+    """Compile a parsed pipeline ``spec`` into a :class:`PipelinePlan`.
+
+    Policy files named by stages are resolved relative to ``base_dir``. The
+    plan's fingerprint covers ``spec`` together with the contents of those
+    files, which are listed in its ``sources``.
+    """
+
+    unknown = sorted(set(spec) - {"candidates", "documents", "output"})
+    if unknown:
+        raise PlanError(f"unknown pipeline spec keys: {', '.join(unknown)}")
+    base = Path(base_dir)
+    candidates = spec.get("candidates")
+    if candidates is not None and (not isinstance(candidates, int) or candidates < 1):
+        raise PlanError("candidates must be a positive integer")
+    policies: dict[str, Any] = {}
+    documents = tuple(
+        _document_stage(entry, base, policies) for entry in spec.get("documents") or ()
+    )
+    output = tuple(_output_stage(entry) for entry in spec.get("output") or ())
+    fingerprint = sha256(
+        json.dumps(
+            {"spec": spec, "policies": list(policies.values())}, sort_keys=True, default=str
+        ).encode()
+    ).hexdigest()[:16]
+    return PipelinePlan(documents, output, candidates, fingerprint, tuple(policies))
+
+
+_PLANS: dict[Path, tuple[tuple[int, ...], PipelinePlan]] = {}
+
+
+def _mtimes(paths: Sequence[str | Path]) -> tuple[int, ...]:
+    try:
+        return tuple(Path(path).stat().st_mtime_ns for path in paths)
+    except OSError as exc:
+        raise PlanError(f"cannot read {exc.filename}: {exc}") from exc
+
+
+def load_plan(path: Path | str) -> PipelinePlan:
+    """Return the compiled plan for the spec at ``path``.
+
+    Plans are cached per file and recompiled only when the modification time
+    of the spec or of a policy file it names changes. The spec is the first
+    of the plan's ``sources``, so callers holding a plan can pass
+    ``plan.sources[0]`` back in to pick up edits.
+    """
+
+    resolved = Path(path).resolve()
+    cached = _PLANS.get(resolved)
+    if cached is not None and cached[0] == _mtimes(cached[1].sources):
+        return cached[1]
+    mtime = _mtimes([resolved])
+    spec = _read_yaml(resolved) or {}
+    if not isinstance(spec, Mapping):
+        raise PlanError(f"{resolved} must contain a mapping")
+    compiled = compile_plan(spec, base_dir=resolved.parent)
+    plan = replace(compiled, sources=(str(resolved), *compiled.sources))
+    _PLANS[resolved] = (mtime + _mtimes(compiled.sources), plan)
+    return plan
+
+
+__all__ = [
+    "QUALITY_SIGNALS",
+    "DedupeStage",
+    "DocumentStage",
+    "NLIStage",
+    "NearDuplicateStage",
+    "ParallelStage",
+    "PipelinePlan",
+    "PlanError",
+    "QualityGate",
+    "RedactOutputStage",
+    "RedactStage",
+    "TextStage",
+    "compile_plan",
+    "load_plan",
+]
@@ -0,0 +1,221 @@
+"""Incremental ranking primitives for :class:`~facts.pipeline.FactPipeline`."""
+
+from __future__ import annotations
+
+import heapq
+from collections.abc import AsyncIterable, Iterable, Sequence
+from itertools import count
+
+from factsynth_ultimate.services.minhash import DEFAULT_MINHASH, MinHasher, lsh_bands, similarity
+from factsynth_ultimate.services.retrievers.base import RetrievedDoc
+
+
+class TopK:
+    """Bounded top-``k`` selection of documents deduplicated by ``id``.
+
+    Documents are pushed one at a time and only the best ``k`` distinct ids
+    are retained, using ``O(k)`` memory. When an id is seen again with a
+    higher score the better copy replaces the earlier one; ties keep the
+    document that arrived first, matching a stable descending sort.
+    """
+
+    def __init__(self, k: int) -> None:
+        if k <= 0:
+            raise ValueError("k must be positive")
+        self.k = k
+        self._heap: list[tuple[float, int, RetrievedDoc]] = []
+        self._best: dict[str, tuple[float, int, RetrievedDoc]] = {}
+        self._order = count()
+
+    def __len__(self) -> int:
+        return len(self._best)
+
+    @property
+    def threshold(self) -> float | None:
+        """Return the lowest retained score once ``k`` documents are held."""
+
+        if len(self._best) < self.k:
+            return None
+        self._prune()
+        return self._heap[0][0]
+
+    def _prune(self) -> None:
+        heap, best = self._heap, self._best
+        while heap and best.get(heap[0][2].id) is not heap[0]:
+            heapq.heappop(heap)
+
+    def push(self, doc: RetrievedDoc) -> None:
+        """Offer ``doc`` for inclusion in the top ``k``."""
+
+        current = self._best.get(doc.id)
+        if current is not None and doc.score <= current[0]:
+            return
+        # Later arrivals sort lower on ties so they are evicted first.
+        entry = (doc.score, -next(self._order), doc)
+        if current is None and len(self._best) >= self.k:
+            self._prune()
+            if entry[:2] <= self._heap[0][:2]:
+                return
+            evicted = heapq.heappop(self._heap)
+            del self._best[evicted[2].id]
+        self._best[doc.id] = entry
+        heapq.heappush(self._heap, entry)
+        if len(self._heap) > 2 * self.k:
+            self._heap = list(self._best.values())
+            heapq.heapify(self._heap)
+
+    def results(self) -> list[RetrievedDoc]:
+        """Return retained documents ordered by descending score."""
+
+        ranked = sorted(self._best.values(), key=lambda entry: entry[:2], reverse=True)
+        return [entry[2] for entry in ranked]
+
+
+class NearDuplicateFilter:
+    """Admit documents unless they nearly duplicate one admitted earlier.
+
+    Documents are compared by MinHash ``signature``, computed with ``hasher``
+    when a document does not carry a compatible one. Signatures are cut into
+    LSH bands and only admitted documents sharing a band bucket are compared,
+    so filtering ``n`` documents takes time linear in ``n`` unless many of
+    them collide. A document whose estimated Jaccard similarity to any
+    candidate reaches ``threshold`` is rejected.
+    """
+
+    def __init__(self, threshold: float = 0.8, *, hasher: MinHasher | None = None) -> None:
+        self.threshold = threshold
+        self.hasher = hasher or DEFAULT_MINHASH
+        self.bands, self.rows = lsh_bands(self.hasher.num_perm, threshold)
+        # Stored signatures are computed with DEFAULT_MINHASH at index time.
+        self._reuse_stored = self.hasher.params == DEFAULT_MINHASH.params
+        self._buckets: dict[tuple[int, tuple[int, ...]], list[int]] = {}
+        self._admitted: list[Sequence[int]] = []
+
+    def __len__(self) -> int:
+        return len(self._admitted)
+
+    def signature(self, doc: RetrievedDoc) -> Sequence[int]:
+        """Return the stored signature of ``doc`` or compute one from its text.
+
+        Stored signatures are only reused when ``hasher`` has the parameters
+        of :data:`DEFAULT_MINHASH`, which indexes use to compute them.
+        """
+
+        if self._reuse_stored and doc.signature is not None:
+            return doc.signature
+        return self.hasher.signature(doc.text)
+
+    def admit(self, doc: RetrievedDoc) -> bool:
+        """Return ``True`` and remember ``doc`` unless it is a near-duplicate."""
+
+        signature = self.signature(doc)
+        rows = self.rows
+        keys = [
+            (band, tuple(signature[band * rows : (band + 1) * rows]))
+            for band in range(self.bands)
+        ]
+        seen: set[int] = set()
+        for key in keys:
+            for other in self._buckets.get(key, ()):
+                if other in seen:
+                    continue
+                seen.add(other)
+                if similarity(signature, self._admitted[other]) >= self.threshold:
+                    return False
+        slot = len(self._admitted)
+        self._admitted.append(signature)
+        for key in keys:
+            self._buckets.setdefault(key, []).append(slot)
+        return True
+
+
+def suppress_near_duplicates(
+    docs: Iterable[RetrievedDoc],
+    *,
+    threshold: float = 0.8,
+    hasher: MinHasher | None = None,
+) -> list[RetrievedDoc]:
+    """Return ``docs`` by descending score without near-duplicates.
+
+    Of every group of near-duplicates the best-scoring document is kept.
+    The sort is stable and linear for input that is already score-sorted.
+    """
+
+    near = NearDuplicateFilter(threshold, hasher=hasher)
+    ordered = sorted(docs, key=lambda doc: doc.score, reverse=True)
+    return [doc for doc in ordered if near.admit(doc)]
+
+
+def _first_unique(docs: Iterable[RetrievedDoc], limit: int) -> list[RetrievedDoc]:
+    seen: set[str] = set()
+    unique: list[RetrievedDoc] = []
+    for doc in docs:
+        if doc.id in seen:
+            continue
+        seen.add(doc.id)
+        unique.append(doc)
+        if len(unique) >= limit:
+            break
+    return unique
+
+
+def select_top_k(
+    results: Iterable[RetrievedDoc], limit: int, *, score_sorted: bool = False
+) -> list[RetrievedDoc]:
+    """Return the best ``limit`` distinct documents from ``results``.
+
+    ``results`` is consumed lazily. When ``score_sorted`` is set the input is
+    trusted to be in descending score order and consumption stops as soon as
+    ``limit`` distinct ids have been seen.
+    """
+
+    limit = max(1, limit)
+    if score_sorted:
+        return _first_unique(results, limit)
+    top = TopK(limit)
+    for doc in results:
+        top.push(doc)
+    return top.results()
+
+
+async def aselect_top_k(
+    results: Iterable[RetrievedDoc] | AsyncIterable[RetrievedDoc],
+    limit: int,
+    *,
+    score_sorted: bool = False,
+) -> list[RetrievedDoc]:
+    """Asynchronous counterpart of :func:`select_top_k` accepting async iterables."""
+
+    if not isinstance(results, AsyncIterable):
+        return select_top_k(results, limit, score_sorted=score_sorted)
+    limit = max(1, limit)
+    iterator = results.__aiter__()
+    try:
+        if score_sorted:
+            seen: set[str] = set()
+            unique: list[RetrievedDoc] = []
+            async for doc in iterator:
+                if doc.id in seen:
+                    continue
+                seen.add(doc.id)
+                unique.append(doc)
+                if len(unique) >= limit:
+                    break
+            return unique
+        top = TopK(limit)
+        async for doc in iterator:
+            top.push(doc)
+        return top.results()
+    finally:
+        close = getattr(iterator, "aclose", None)
+        if close is not None:
+            await close()
+
+
+__all__ = [
+    "NearDuplicateFilter",
+    "TopK",
+    "aselect_top_k",
+    "select_top_k",
+    "suppress_near_duplicates",
+]
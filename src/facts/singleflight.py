@@ -0,0 +1,315 @@
+"""Coalescing of concurrent pipeline runs that share a cache key.
+
+:class:`SingleFlight` makes concurrent callers within one event loop await a
+single shared task. The task is cancelled only once every caller waiting on
+it has gone away, so a disconnecting first caller does not abort work other
+requests still need. :class:`StreamFlight` does the same for async
+iterators: one producer runs per key and every consumer receives all of its
+items, including those produced before it joined.
+
+:class:`RedisSingleFlight` extends the idea across worker processes: the
+worker that wins a short-lived Redis lock computes the result and publishes
+it on a channel, while the others wait for that message and fall back to
+computing locally if it does not arrive in time. The result key and channel
+are scoped to the lock token of the flight, so followers never pick up the
+result of an earlier flight for the same key. A result returned as
+:class:`LocalResult` is not published, so the followers compute their own.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import aclosing, suppress
+from typing import Any, Protocol, TypeVar, runtime_checkable
+
+from factsynth_ultimate.core.metrics import PIPELINE_COALESCED
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _Call:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task[Any]) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Share one in-flight task between concurrent callers of the same key."""
+
+    def __init__(self) -> None:
+        self._calls: dict[str, _Call] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def _forget(self, key: str, call: _Call) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Return the result of ``fn()``, sharing it with concurrent callers."""
+
+        call = self._calls.get(key)
+        if call is None:
+            task = asyncio.ensure_future(fn())
+            call = _Call(task)
+            self._calls[key] = call
+            task.add_done_callback(lambda _task, key=key, call=call: self._forget(key, call))
+        else:
+            PIPELINE_COALESCED.labels("local").inc()
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+
+
+class _Broadcast:
+    __slots__ = ("items", "finished", "subscribers", "task", "_waiter")
+
+    def __init__(self) -> None:
+        self.items: list[Any] = []
+        self.finished = False
+        self.subscribers = 0
+        self.task: asyncio.Task[None] | None = None
+        self._waiter = asyncio.get_running_loop().create_future()
+
+    def wake(self) -> None:
+        waiter, self._waiter = self._waiter, asyncio.get_running_loop().create_future()
+        if not waiter.done():
+            waiter.set_result(None)
+
+    async def changed(self) -> None:
+        await asyncio.shield(self._waiter)
+
+
+class StreamFlight:
+    """Share one in-flight async iterator between concurrent consumers of a key."""
+
+    def __init__(self) -> None:
+        self._calls: dict[str, _Broadcast] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def _forget(self, key: str, call: _Broadcast) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+    @staticmethod
+    async def _pump(call: _Broadcast, source: AsyncIterator[T]) -> None:
+        try:
+            async with aclosing(source) as items:  # type: ignore[type-var]
+                async for item in items:
+                    call.items.append(item)
+                    call.wake()
+        finally:
+            call.finished = True
+            call.wake()
+
+    async def stream(self, key: str, fn: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+        """Yield the items of ``fn()``, sharing one producer with concurrent callers."""
+
+        call = self._calls.get(key)
+        if call is None:
+            call = _Broadcast()
+            task = asyncio.ensure_future(self._pump(call, fn()))
+            call.task = task
+            self._calls[key] = call
+            task.add_done_callback(lambda _task, key=key, call=call: self._forget(key, call))
+        else:
+            PIPELINE_COALESCED.labels("stream").inc()
+        call.subscribers += 1
+        try:
+            index = 0
+            while True:
+                while index < len(call.items):
+                    yield call.items[index]
+                    index += 1
+                if call.finished:
+                    break
+                await call.changed()
+            task = call.task
+            if task is not None:
+                if not task.done():
+                    await asyncio.shield(task)
+                if task.cancelled():
+                    raise asyncio.CancelledError
+                error = task.exception()
+                if error is not None:
+                    raise error
+        finally:
+            call.subscribers -= 1
+            if call.subscribers == 0 and call.task is not None and not call.task.done():
+                # Later callers must start afresh rather than join a cancelled producer.
+                self._forget(key, call)
+                call.task.cancel()
+
+
+# Delete the lock only while it still holds our token, in one round trip.
+_RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+class LocalResult(str):
+    """Result kept by the worker that computed it instead of being broadcast."""
+
+
+@runtime_checkable
+class FlightCoordinator(Protocol):
+    """Cross-process coordinator deciding which worker computes a key."""
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[str]]) -> str:
+        """Return the result for ``key``, computing it with ``fn`` if elected."""
+
+
+class RedisSingleFlight:
+    """Elect one worker per key with a Redis lock and broadcast its result."""
+
+    def __init__(
+        self,
+        client: Any,
+        *,
+        prefix: str = "factsynth:flight:",
+        lock_ttl: float = 30.0,
+        wait_timeout: float = 10.0,
+        result_ttl: float = 5.0,
+    ) -> None:
+        if lock_ttl <= 0 or wait_timeout <= 0 or result_ttl <= 0:
+            raise ValueError("lock_ttl, wait_timeout and result_ttl must be positive")
+        self.client = client
+        self.prefix = prefix
+        self.lock_ttl = float(lock_ttl)
+        self.wait_timeout = float(wait_timeout)
+        self.result_ttl = float(result_ttl)
+
+    def _flight_keys(self, key: str, token: str) -> tuple[str, str]:
+        return f"{self.prefix}result:{key}:{token}", f"{self.prefix}done:{key}:{token}"
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[str]]) -> str:
+        """Return the result for ``key``, computing it with ``fn`` if elected."""
+
+        lock_key = f"{self.prefix}lock:{key}"
+        token = uuid.uuid4().hex
+        acquired = False
+        holder: str | None = None
+        try:
+            # The holder may release between our SET and GET; try to lead once more.
+            for _ in range(2):
+                acquired = await self.client.set(
+                    lock_key, token, nx=True, px=int(self.lock_ttl * 1000)
+                )
+                if acquired:
+                    break
+                current = await self.client.get(lock_key)
+                if current is not None:
+                    holder = _text(current)
+                    break
+        except Exception:
+            logger.warning("Single-flight lock unavailable; running locally", exc_info=True)
+            return await fn()
+        if acquired:
+            return await self._lead(fn, lock_key, token, *self._flight_keys(key, token))
+        value = None if holder is None else await self._follow(*self._flight_keys(key, holder))
+        if value is None:
+            PIPELINE_COALESCED.labels("fallback").inc()
+            return await fn()
+        PIPELINE_COALESCED.labels("redis").inc()
+        return value
+
+    async def _lead(
+        self,
+        fn: Callable[[], Awaitable[str]],
+        lock_key: str,
+        token: str,
+        result_key: str,
+        channel: str,
+    ) -> str:
+        value: str | None = None
+        try:
+            value = await fn()
+            return value
+        finally:
+            shared = None if isinstance(value, LocalResult) else value
+            await self._publish(result_key, channel, shared)
+            await self._release(lock_key, token)
+
+    async def _publish(self, result_key: str, channel: str, value: str | None) -> None:
+        payload = json.dumps({"ok": value is not None, "value": value})
+        try:
+            await self.client.set(result_key, payload, px=int(self.result_ttl * 1000))
+            await self.client.publish(channel, payload)
+        except Exception:
+            logger.warning("Single-flight result publish failed", exc_info=True)
+
+    async def _release(self, lock_key: str, token: str) -> None:
+        try:
+            await self.client.eval(_RELEASE_SCRIPT, 1, lock_key, token)
+        except Exception:
+            logger.warning("Single-flight lock release failed", exc_info=True)
+
+    async def _follow(self, result_key: str, channel: str) -> str | None:
+        try:
+            pubsub = self.client.pubsub()
+            await pubsub.subscribe(channel)
+        except Exception:
+            logger.warning("Single-flight subscribe failed", exc_info=True)
+            return None
+        try:
+            # The leader may have finished before we subscribed.
+            stored = await self.client.get(result_key)
+            if stored is not None:
+                return _decode(stored)
+            deadline = time.monotonic() + self.wait_timeout
+            while (remaining := deadline - time.monotonic()) > 0:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=min(remaining, 1.0)
+                )
+                if message is not None and message.get("type") == "message":
+                    return _decode(message["data"])
+            return None
+        except Exception:
+            logger.warning("Single-flight wait failed", exc_info=True)
+            return None
+        finally:
+            with suppress(Exception):
+                await pubsub.unsubscribe(channel)
+                await pubsub.aclose()
+
+
+def _text(raw: bytes | str) -> str:
+    return raw.decode() if isinstance(raw, bytes) else raw
+
+
+def _decode(raw: bytes | str) -> str | None:
+    try:
+        data = json.loads(_text(raw))
+    except ValueError:
+        return None
+    if not data.get("ok"):
+        return None
+    return str(data["value"])
+
+
+__all__ = [
+    "FlightCoordinator",
+    "LocalResult",
+    "RedisSingleFlight",
+    "SingleFlight",
+    "StreamFlight",
+]
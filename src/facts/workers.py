@@ -0,0 +1,186 @@
+"""Process pool for the CPU-bound rank, aggregate and format stages.
+
+Sanitizing and formatting aggregated text runs several regex passes that
+would otherwise occupy the event loop thread. :class:`ProcessingPool` ships
+that work to pre-warmed worker processes whose initializer already imported
+the formatting modules and compiled their patterns. Documents travel as
+compact ``(id, text, score)`` tuples. Small inputs, and pipelines whose
+callables cannot be pickled, are processed inline because the round trip
+would cost more than it saves. The default ranker already trims results to
+the top ``k`` while collecting them, so offloading mostly pays off for long
+documents or custom rankers that see every candidate.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import importlib
+import logging
+import multiprocessing
+import os
+import pickle
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from factsynth_ultimate.services.retrievers.base import RetrievedDoc
+
+from .pipeline import Aggregator, Formatter, Ranker, default_formatter, process_documents
+
+logger = logging.getLogger(__name__)
+
+DocTuple = tuple[str, str, float]
+
+DEFAULT_PRELOAD = ("regex", "factsynth_ultimate.formatting", "facts.pipeline")
+
+
+def _warm(modules: Iterable[str]) -> None:
+    for module in modules:
+        importlib.import_module(module)
+    default_formatter("# Warm-up: compile the sanitize patterns?")
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _process_remote(
+    docs: list[DocTuple],
+    prepared: str,
+    top_k: int,
+    ranker: Ranker,
+    aggregator: Aggregator,
+    formatter: Formatter,
+) -> str:
+    return process_documents(
+        [RetrievedDoc(id=doc_id, text=text, score=score) for doc_id, text, score in docs],
+        prepared,
+        top_k=top_k,
+        ranker=ranker,
+        aggregator=aggregator,
+        formatter=formatter,
+    )
+
+
+class ProcessingPool:
+    """Pre-warmed process pool used by :class:`~facts.pipeline.FactPipeline`."""
+
+    def __init__(
+        self,
+        max_workers: int = 2,
+        *,
+        min_docs: int = 32,
+        min_chars: int = 16_384,
+        preload: Sequence[str] = DEFAULT_PRELOAD,
+    ) -> None:
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        if min_docs < 1 or min_chars < 1:
+            raise ValueError("min_docs and min_chars must be at least 1")
+        self.max_workers = max_workers
+        self.min_docs = min_docs
+        self.min_chars = min_chars
+        self.preload = tuple(preload)
+        self._executor: ProcessPoolExecutor | None = None
+        self._picklable: dict[tuple[object, ...], bool] = {}
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """Return the worker pool, creating it on first use."""
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm,
+                initargs=(self.preload,),
+            )
+        return self._executor
+
+    async def start(self) -> list[int]:
+        """Spawn and warm every worker, returning their process ids."""
+
+        loop = asyncio.get_running_loop()
+        pids = await asyncio.gather(
+            *(loop.run_in_executor(self.executor, _ping) for _ in range(self.max_workers))
+        )
+        return sorted(set(pids))
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _can_pickle(self, callables: tuple[object, ...]) -> bool:
+        known = self._picklable.get(callables)
+        if known is None:
+            try:
+                pickle.dumps(callables)
+            except Exception:
+                known = False
+            else:
+                known = True
+            self._picklable[callables] = known
+        return known
+
+    def should_offload(
+        self,
+        docs: Sequence[RetrievedDoc],
+        ranker: Ranker,
+        aggregator: Aggregator,
+        formatter: Formatter,
+    ) -> bool:
+        """Return ``True`` when ``docs`` are worth shipping to a worker."""
+
+        if len(docs) >= self.min_docs:
+            large = True
+        else:
+            chars = 0
+            for doc in docs:
+                chars += len(doc.text)
+                if chars >= self.min_chars:
+                    break
+            large = chars >= self.min_chars
+        return large and self._can_pickle((ranker, aggregator, formatter))
+
+    async def process(
+        self,
+        docs: Sequence[RetrievedDoc],
+        prepared: str,
+        *,
+        top_k: int,
+        ranker: Ranker,
+        aggregator: Aggregator,
+        formatter: Formatter,
+    ) -> str:
+        """Run :func:`process_documents` for ``docs`` in a worker process."""
+
+        payload = [(doc.id, doc.text, doc.score) for doc in docs]
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                self.executor,
+                _process_remote,
+                payload,
+                prepared,
+                top_k,
+                ranker,
+                aggregator,
+                formatter,
+            )
+        except BrokenProcessPool:
+            logger.warning("Processing pool broke; processing inline", exc_info=True)
+            self.shutdown()
+        return process_documents(
+            docs,
+            prepared,
+            top_k=top_k,
+            ranker=ranker,
+            aggregator=aggregator,
+            formatter=formatter,
+        )
+
+
+__all__ = ["DEFAULT_PRELOAD", "ProcessingPool"]
@@ -38,12 +38,14 @@ from ..config import (
     set_callback_hosts,
 )
 from ..core.audit import audit_event
+from ..core.compression import CompressedRoute
 from ..core.metrics import (
     CITATION_PRECISION,
     EXPLANATION_SATISFACTION,
     SSE_TOKENS,
 )
 from ..core.problem_details import ProblemDetails, bad_request
+from ..core.serialization import dumps_str
 from ..core.settings import load_settings
 from ..validators.callback import validate_callback_url
 from ..schemas.callbacks import (
@@ -146,7 +148,7 @@ def _sse_message(event: str, data: dict[str, Any], event_id: str | None = None)
     payload = [f"event: {event}"]
     if event_id is not None:
         payload.append(f"id: {event_id}")
-    payload.append("data: " + json.dumps(data, ensure_ascii=False))
+    payload.append("data: " + dumps_str(data))
     return "\n".join(payload) + "\n\n"
 
 
@@ -156,6 +158,12 @@ def _client_host(request: Request) -> str:
     return getattr(getattr(request, "client", None), "host", "unknown")
 
 
+def _client_org(request: Request) -> str | None:
+    """Return the organization declared by the caller, if any."""
+
+    return request.headers.get("x-organization") or None
+
+
 @lru_cache(maxsize=1)
 def get_allowed_hosts() -> tuple[str, ...]:
     """Return the tuple of allowed callback hosts."""
@@ -180,6 +188,8 @@ def _allowlist_response() -> CallbackAllowlistResponse:
 
 api: APIRouter = APIRouter()
 api.include_router(generate_router)
+# Routes returning large buffered payloads negotiate Content-Encoding.
+compressed_api: APIRouter = APIRouter(route_class=CompressedRoute)
 
 
 def _config_problem(detail: str) -> JSONResponse:
@@ -270,7 +280,7 @@ def version() -> dict[str, str]:
 def intent_reflector(req: IntentReq, request: Request) -> dict[str, str]:
     """Reflect user intent into a concise insight string."""
 
-    audit_event("intent_reflector", _client_host(request))
+    audit_event("intent_reflector", _client_host(request), org=_client_org(request))
     return {"insight": reflect_intent(req.intent, req.length)}
 
 
@@ -282,7 +292,7 @@ def score(
 ) -> JSONResponse | dict[str, float]:
     """Calculate a score for the provided request body."""
 
-    audit_event("score", _client_host(request))
+    audit_event("score", _client_host(request), org=_client_org(request))
     result: dict[str, float] = {"score": score_payload(req.model_dump())}
     if req.callback_url:
         problem = validate_callback_url(req.callback_url, get_allowed_hosts())
@@ -293,7 +303,7 @@ def score(
     return result
 
 
-@api.post("/v1/score/batch")
+@compressed_api.post("/v1/score/batch")
 def score_batch(
     batch: ScoreBatchReq,
     request: Request,
@@ -301,7 +311,7 @@ def score_batch(
 ) -> JSONResponse | dict[str, Any]:
     """Score multiple payloads in a single request."""
 
-    audit_event("score_batch", _client_host(request))
+    audit_event("score_batch", _client_host(request), org=_client_org(request))
     items = batch.items[: batch.limit]
     results = [{"score": score_payload(it.model_dump())} for it in items]
     out: dict[str, Any] = {"results": results, "count": len(results)}
@@ -314,11 +324,14 @@ def score_batch(
     return out
 
 
+api.include_router(compressed_api)
+
+
 @api.post("/v1/feedback")
 def feedback(req: FeedbackReq, request: Request) -> dict[str, str]:
     """Record user feedback on explanation clarity and citation accuracy."""
 
-    audit_event("feedback", _client_host(request))
+    audit_event("feedback", _client_host(request), org=_client_org(request))
     EXPLANATION_SATISFACTION.observe(req.explanation_satisfaction)
     CITATION_PRECISION.observe(req.citation_precision)
     return {"status": "recorded"}
@@ -420,6 +433,12 @@ async def stream(
     )
 
 
+async def _send_ws_json(ws: WebSocket, payload: Mapping[str, Any]) -> None:
+    """Send ``payload`` as a JSON text frame using the active JSON backend."""
+
+    await ws.send_text(dumps_str(payload))
+
+
 def is_client_connected(ws: WebSocket) -> bool:
     """Return ``True`` if the WebSocket connection is still active."""
 
@@ -449,7 +468,7 @@ async def ws_stream(
     limiter = _session_limiter(ws)
 
     await ws.accept()
-    audit_event("ws_connect", f"{client_id} org={user.organization}")
+    audit_event("ws_connect", f"{client_id} org={user.organization}", org=user.organization)
     default_delay = cfg.token_delay
     rate_limited = False
     try:
@@ -465,7 +484,7 @@ async def ws_stream(
 
             query = str(payload.get("text", "") or "")
             if not query.strip():
-                await ws.send_json({"event": "error", "message": "Query must not be empty"})
+                await _send_ws_json(ws, {"event": "error", "message": "Query must not be empty"})
                 continue
 
             start_at = payload.get("cursor")
@@ -478,6 +497,7 @@ async def ws_stream(
                 audit_event(
                     "ws_rate_limit",
                     f"{client_id} org={user.organization} retry={retry_after}",
+                    org=user.organization,
                 )
                 error_payload: dict[str, Any] = {
                     "event": "error",
@@ -486,7 +506,7 @@ async def ws_stream(
                 }
                 if retry_after:
                     error_payload["retry_after"] = retry_after
-                await ws.send_json(error_payload)
+                await _send_ws_json(ws, error_payload)
                 await ws.close(code=4429, reason="Rate limit exceeded")
                 rate_limited = True
                 break
@@ -512,7 +532,7 @@ async def ws_stream(
                 return not is_client_connected(ws)
 
             sent = 0
-            await ws.send_json({"event": "start", "cursor": start_index, "replay": replay})
+            await _send_ws_json(ws, {"event": "start", "cursor": start_index, "replay": replay})
             try:
                 async for chunk in stream_facts(
                     pipeline,
@@ -522,20 +542,21 @@ async def ws_stream(
                     delay=delay,
                     is_disconnected=is_disconnected,
                 ):
-                    await ws.send_json(
+                    await _send_ws_json(
+                        ws,
                         {
                             "event": "chunk",
                             "id": chunk.index,
                             "text": chunk.text,
                             "replay": replay,
-                        }
+                        },
                     )
                     sent += 1
-                await ws.send_json(
-                    {"event": "end", "cursor": start_index + sent, "replay": replay}
+                await _send_ws_json(
+                    ws, {"event": "end", "cursor": start_index + sent, "replay": replay}
                 )
             except FactPipelineError as exc:
-                await ws.send_json({"event": "error", "message": str(exc), "replay": replay})
+                await _send_ws_json(ws, {"event": "error", "message": str(exc), "replay": replay})
             finally:
                 SSE_TOKENS.inc(sent)
     except WebSocketDisconnect:
@@ -543,7 +564,7 @@ async def ws_stream(
     finally:
         limiter.reset(client_id)
         event = "ws_disconnect_rate_limited" if rate_limited else "ws_disconnect"
-        audit_event(event, f"{client_id} org={user.organization}")
+        audit_event(event, f"{client_id} org={user.organization}", org=user.organization)
         # Restore a default loop so tests using get_event_loop() do not fail
         asyncio.set_event_loop(asyncio.new_event_loop())
 
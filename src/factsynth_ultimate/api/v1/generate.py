@@ -2,18 +2,29 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import math
 from collections import Counter
+from collections.abc import AsyncIterator
 from functools import lru_cache
 from http import HTTPStatus
+from typing import Any
 
 from fastapi import APIRouter, Depends, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from factsynth_ultimate.core.audit import audit_event
 from factsynth_ultimate.core.problem_details import ProblemDetails
-from factsynth_ultimate.schemas.requests import GenerateReq
+from factsynth_ultimate.core.serialization import dumps
+from factsynth_ultimate.core.settings import Settings, load_settings
+from factsynth_ultimate.schemas.requests import GenerateBatchReq, GenerateReq
+from factsynth_ultimate.services.retrievers.base import Retriever
+from factsynth_ultimate.services.retrievers.fanout import FanoutRetriever
+from factsynth_ultimate.services.retrievers.hybrid import fusion_context
+from factsynth_ultimate.services.retrievers.local import create_fixture_retriever
+from factsynth_ultimate.services.retrievers.offload import offload_blocking
+from factsynth_ultimate.services.retrievers.registry import get_registry
 
 try:  # pragma: no cover - exercised indirectly when optional dependency is missing
     from facts import (
@@ -21,10 +32,19 @@ try:  # pragma: no cover - exercised indirectly when optional dependency is miss
         EmptyQueryError,
         FactPipeline,
         FactPipelineError,
+        MemoryResultCache,
         NoFactsFoundError,
+        ProcessingPool,
+        RedisResultCache,
+        RedisSingleFlight,
+        PlanError,
         SearchError,
+        load_plan,
     )
+    _FACTS_AVAILABLE = True
 except ModuleNotFoundError:  # pragma: no cover - optional dependency guard
+    _FACTS_AVAILABLE = False
+
     class FactPipelineError(RuntimeError):  # type: ignore[no-redef]
         """Fallback base error when the optional ``facts`` package is missing."""
 
@@ -81,17 +101,132 @@ def _client_host(request: Request) -> str:
     return getattr(getattr(request, "client", None), "host", "unknown")
 
 
+def _client_org(request: Request) -> str | None:
+    """Return the organization declared by the caller, if any."""
+
+    return request.headers.get("x-organization") or None
+
+
+@lru_cache(maxsize=1)
+def get_processing_pool() -> ProcessingPool:
+    """Return the shared process pool for CPU-bound pipeline stages."""
+
+    settings = load_settings()
+    return ProcessingPool(
+        max(1, settings.pipeline_process_workers),
+        min_docs=settings.pipeline_process_min_docs,
+        min_chars=settings.pipeline_process_min_chars,
+    )
+
+
+def _offload(retriever: Retriever, settings: Settings) -> Retriever:
+    """Move blocking ``retriever`` calls to an executor as configured."""
+
+    if settings.retriever_offload == "none":
+        return retriever
+    return offload_blocking(
+        retriever,
+        kind=settings.retriever_offload,
+        max_workers=settings.retriever_offload_workers,
+        max_pending=settings.retriever_offload_max_pending,
+        queue_timeout=settings.retriever_offload_queue_timeout,
+    )
+
+
+# Registry retrievers acquired for the shared pipeline, released on shutdown.
+_PIPELINE_LEASES: list[str] = []
+
+
+def _pipeline_options() -> dict[str, Any]:
+    """Build retriever, cache and coalescing arguments for :class:`FactPipeline`."""
+
+    settings = load_settings()
+    if not _FACTS_AVAILABLE:
+        return {}
+    options: dict[str, Any] = {"coalesce": settings.pipeline_coalesce}
+    if settings.pipeline_process_workers > 0:
+        options["processing_pool"] = get_processing_pool()
+    if settings.pipeline_spec:
+        options["plan"] = load_plan(settings.pipeline_spec)
+    if settings.pipeline_retrievers:
+        registry = get_registry()
+        backends: dict[str, Retriever] = {}
+        for name in settings.pipeline_retrievers:
+            backends[name] = _offload(registry.acquire(name), settings)
+            _PIPELINE_LEASES.append(name)
+        options["retriever"] = FanoutRetriever(
+            backends,
+            deadline=settings.pipeline_retriever_deadline,
+            hedge_after=settings.pipeline_retriever_hedge_after,
+            fusion=settings.pipeline_fusion,
+        )
+    else:
+        options["retriever"] = _offload(create_fixture_retriever(), settings)
+    redis_url = settings.pipeline_cache_redis_url or settings.rate_limit_redis_url
+    if settings.pipeline_coalesce_redis:
+        from redis.asyncio import Redis
+
+        options["coordinator"] = RedisSingleFlight(
+            Redis.from_url(redis_url),
+            lock_ttl=settings.pipeline_coalesce_lock_ttl,
+            wait_timeout=settings.pipeline_coalesce_wait_timeout,
+        )
+    backend = settings.pipeline_cache_backend
+    if backend == "none":
+        return options
+    if backend == "redis":
+        from redis.asyncio import Redis
+
+        cache: Any = RedisResultCache(Redis.from_url(redis_url))
+    else:
+        cache = MemoryResultCache(maxsize=settings.pipeline_cache_maxsize)
+    options.update(
+        cache=cache,
+        cache_ttl=settings.pipeline_cache_ttl,
+        cache_stale_ttl=settings.pipeline_cache_stale_ttl,
+    )
+    return options
+
+
 @lru_cache(maxsize=1)
 def _pipeline_singleton() -> FactPipeline:
     """Return a singleton :class:`FactPipeline` instance."""
 
-    return FactPipeline()
+    return FactPipeline(**_pipeline_options())
 
 
 def get_fact_pipeline() -> FactPipeline:
-    """FastAPI dependency returning the shared :class:`FactPipeline`."""
+    """FastAPI dependency returning the shared :class:`FactPipeline`.
+
+    A plan loaded from a spec file is swapped in again whenever the spec or
+    one of its policy files changes, so edits apply without a restart.
+    """
+
+    pipeline = _pipeline_singleton()
+    plan = getattr(pipeline, "plan", None)
+    if plan is not None and plan.sources:
+        try:
+            pipeline.plan = load_plan(plan.sources[0])
+        except PlanError as exc:
+            logger.warning("Keeping the current pipeline plan: %s", exc)
+    return pipeline
+
 
-    return _pipeline_singleton()
+async def close_fact_pipeline() -> None:
+    """Drop the shared pipeline and release the retrievers it acquired.
+
+    Called when the application shuts down, so registry retrievers held only
+    by the pipeline are closed with the last reference.
+    """
+
+    _pipeline_singleton.cache_clear()
+    registry = get_registry()
+    while _PIPELINE_LEASES:
+        name = _PIPELINE_LEASES.pop()
+        try:
+            await registry.arelease(name)
+        except Exception:  # pragma: no cover - defensive guard
+            logger.warning("Failed to release pipeline retriever %s", name, exc_info=True)
 
 
 def _problem(status: HTTPStatus, title: str, detail: str) -> ProblemDetails:
@@ -148,50 +283,154 @@ def _validate_generated_text(text: str) -> ProblemDetails | None:
     return None
 
 
-@router.post("/v1/generate")
-async def generate(
-    req: GenerateReq,
-    request: Request,
-    pipeline: FactPipeline = Depends(get_fact_pipeline),
-) -> JSONResponse | dict[str, dict[str, str]]:
-    """Produce fact statements for ``req.text`` using the orchestrated pipeline."""
+def _pipeline_problem(exc: Exception) -> ProblemDetails:
+    """Map a pipeline exception to the problem details returned to clients."""
 
-    audit_event("generate", _client_host(request))
-    try:
-        text = await pipeline.arun(req.text)
-    except PipelineNotReadyError as exc:
+    if isinstance(exc, PipelineNotReadyError):
         logger.warning("Fact pipeline unavailable: %s", exc.reason)
         return _problem(
             HTTPStatus.SERVICE_UNAVAILABLE,
             "Fact generation unavailable",
             exc.reason,
-        ).to_response()
-    except EmptyQueryError as exc:
-        return _problem(HTTPStatus.BAD_REQUEST, "Invalid query", str(exc)).to_response()
-    except NoFactsFoundError as exc:
-        return _problem(HTTPStatus.NOT_FOUND, "Facts not found", str(exc)).to_response()
-    except SearchError as exc:
+        )
+    if isinstance(exc, EmptyQueryError):
+        return _problem(HTTPStatus.BAD_REQUEST, "Invalid query", str(exc))
+    if isinstance(exc, NoFactsFoundError):
+        return _problem(HTTPStatus.NOT_FOUND, "Facts not found", str(exc))
+    if isinstance(exc, SearchError):
         logger.warning("Fact search failed: %s", exc)
-        return _problem(HTTPStatus.BAD_GATEWAY, "Search failure", str(exc)).to_response()
-    except AggregationError as exc:
+        return _problem(HTTPStatus.BAD_GATEWAY, "Search failure", str(exc))
+    if isinstance(exc, AggregationError):
         logger.warning("Fact aggregation failed: %s", exc)
-        return _problem(HTTPStatus.INTERNAL_SERVER_ERROR, "Aggregation failure", str(exc)).to_response()
-    except FactPipelineError as exc:
+        return _problem(HTTPStatus.INTERNAL_SERVER_ERROR, "Aggregation failure", str(exc))
+    if isinstance(exc, FactPipelineError):
         logger.warning("Fact pipeline error: %s", exc)
-        return _problem(HTTPStatus.INTERNAL_SERVER_ERROR, "Fact pipeline failure", str(exc)).to_response()
-    except Exception as exc:  # pragma: no cover - defensive
-        logger.exception("Unexpected fact generation error")
-        return _problem(
-            HTTPStatus.INTERNAL_SERVER_ERROR,
-            "Internal server error",
-            "Failed to generate facts",
-        ).to_response()
+        return _problem(HTTPStatus.INTERNAL_SERVER_ERROR, "Fact pipeline failure", str(exc))
+    logger.error("Unexpected fact generation error", exc_info=exc)
+    return _problem(
+        HTTPStatus.INTERNAL_SERVER_ERROR,
+        "Internal server error",
+        "Failed to generate facts",
+    )
 
-    if problem := _validate_generated_text(text):
+
+async def _generate_text(
+    pipeline: FactPipeline, text: str, tenant: str | None = None
+) -> str | ProblemDetails:
+    """Run ``pipeline`` for ``text`` returning the output or a problem.
+
+    ``tenant`` selects per-tenant fusion weights of hybrid retrievers.
+    """
+
+    try:
+        with fusion_context(tenant=tenant):
+            output = await pipeline.arun(text)
+    except Exception as exc:
+        return _pipeline_problem(exc)
+
+    if problem := _validate_generated_text(output):
         logger.warning("Rejected pipeline output: %s", problem.detail)
-        return problem.to_response()
+        return problem
+    return output
+
 
-    return {"output": {"text": text}}
+@router.post("/v1/generate")
+async def generate(
+    req: GenerateReq,
+    request: Request,
+    pipeline: FactPipeline = Depends(get_fact_pipeline),
+) -> JSONResponse | dict[str, dict[str, str]]:
+    """Produce fact statements for ``req.text`` using the orchestrated pipeline."""
+
+    audit_event("generate", _client_host(request), org=_client_org(request))
+    result = await _generate_text(pipeline, req.text, _client_org(request))
+    if isinstance(result, ProblemDetails):
+        return result.to_response()
+    return {"output": {"text": result}}
+
+
+def _batch_line(index: int, result: str | ProblemDetails) -> bytes:
+    if isinstance(result, ProblemDetails):
+        payload: dict[str, Any] = {"index": index, "problem": result.model_dump(exclude_none=True)}
+    else:
+        payload = {"index": index, "output": {"text": result}}
+    return dumps(payload) + b"\n"
+
+
+async def _generate_batch_lines(
+    pipeline: FactPipeline,
+    groups: dict[str, list[int]],
+    concurrency: int,
+    tenant: str | None = None,
+) -> AsyncIterator[bytes]:
+    """Yield NDJSON lines for ``groups`` in completion order.
+
+    ``concurrency`` workers pull queries from a shared iterator, so memory
+    stays bounded by the concurrency rather than the batch size.
+    """
+
+    pending = iter(groups)
+    results: asyncio.Queue[tuple[str, str | ProblemDetails] | BaseException | None]
+    results = asyncio.Queue(maxsize=concurrency)
+
+    async def work() -> None:
+        try:
+            for text in pending:
+                await results.put((text, await _generate_text(pipeline, text, tenant)))
+        except Exception as exc:
+            await results.put(exc)
+        else:
+            await results.put(None)
+
+    workers = [asyncio.ensure_future(work()) for _ in range(min(concurrency, len(groups)))]
+    try:
+        active = len(workers)
+        while active:
+            item = await results.get()
+            if item is None:
+                active -= 1
+                continue
+            if isinstance(item, BaseException):
+                raise item
+            text, result = item
+            for index in groups[text]:
+                yield _batch_line(index, result)
+    finally:
+        for worker in workers:
+            worker.cancel()
+
+
+@router.post("/v1/generate/batch")
+async def generate_batch(
+    batch: GenerateBatchReq,
+    request: Request,
+    pipeline: FactPipeline = Depends(get_fact_pipeline),
+) -> StreamingResponse:
+    """Generate facts for many queries, streaming NDJSON results as they finish.
+
+    Identical queries inside the batch are computed once and reported for every
+    index they appear at. Each line carries the item ``index`` and either an
+    ``output`` or the ``problem`` that :func:`generate` would have returned.
+    """
+
+    audit_event("generate_batch", _client_host(request), org=_client_org(request))
+    groups: dict[str, list[int]] = {}
+    for index, item in enumerate(batch.items):
+        groups.setdefault(item.text, []).append(index)
+    concurrency = batch.concurrency or load_settings().generate_batch_concurrency
+    return StreamingResponse(
+        _generate_batch_lines(pipeline, groups, concurrency, _client_org(request)),
+        media_type="application/x-ndjson",
+    )
 
 
-__all__ = ["ProblemDetails", "PipelineNotReadyError", "get_fact_pipeline", "generate", "router"]
+__all__ = [
+    "ProblemDetails",
+    "PipelineNotReadyError",
+    "close_fact_pipeline",
+    "get_fact_pipeline",
+    "generate",
+    "generate_batch",
+    "get_processing_pool",
+    "router",
+]
@@ -7,6 +7,7 @@ import jax.numpy as jnp
 from fastapi import APIRouter
 from pydantic import BaseModel, Field
 
+from .core.compression import CompressedRoute
 from .isr.sim import (
     ISRParams,
     dominant_freq,
@@ -15,7 +16,7 @@ from .isr.sim import (
     simulate_isr,
 )
 
-router = APIRouter(prefix="/v1/isr", tags=["isr"])
+router = APIRouter(prefix="/v1/isr", tags=["isr"], route_class=CompressedRoute)
 
 class SimRequest(BaseModel):
     """Parameters controlling ISR simulation."""
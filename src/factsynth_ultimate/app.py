@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import time
 from collections.abc import Awaitable, Callable
@@ -23,15 +24,24 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from typing import Any, Literal
 
 from . import VERSION
+from .core.audit import close_audit_log, configure_audit_log
 from .core.auth import APIKeyAuthMiddleware
 from .core.body_limit import BodySizeLimitMiddleware
 from .core.errors import install_handlers
 from .core.ip_allowlist import IPAllowlistMiddleware
 from .core.logging import setup_logging
-from .core.metrics import LATENCY, REQUESTS, metrics_bytes, metrics_content_type
+from .core.loop_monitor import LoopMonitor
+from .core.metrics import (
+    LATENCY,
+    REQUESTS,
+    mark_worker_dead,
+    metrics_bytes,
+    metrics_content_type,
+)
 from .core.rate_limit import RateLimitMiddleware
 from .core.request_id import RequestIDMiddleware
 from .core.security_headers import SecurityHeadersMiddleware
+from .core.serialization import FastJSONResponse, set_json_backend
 from .core.settings import load_settings
 from .core.tracing import try_enable_otel
 from .store.redis import check_health
@@ -93,6 +103,8 @@ if not getattr(fastapi_utils, "_factsynth_safe_field", False):
 
 
 from .api.routers import api
+from .api.v1.generate import close_fact_pipeline, get_processing_pool
+from .services.retrievers.registry import get_registry
 
 
 class _MetricsMiddleware(BaseHTTPMiddleware):
@@ -123,6 +135,7 @@ def create_app() -> FastAPI:
     except Exception as exc:  # pragma: no cover - configuration errors
         raise RuntimeError("Invalid configuration") from exc
     setup_logging()
+    set_json_backend(settings.json_backend)
 
     redis_url = settings.rate_limit_redis_url
     close_redis = False
@@ -134,6 +147,34 @@ def create_app() -> FastAPI:
 
     @asynccontextmanager
     async def lifespan(app: FastAPI):
+        if settings.audit_log_dir:
+            configure_audit_log(
+                settings.audit_log_dir,
+                batch_size=settings.audit_log_batch_size,
+                flush_interval=settings.audit_log_flush_interval,
+            )
+        monitor: LoopMonitor | None = None
+        if settings.loop_monitor_interval > 0:
+            monitor = LoopMonitor(
+                interval=settings.loop_monitor_interval,
+                threshold=settings.loop_lag_threshold,
+            )
+            monitor.start()
+            app.state.loop_monitor = monitor
+        if settings.pipeline_process_workers > 0:
+            try:
+                await get_processing_pool().start()
+            except Exception:  # pragma: no cover - defensive guard
+                logger.warning("Failed to pre-warm pipeline process pool", exc_info=True)
+        registry = get_registry()
+        preloaded: list[str] = []
+        for name in settings.retriever_preload:
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, registry.acquire, name)
+            except Exception:
+                logger.warning("Failed to preload retriever %s", name, exc_info=True)
+            else:
+                preloaded.append(name)
         try:
             healthy = await check_health(redis_client)
         except Exception:  # pragma: no cover - defensive guard
@@ -147,11 +188,30 @@ def create_app() -> FastAPI:
         try:
             yield
         finally:
+            if monitor is not None:
+                await monitor.stop()
+            if settings.pipeline_process_workers > 0:
+                get_processing_pool().shutdown()
+            await close_fact_pipeline()
+            for name in preloaded:
+                try:
+                    await registry.arelease(name)
+                except Exception:  # pragma: no cover - defensive guard
+                    logger.warning("Failed to close retriever %s", name, exc_info=True)
+            if settings.audit_log_dir:
+                close_audit_log()
+            with suppress(Exception):
+                mark_worker_dead()
             if close_redis:
                 with suppress(Exception):
                     await redis_client.aclose()
 
-    app = FastAPI(title="FactSynth Ultimate Pro API", version=VERSION, lifespan=lifespan)
+    app = FastAPI(
+        title="FactSynth Ultimate Pro API",
+        version=VERSION,
+        lifespan=lifespan,
+        default_response_class=FastJSONResponse,
+    )
     install_handlers(app)
     try_enable_otel(app)
     app.state.rate_limit_redis = redis_client
@@ -169,7 +229,10 @@ def create_app() -> FastAPI:
     def metrics() -> Response:
         """Expose Prometheus metrics."""
 
-        return Response(metrics_bytes(), media_type=metrics_content_type())
+        return Response(
+            metrics_bytes(max_age=settings.metrics_cache_ttl),
+            media_type=metrics_content_type(),
+        )
 
     # middleware stack (order matters: last added runs first)
     # RateLimitMiddleware is added last so rate limiting happens before auth
@@ -3,7 +3,10 @@
 from __future__ import annotations
 
 import argparse
+import json
 import sys
+from dataclasses import asdict
+from datetime import datetime
 from pathlib import Path
 from typing import Sequence
 
@@ -13,6 +16,7 @@ from factsynth_ultimate.config import (
     load_config,
     remove_callback_host,
 )
+from factsynth_ultimate.core.audit import query_audit
 
 
 def _build_parser() -> argparse.ArgumentParser:
@@ -46,9 +50,74 @@ def _build_parser() -> argparse.ArgumentParser:
     )
     list_parser.set_defaults(func=_callbacks_list)
 
+    audit_parser = subparsers.add_parser("audit", help="Inspect structured audit segments")
+    audit_sub = audit_parser.add_subparsers(dest="audit_command")
+
+    query_parser = audit_sub.add_parser("query", help="Print audit records matching filters")
+    query_parser.add_argument("directory", type=Path, help="Directory holding audit segments")
+    query_parser.add_argument("--org", default=None, help="Only show records for this organization")
+    query_parser.add_argument("--action", default=None, help="Only show records with this action")
+    query_parser.add_argument(
+        "--since",
+        type=_parse_timestamp,
+        default=None,
+        help="Earliest timestamp (epoch seconds or ISO 8601)",
+    )
+    query_parser.add_argument(
+        "--until",
+        type=_parse_timestamp,
+        default=None,
+        help="Latest timestamp (epoch seconds or ISO 8601)",
+    )
+    query_parser.add_argument(
+        "--limit", type=int, default=None, help="Stop after printing this many records"
+    )
+    query_parser.set_defaults(func=_audit_query)
+
+    index_parser = subparsers.add_parser("index", help="Build on-disk retrieval indexes")
+    index_sub = index_parser.add_subparsers(dest="index_command")
+
+    build_parser = index_sub.add_parser(
+        "build", help="Index a JSON Lines corpus of {\"id\", \"text\"} records"
+    )
+    build_parser.add_argument("corpus", type=Path, help="Corpus file in JSON Lines format")
+    build_parser.add_argument(
+        "-o", "--output", type=Path, required=True, help="Directory to write the index to"
+    )
+    build_parser.add_argument(
+        "--shards", type=int, default=1, help="Split the index into this many shards"
+    )
+    build_parser.set_defaults(func=_index_build)
+
+    vectors_parser = index_sub.add_parser(
+        "vectors", help="Embed a JSON Lines corpus into a dense vector index"
+    )
+    vectors_parser.add_argument("corpus", type=Path, help="Corpus file in JSON Lines format")
+    vectors_parser.add_argument(
+        "-o", "--output", type=Path, required=True, help="Directory to write the index to"
+    )
+    vectors_parser.add_argument(
+        "--int8", action="store_true", help="Store int8-quantized embeddings"
+    )
+    vectors_parser.add_argument(
+        "--lists", type=int, default=0, help="Number of IVF partitions (0 for exact search)"
+    )
+    vectors_parser.set_defaults(func=_index_vectors)
+
     return parser
 
 
+def _parse_timestamp(raw: str) -> float:
+    try:
+        return float(raw)
+    except ValueError:
+        pass
+    try:
+        return datetime.fromisoformat(raw).timestamp()
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(f"invalid timestamp: {raw!r}") from exc
+
+
 def _callbacks_allow(args: argparse.Namespace) -> int:
     host_raw: str = args.host.strip()
     if not host_raw:
@@ -111,6 +180,79 @@ def _callbacks_list(args: argparse.Namespace) -> int:
     return 0
 
 
+def _audit_query(args: argparse.Namespace) -> int:
+    directory: Path = args.directory
+    if not directory.is_dir():
+        print(f"error: audit directory not found: {directory}", file=sys.stderr)
+        return 2
+
+    limit: int | None = args.limit
+    printed = 0
+    for record in query_audit(
+        directory, org=args.org, action=args.action, since=args.since, until=args.until
+    ):
+        if limit is not None and printed >= limit:
+            break
+        print(json.dumps(asdict(record), ensure_ascii=False, separators=(",", ":")))
+        printed += 1
+    return 0
+
+
+def _index_build(args: argparse.Namespace) -> int:
+    from factsynth_ultimate.services.retrievers.index import build_index
+
+    corpus: Path = args.corpus
+    if not corpus.is_file():
+        print(f"error: corpus not found: {corpus}", file=sys.stderr)
+        return 2
+    try:
+        if args.shards > 1:
+            from factsynth_ultimate.services.retrievers.shards import build_sharded_index
+
+            meta = build_sharded_index(corpus, args.output, shards=args.shards)
+        else:
+            meta = build_index(corpus, args.output)
+    except ValueError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+    except OSError as exc:  # pragma: no cover - filesystem failures
+        print(f"error: failed to write index: {exc}", file=sys.stderr)
+        return 2
+
+    shards = f" in {len(meta['shards'])} shards" if "shards" in meta else ""
+    print(
+        f"Indexed {meta['documents']} documents ({meta['terms']} terms){shards} "
+        f"into {args.output}"
+    )
+    return 0
+
+
+def _index_vectors(args: argparse.Namespace) -> int:
+    from factsynth_ultimate.core.settings import load_settings
+    from factsynth_ultimate.services.retrievers.vector import build_vector_index, load_embedder
+
+    corpus: Path = args.corpus
+    if not corpus.is_file():
+        print(f"error: corpus not found: {corpus}", file=sys.stderr)
+        return 2
+    try:
+        embedder = load_embedder(load_settings().retriever_embedder)
+        meta = build_vector_index(
+            corpus, args.output, embedder=embedder, int8=args.int8, n_lists=args.lists
+        )
+    except (ValueError, ImportError, AttributeError, TypeError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 2
+    except OSError as exc:  # pragma: no cover - filesystem failures
+        print(f"error: failed to write index: {exc}", file=sys.stderr)
+        return 2
+
+    print(
+        f"Embedded {meta['documents']} documents ({meta['dim']} dimensions) into {args.output}"
+    )
+    return 0
+
+
 def main(argv: Sequence[str] | None = None) -> int:
     """Program entry point for the ``fsctl`` CLI."""
 
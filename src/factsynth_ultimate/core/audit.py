@@ -1,15 +1,375 @@
-"""Minimal audit logging helpers."""
+"""Audit logging helpers with an optional append-only segment store.
+
+Every call to :func:`audit_event` is logged through the ``factsynth.audit``
+logger. When a :class:`AuditLogWriter` has been configured via
+:func:`configure_audit_log` the event is additionally captured as a typed
+:class:`AuditRecord` and appended, in batches, to NDJSON segment files. Each
+segment has a small JSON sidecar index recording its time span and the
+organisations it contains so that :func:`query_audit` can skip whole segments
+and only decode matching lines.
+"""
 
 from __future__ import annotations
 
+import json
 import logging
+import mmap
+import os
+import threading
+import time
+from collections.abc import Iterator
 from contextlib import suppress
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from .request_id import get_request_id
 
 log = logging.getLogger("factsynth.audit")
 
+SEGMENT_SUFFIX = ".ndjson"
+INDEX_SUFFIX = ".idx.json"
+INDEX_VERSION = 1
+
+
+@dataclass(frozen=True, slots=True)
+class AuditRecord:
+    """Single structured audit event."""
+
+    action: str
+    subject: str
+    org: str | None = None
+    request_id: str | None = None
+    ts: float = 0.0
+
+    def to_json(self) -> bytes:
+        """Return the compact NDJSON encoding of the record (without newline)."""
+
+        return json.dumps(asdict(self), ensure_ascii=False, separators=(",", ":")).encode()
+
+    @classmethod
+    def from_json(cls, raw: bytes | str) -> AuditRecord:
+        """Decode a record previously produced by :meth:`to_json`."""
+
+        data = json.loads(raw)
+        return cls(
+            action=str(data["action"]),
+            subject=str(data["subject"]),
+            org=data.get("org"),
+            request_id=data.get("request_id"),
+            ts=float(data.get("ts", 0.0)),
+        )
+
+
+@dataclass
+class _SegmentIndex:
+    """Sidecar metadata describing a single segment file."""
+
+    count: int = 0
+    min_ts: float | None = None
+    max_ts: float | None = None
+    orgs: dict[str, int] | None = None
+
+    def add(self, record: AuditRecord) -> None:
+        self.count += 1
+        self.min_ts = record.ts if self.min_ts is None else min(self.min_ts, record.ts)
+        self.max_ts = record.ts if self.max_ts is None else max(self.max_ts, record.ts)
+        if self.orgs is None:
+            self.orgs = {}
+        key = record.org or ""
+        self.orgs[key] = self.orgs.get(key, 0) + 1
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "version": INDEX_VERSION,
+            "count": self.count,
+            "min_ts": self.min_ts,
+            "max_ts": self.max_ts,
+            "orgs": self.orgs or {},
+        }
+
+    @classmethod
+    def load(cls, path: Path) -> _SegmentIndex | None:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return None
+        if data.get("version") != INDEX_VERSION:
+            return None
+        return cls(
+            count=int(data.get("count", 0)),
+            min_ts=data.get("min_ts"),
+            max_ts=data.get("max_ts"),
+            orgs=dict(data.get("orgs") or {}),
+        )
+
+
+class AuditLogWriter:
+    """Buffer audit records and append them to rotating segment files.
+
+    Records are accumulated in memory and written when ``batch_size`` records
+    are pending or, at the latest, ``flush_interval`` seconds after the first
+    pending record was queued; a daemon timer covers the case where no further
+    record arrives to trigger the write. Segments are append-only and rotated once they exceed
+    ``max_segment_bytes``. Segment names embed the creation time and process
+    id so several workers can share one directory.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        *,
+        batch_size: int = 256,
+        flush_interval: float = 1.0,
+        max_segment_bytes: int = 64 * 1024 * 1024,
+        clock: Any = time.time,
+    ) -> None:
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        if max_segment_bytes < 1:
+            raise ValueError("max_segment_bytes must be positive")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.batch_size = int(batch_size)
+        self.flush_interval = max(0.0, float(flush_interval))
+        self.max_segment_bytes = int(max_segment_bytes)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._pending: list[AuditRecord] = []
+        self._last_flush = time.monotonic()
+        self._segment: Path | None = None
+        self._sequence = 0
+        self._segment_bytes = 0
+        self._index = _SegmentIndex()
+        self._closed = False
+        self._timer: threading.Timer | None = None
+
+    @property
+    def segment(self) -> Path | None:
+        """Return the path of the segment currently being written."""
+
+        return self._segment
+
+    def append(self, record: AuditRecord) -> None:
+        """Queue ``record`` and flush if the batch is full or stale."""
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("audit log writer is closed")
+            self._pending.append(record)
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+            if len(self._pending) >= self.batch_size or due:
+                self._flush_locked()
+            elif self._timer is None:
+                remaining = self.flush_interval - (time.monotonic() - self._last_flush)
+                self._timer = threading.Timer(remaining, self._flush_due)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _flush_due(self) -> None:
+        with self._lock:
+            self._timer = None
+            if not self._closed:
+                try:
+                    self._flush_locked()
+                except OSError:
+                    log.exception("Timed audit log flush failed")
+
+    def flush(self) -> None:
+        """Write all pending records to disk."""
+
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        """Flush pending records and reject further writes."""
+
+        with self._lock:
+            self._flush_locked()
+            self._closed = True
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def _new_segment(self) -> None:
+        stamp = int(self._clock() * 1000)
+        self._sequence += 1
+        name = f"audit-{stamp:013d}-{os.getpid()}-{self._sequence:06d}"
+        self._segment = self.directory / f"{name}{SEGMENT_SUFFIX}"
+        self._segment_bytes = 0
+        self._index = _SegmentIndex()
 
-def audit_event(action: str, subject: str) -> None:
+    def _flush_locked(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+        records, self._pending = self._pending, []
+        if self._segment is None or self._segment_bytes >= self.max_segment_bytes:
+            self._new_segment()
+        assert self._segment is not None
+        payload = b"".join(rec.to_json() + b"\n" for rec in records)
+        with self._segment.open("ab") as fh:
+            fh.write(payload)
+        self._segment_bytes += len(payload)
+        for rec in records:
+            self._index.add(rec)
+        index_path = _index_path(self._segment)
+        tmp = index_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self._index.to_dict(), sort_keys=True), encoding="utf-8")
+        os.replace(tmp, index_path)
+
+
+def _index_path(segment: Path) -> Path:
+    return segment.with_name(segment.name[: -len(SEGMENT_SUFFIX)] + INDEX_SUFFIX)
+
+
+_WRITER: AuditLogWriter | None = None
+
+
+def configure_audit_log(directory: str | Path | None, **kwargs: Any) -> AuditLogWriter | None:
+    """Install a segment writer for ``directory`` (``None`` disables it)."""
+
+    global _WRITER
+    close_audit_log()
+    if directory:
+        _WRITER = AuditLogWriter(directory, **kwargs)
+    return _WRITER
+
+
+def close_audit_log() -> None:
+    """Flush and detach the active segment writer, if any."""
+
+    global _WRITER
+    writer, _WRITER = _WRITER, None
+    if writer is not None:
+        with suppress(Exception):
+            writer.close()
+
+
+def get_audit_writer() -> AuditLogWriter | None:
+    """Return the active segment writer."""
+
+    return _WRITER
+
+
+def audit_event(
+    action: str,
+    subject: str,
+    *,
+    org: str | None = None,
+    request_id: str | None = None,
+) -> None:
     """Log audit events, ignoring logging failures."""
 
+    rid = request_id if request_id is not None else get_request_id()
     with suppress(Exception):
-        log.info("%s %s", action, subject)
+        log.info("%s %s", action, subject, extra={"org": org})
+    writer = _WRITER
+    if writer is None:
+        return
+    with suppress(Exception):
+        writer.append(
+            AuditRecord(action=action, subject=subject, org=org, request_id=rid, ts=time.time())
+        )
+
+
+def _segment_matches(
+    idx: _SegmentIndex | None, org: str | None, since: float | None, until: float | None
+) -> bool:
+    if idx is None:
+        return True
+    if idx.count == 0:
+        return False
+    if org is not None and idx.orgs is not None and org not in idx.orgs:
+        return False
+    if since is not None and idx.max_ts is not None and idx.max_ts < since:
+        return False
+    if until is not None and idx.min_ts is not None and idx.min_ts > until:
+        return False
+    return True
+
+
+def _candidate_lines(buf: mmap.mmap, needle: bytes | None) -> Iterator[bytes]:
+    """Yield raw lines from ``buf``; with ``needle`` only lines containing it."""
+
+    size = len(buf)
+    if needle is None:
+        pos = 0
+        while pos < size:
+            end = buf.find(b"\n", pos)
+            if end == -1:
+                end = size
+            if end > pos:
+                yield buf[pos:end]
+            pos = end + 1
+        return
+    pos = buf.find(needle)
+    while pos != -1:
+        start = buf.rfind(b"\n", 0, pos) + 1
+        end = buf.find(b"\n", pos)
+        if end == -1:
+            end = size
+        yield buf[start:end]
+        pos = buf.find(needle, end)
+
+
+def _field_needle(name: str, value: str) -> bytes:
+    return f'"{name}":'.encode() + json.dumps(value, ensure_ascii=False).encode()
+
+
+def query_audit(
+    directory: str | Path,
+    *,
+    org: str | None = None,
+    action: str | None = None,
+    since: float | None = None,
+    until: float | None = None,
+) -> Iterator[AuditRecord]:
+    """Yield records from segments in ``directory`` matching all filters.
+
+    Segments whose index rules out ``org`` or the ``[since, until]`` window are
+    skipped entirely. Remaining segments are memory-mapped and scanned for the
+    encoded ``org`` (or ``action``) field so that only candidate lines are
+    decoded.
+    """
+
+    root = Path(directory)
+    if not root.is_dir():
+        return
+    needle: bytes | None = None
+    if org is not None:
+        needle = _field_needle("org", org)
+    elif action is not None:
+        needle = _field_needle("action", action)
+    for segment in sorted(root.glob(f"*{SEGMENT_SUFFIX}")):
+        if not _segment_matches(_SegmentIndex.load(_index_path(segment)), org, since, until):
+            continue
+        with segment.open("rb") as fh:
+            if os.fstat(fh.fileno()).st_size == 0:
+                continue
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                for line in _candidate_lines(buf, needle):
+                    try:
+                        record = AuditRecord.from_json(line)
+                    except (ValueError, KeyError):
+                        continue
+                    if org is not None and record.org != org:
+                        continue
+                    if action is not None and record.action != action:
+                        continue
+                    if since is not None and record.ts < since:
+                        continue
+                    if until is not None and record.ts > until:
+                        continue
+                    yield record
+
+
+__all__ = [
+    "AuditLogWriter",
+    "AuditRecord",
+    "audit_event",
+    "close_audit_log",
+    "configure_audit_log",
+    "get_audit_writer",
+    "query_audit",
+]
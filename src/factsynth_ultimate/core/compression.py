@@ -0,0 +1,186 @@
+"""Per-route response compression with ``Accept-Encoding`` negotiation.
+
+Routes opt in by using :class:`CompressedRoute` (or a subclass produced by
+:func:`compressed_route`) as their ``route_class``. Only fully buffered
+responses above a size threshold are compressed; streaming responses such as
+SSE are passed through untouched. Large bodies are compressed in the
+threadpool so the event loop keeps serving other requests.
+"""
+
+from __future__ import annotations
+
+import gzip
+from collections.abc import Awaitable, Callable, Mapping
+from typing import Any
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import StreamingResponse
+
+try:  # pragma: no cover - optional dependency
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:  # pragma: no cover - optional dependency
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+Compressor = Callable[[bytes, int], bytes]
+
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_OFFLOAD_SIZE = 256 * 1024
+DEFAULT_LEVEL = 6
+
+_SKIP_MEDIA_TYPES = ("text/event-stream",)
+
+
+def _gzip(body: bytes, level: int) -> bytes:
+    return gzip.compress(body, compresslevel=max(1, min(9, level)), mtime=0)
+
+
+def _brotli(body: bytes, level: int) -> bytes:  # pragma: no cover - optional dependency
+    return brotli.compress(body, quality=max(0, min(11, level)))
+
+
+def _zstd(body: bytes, level: int) -> bytes:  # pragma: no cover - optional dependency
+    return zstandard.ZstdCompressor(level=max(1, min(22, level))).compress(body)
+
+
+def available_encodings() -> dict[str, Compressor]:
+    """Return supported encodings ordered by server preference."""
+
+    encodings: dict[str, Compressor] = {}
+    if zstandard is not None:  # pragma: no cover - optional dependency
+        encodings["zstd"] = _zstd
+    if brotli is not None:  # pragma: no cover - optional dependency
+        encodings["br"] = _brotli
+    encodings["gzip"] = _gzip
+    return encodings
+
+
+def _parse_accept_encoding(header: str) -> dict[str, float]:
+    weights: dict[str, float] = {}
+    for part in header.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        weights[token] = quality
+    return weights
+
+
+def negotiate_encoding(
+    accept_encoding: str | None, encodings: Mapping[str, Compressor] | None = None
+) -> str | None:
+    """Pick the best encoding for ``accept_encoding`` or ``None`` for identity."""
+
+    if not accept_encoding:
+        return None
+    supported = encodings if encodings is not None else available_encodings()
+    weights = _parse_accept_encoding(accept_encoding)
+    wildcard = weights.get("*", 0.0)
+    best: str | None = None
+    best_q = 0.0
+    for name in supported:
+        quality = weights.get(name, wildcard)
+        if quality > best_q:
+            best, best_q = name, quality
+    return best
+
+
+def _compressible(response: Response) -> bool:
+    if isinstance(response, StreamingResponse):
+        return False
+    if response.status_code < 200 or response.status_code in (204, 304):
+        return False
+    if "content-encoding" in response.headers:
+        return False
+    media_type = response.headers.get("content-type", "")
+    return not media_type.startswith(_SKIP_MEDIA_TYPES)
+
+
+async def compress_response(
+    request: Request,
+    response: Response,
+    *,
+    min_size: int = DEFAULT_MIN_SIZE,
+    offload_size: int = DEFAULT_OFFLOAD_SIZE,
+    level: int = DEFAULT_LEVEL,
+) -> Response:
+    """Compress ``response`` in place when the client accepts an encoding."""
+
+    if not _compressible(response):
+        return response
+    body = getattr(response, "body", b"")
+    if len(body) < min_size:
+        return response
+    encodings = available_encodings()
+    encoding = negotiate_encoding(request.headers.get("accept-encoding"), encodings)
+    if encoding is None:
+        return response
+    compressor = encodings[encoding]
+    if len(body) >= offload_size:
+        compressed = await run_in_threadpool(compressor, body, level)
+    else:
+        compressed = compressor(body, level)
+    response.body = compressed
+    response.headers["content-encoding"] = encoding
+    response.headers["content-length"] = str(len(compressed))
+    vary = response.headers.get("vary")
+    if not vary:
+        response.headers["vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in vary.lower():
+        response.headers["vary"] = f"{vary}, Accept-Encoding"
+    return response
+
+
+class CompressedRoute(APIRoute):
+    """API route whose buffered responses are compressed on demand."""
+
+    min_size: int = DEFAULT_MIN_SIZE
+    offload_size: int = DEFAULT_OFFLOAD_SIZE
+    level: int = DEFAULT_LEVEL
+
+    def get_route_handler(self) -> Callable[[Request], Awaitable[Response]]:
+        handler = super().get_route_handler()
+
+        async def compressed_handler(request: Request) -> Response:
+            response = await handler(request)
+            return await compress_response(
+                request,
+                response,
+                min_size=self.min_size,
+                offload_size=self.offload_size,
+                level=self.level,
+            )
+
+        return compressed_handler
+
+
+def compressed_route(**overrides: Any) -> type[CompressedRoute]:
+    """Return a :class:`CompressedRoute` subclass with custom thresholds."""
+
+    unknown = set(overrides) - {"min_size", "offload_size", "level"}
+    if unknown:
+        raise TypeError(f"Unknown compression options: {', '.join(sorted(unknown))}")
+    return type("CompressedRoute", (CompressedRoute,), overrides)
+
+
+__all__ = [
+    "CompressedRoute",
+    "available_encodings",
+    "compress_response",
+    "compressed_route",
+    "negotiate_encoding",
+]
@@ -0,0 +1,128 @@
+"""Background monitor for event-loop lag and threadpool saturation.
+
+A heartbeat task sleeps for ``interval`` seconds and records how late it
+wakes up in :data:`EVENT_LOOP_LAG`. A companion watchdog thread notices when
+the heartbeat is overdue by more than ``threshold`` and logs the stack of the
+event loop thread while it is still blocked, pointing at the offending code.
+The same heartbeat samples anyio's default thread limiter, which Starlette
+uses to run sync endpoints, into the threadpool gauges.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from contextlib import suppress
+
+import anyio.to_thread
+
+from .metrics import (
+    EVENT_LOOP_LAG,
+    EVENT_LOOP_STALLS,
+    THREADPOOL_ACTIVE,
+    THREADPOOL_CAPACITY,
+    THREADPOOL_QUEUED,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class LoopMonitor:
+    """Measure event-loop scheduling lag and threadpool usage."""
+
+    def __init__(self, interval: float = 0.5, threshold: float = 0.25) -> None:
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        if threshold <= 0:
+            raise ValueError("threshold must be positive")
+        self.interval = float(interval)
+        self.threshold = float(threshold)
+        self._task: asyncio.Task[None] | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._loop_thread_id: int | None = None
+        self._heartbeat = time.monotonic()
+        self._reported = False
+
+    @property
+    def running(self) -> bool:
+        """Return ``True`` while the heartbeat task is active."""
+
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start monitoring the running event loop."""
+
+        if self.running:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(
+            self._run(), name="factsynth-loop-monitor"
+        )
+        self._watchdog = threading.Thread(
+            target=self._watch, name="factsynth-loop-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop the heartbeat task and watchdog thread."""
+
+        self._stop.set()
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        watchdog, self._watchdog = self._watchdog, None
+        if watchdog is not None:
+            watchdog.join(timeout=self.interval + self.threshold)
+
+    def sample_threadpool(self) -> None:
+        """Record current threadpool usage into the Prometheus gauges."""
+
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        stats = limiter.statistics()
+        THREADPOOL_ACTIVE.set(stats.borrowed_tokens)
+        THREADPOOL_QUEUED.set(stats.tasks_waiting)
+        THREADPOOL_CAPACITY.set(stats.total_tokens)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            self._heartbeat = time.monotonic()
+            self._reported = False
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - started - self.interval)
+            EVENT_LOOP_LAG.observe(lag)
+            if lag >= self.threshold:
+                EVENT_LOOP_STALLS.inc()
+                if not self._reported:
+                    logger.warning("Event loop lag %.3fs exceeded threshold", lag)
+            with suppress(Exception):
+                self.sample_threadpool()
+
+    def _watch(self) -> None:
+        poll = min(self.interval, self.threshold) / 2
+        while not self._stop.wait(poll):
+            overdue = time.monotonic() - self._heartbeat - self.interval
+            if overdue < self.threshold or self._reported:
+                continue
+            self._reported = True
+            frame = sys._current_frames().get(self._loop_thread_id or -1)
+            stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+            logger.warning(
+                "Event loop blocked for %.3fs; current stack:\n%s",
+                overdue,
+                stack,
+                extra={"loop_lag": overdue},
+            )
+
+
+__all__ = ["LoopMonitor"]
@@ -1,15 +1,30 @@
-"""Prometheus metrics helpers."""
+"""Prometheus metrics helpers.
+
+When ``PROMETHEUS_MULTIPROC_DIR`` is set before the process starts, every
+worker records its samples in memory-mapped files inside that directory and
+:func:`metrics_bytes` aggregates all of them, so any worker can answer a
+scrape with service-wide totals.
+"""
 
 from __future__ import annotations
 
+import os
+import threading
+import time
+
 from prometheus_client import (
     CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
     Counter,
     Gauge,
     Histogram,
     generate_latest,
+    multiprocess,
 )
 
+MULTIPROC_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
 REQUESTS = Counter(
     "factsynth_requests_total",
     "Total HTTP requests",
@@ -25,7 +40,7 @@ LATENCY = Histogram(
     "Request latency seconds",
     ("route",),
 )
-UP = Gauge("factsynth_up", "1 if service up")
+UP = Gauge("factsynth_up", "1 if service up", multiprocess_mode="livemax")
 UP.set(1)
 
 SCORING_TIME = Histogram("factsynth_scoring_seconds", "Time to compute score")
@@ -44,16 +59,130 @@ CITATION_PRECISION = Histogram(
     "User-perceived citation accuracy",
     buckets=(0.0, 0.25, 0.5, 0.75, 1.0),
 )
+EVENT_LOOP_LAG = Histogram(
+    "factsynth_event_loop_lag_seconds",
+    "Delay between scheduled and actual event loop wake-ups",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+EVENT_LOOP_STALLS = Counter(
+    "factsynth_event_loop_stalls_total",
+    "Event loop stalls exceeding the configured lag threshold",
+)
+THREADPOOL_ACTIVE = Gauge(
+    "factsynth_threadpool_active_threads",
+    "Worker threads currently running sync endpoints or blocking calls",
+    multiprocess_mode="livesum",
+)
+THREADPOOL_QUEUED = Gauge(
+    "factsynth_threadpool_queued_tasks",
+    "Tasks waiting for a free worker thread",
+    multiprocess_mode="livesum",
+)
+THREADPOOL_CAPACITY = Gauge(
+    "factsynth_threadpool_capacity",
+    "Maximum number of worker threads available",
+    multiprocess_mode="livesum",
+)
+PIPELINE_CACHE = Counter(
+    "factsynth_pipeline_cache_total",
+    "Fact pipeline result cache lookups by outcome",
+    ("backend", "result"),
+)
+PIPELINE_STAGE_SECONDS = Histogram(
+    "factsynth_pipeline_stage_seconds",
+    "Time spent in each fact pipeline stage",
+    ("stage", "retriever"),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+RETRIEVER_LATENCY = Histogram(
+    "factsynth_retriever_latency_seconds",
+    "Latency of individual retriever backends queried by a fan-out retriever",
+    ("backend",),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+RETRIEVER_OUTCOMES = Counter(
+    "factsynth_retriever_requests_total",
+    "Fan-out retriever backend calls by outcome",
+    ("backend", "outcome"),
+)
+RETRIEVER_QUEUE_TIME = Histogram(
+    "factsynth_retriever_executor_queue_seconds",
+    "Time blocking retriever calls wait before an executor worker runs them",
+    ("backend",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+RETRIEVER_REJECTED = Counter(
+    "factsynth_retriever_executor_rejected_total",
+    "Blocking retriever calls rejected because the executor queue was full",
+    ("backend",),
+)
+PIPELINE_COALESCED = Counter(
+    "factsynth_pipeline_coalesced_total",
+    "Fact pipeline runs served by another caller's in-flight computation",
+    ("scope",),
+)
 REQUESTS.labels("bootstrap", "bootstrap", "200")
 LATENCY.labels("bootstrap")
 for _dimension in ("api", "ip", "org"):
     RATE_LIMIT_BLOCKS.labels(_dimension)
 
 
-def metrics_bytes() -> bytes:
-    """Return all metrics in Prometheus text format."""
+def multiprocess_dir() -> str | None:
+    """Return the multiprocess metrics directory, if configured."""
+
+    return os.environ.get(MULTIPROC_ENV) or None
+
+
+def _collect() -> bytes:
+    if multiprocess_dir():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+_CACHE_LOCK = threading.Lock()
+_CACHE: tuple[float, bytes] | None = None
+
+
+def metrics_bytes(max_age: float = 0.0) -> bytes:
+    """Return all metrics in Prometheus text format.
+
+    With ``max_age`` greater than zero the rendered exposition is reused for
+    that many seconds, bounding scrape cost when there are many series.
+    """
+
+    global _CACHE
+    if max_age <= 0:
+        return _collect()
+    with _CACHE_LOCK:
+        now = time.monotonic()
+        if _CACHE is not None and now - _CACHE[0] < max_age:
+            return _CACHE[1]
+        payload = _collect()
+        _CACHE = (now, payload)
+        return payload
+
+
+def clear_metrics_cache() -> None:
+    """Drop any cached exposition produced by :func:`metrics_bytes`."""
+
+    global _CACHE
+    with _CACHE_LOCK:
+        _CACHE = None
+
+
+def mark_worker_dead(pid: int | None = None) -> None:
+    """Remove live-gauge files for ``pid`` (defaults to this process).
+
+    Call this when a worker exits so aggregated ``live*`` gauges stop
+    reporting its values. It is a no-op outside multiprocess mode.
+    """
 
-    return generate_latest()
+    path = multiprocess_dir()
+    if not path:
+        return
+    multiprocess.mark_process_dead(pid if pid is not None else os.getpid(), path)
 
 
 def metrics_content_type() -> str:
@@ -8,6 +8,8 @@ from typing import Any
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
+from .serialization import FastJSONResponse
+
 
 class ProblemDetails(BaseModel):
     """Representation of an RFC 9457 problem response."""
@@ -26,7 +28,7 @@ class ProblemDetails(BaseModel):
         extras = payload.pop("extras", None)
         if extras:
             payload.update(extras)
-        return JSONResponse(
+        return FastJSONResponse(
             payload,
             status_code=self.status,
             media_type="application/problem+json",
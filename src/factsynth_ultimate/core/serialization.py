@@ -0,0 +1,104 @@
+"""Pluggable JSON encoding used for HTTP responses and streaming payloads.
+
+The default ``auto`` backend uses :mod:`orjson` when it is installed and falls
+back to the standard library otherwise. Both backends emit compact UTF-8 JSON
+identical in shape to Starlette's :class:`~starlette.responses.JSONResponse`.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from collections.abc import Callable
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:  # pragma: no cover - exercised when the optional dependency is installed
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None  # type: ignore[assignment]
+
+logger = logging.getLogger(__name__)
+
+Encoder = Callable[[Any], bytes]
+
+BACKENDS = ("auto", "orjson", "stdlib")
+
+
+def _stdlib_dumps(content: Any) -> bytes:
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def _orjson_dumps(content: Any) -> bytes:
+    try:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    except TypeError:
+        # Values orjson rejects (e.g. integers wider than 64 bits) still
+        # serialise with the standard library encoder.
+        return _stdlib_dumps(content)
+
+
+def _resolve(name: str) -> tuple[str, Encoder]:
+    choice = (name or "auto").strip().lower()
+    if choice not in BACKENDS:
+        raise ValueError(f"Unknown JSON backend {name!r}; expected one of {BACKENDS}")
+    if choice == "stdlib":
+        return "stdlib", _stdlib_dumps
+    if orjson is None:
+        if choice == "orjson":
+            logger.warning("orjson requested but not installed; using stdlib JSON encoder")
+        return "stdlib", _stdlib_dumps
+    return "orjson", _orjson_dumps
+
+
+_BACKEND, _ENCODER = _resolve("auto")
+
+
+def set_json_backend(name: str) -> str:
+    """Select the JSON backend by ``name`` and return the effective backend."""
+
+    global _BACKEND, _ENCODER
+    _BACKEND, _ENCODER = _resolve(name)
+    return _BACKEND
+
+
+def get_json_backend() -> str:
+    """Return the name of the active JSON backend."""
+
+    return _BACKEND
+
+
+def dumps(content: Any) -> bytes:
+    """Encode ``content`` as compact UTF-8 JSON bytes."""
+
+    return _ENCODER(content)
+
+
+def dumps_str(content: Any) -> str:
+    """Encode ``content`` as a compact JSON string."""
+
+    return _ENCODER(content).decode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """:class:`JSONResponse` rendered with the active JSON backend."""
+
+    def render(self, content: Any) -> bytes:
+        return _ENCODER(content)
+
+
+__all__ = [
+    "BACKENDS",
+    "FastJSONResponse",
+    "dumps",
+    "dumps_str",
+    "get_json_backend",
+    "set_json_backend",
+]
@@ -14,6 +14,7 @@ from factsynth_ultimate.config import ConfigError, load_config
 
 from .rate_limit import RateQuota
 from .secrets import read_api_key
+from .serialization import BACKENDS as JSON_BACKENDS
 
 
 def _default_callback_allowed_hosts() -> list[str]:
@@ -81,6 +82,82 @@ class Settings(BaseSettings):
     source_store_redis_url: str | None = Field(
         default=None, alias="SOURCE_STORE_REDIS_URL"
     )
+    pipeline_cache_backend: str = Field(default="none", alias="PIPELINE_CACHE_BACKEND")
+    pipeline_cache_ttl: float = Field(default=60.0, gt=0, alias="PIPELINE_CACHE_TTL")
+    pipeline_cache_stale_ttl: float = Field(
+        default=0.0, ge=0, alias="PIPELINE_CACHE_STALE_TTL"
+    )
+    pipeline_cache_maxsize: int = Field(default=1024, ge=1, alias="PIPELINE_CACHE_MAXSIZE")
+    pipeline_cache_redis_url: str | None = Field(
+        default=None, alias="PIPELINE_CACHE_REDIS_URL"
+    )
+    pipeline_coalesce: bool = Field(default=True, alias="PIPELINE_COALESCE")
+    pipeline_coalesce_redis: bool = Field(default=False, alias="PIPELINE_COALESCE_REDIS")
+    pipeline_coalesce_lock_ttl: float = Field(
+        default=30.0, gt=0, alias="PIPELINE_COALESCE_LOCK_TTL"
+    )
+    pipeline_coalesce_wait_timeout: float = Field(
+        default=10.0, gt=0, alias="PIPELINE_COALESCE_WAIT_TIMEOUT"
+    )
+    pipeline_retrievers: Annotated[list[str], NoDecode] = Field(
+        default_factory=list, alias="PIPELINE_RETRIEVERS"
+    )
+    pipeline_retriever_deadline: float = Field(
+        default=1.0, gt=0, alias="PIPELINE_RETRIEVER_DEADLINE"
+    )
+    pipeline_retriever_hedge_after: float | None = Field(
+        default=None, gt=0, alias="PIPELINE_RETRIEVER_HEDGE_AFTER"
+    )
+    pipeline_fusion: str = Field(default="rrf", alias="PIPELINE_FUSION")
+    retriever_offload: str = Field(default="thread", alias="RETRIEVER_OFFLOAD")
+    retriever_offload_workers: int = Field(default=4, ge=1, alias="RETRIEVER_OFFLOAD_WORKERS")
+    retriever_offload_max_pending: int = Field(
+        default=64, ge=1, alias="RETRIEVER_OFFLOAD_MAX_PENDING"
+    )
+    retriever_offload_queue_timeout: float | None = Field(
+        default=None, gt=0, alias="RETRIEVER_OFFLOAD_QUEUE_TIMEOUT"
+    )
+    retriever_preload: Annotated[list[str], NoDecode] = Field(
+        default_factory=list, alias="RETRIEVER_PRELOAD"
+    )
+    retriever_index_path: str | None = Field(default=None, alias="RETRIEVER_INDEX_PATH")
+    retriever_shards_path: str | None = Field(default=None, alias="RETRIEVER_SHARDS_PATH")
+    retriever_shard_timeout: float | None = Field(
+        default=1.0, gt=0, alias="RETRIEVER_SHARD_TIMEOUT"
+    )
+    retriever_lexicon_path: str | None = Field(default=None, alias="RETRIEVER_LEXICON_PATH")
+    retriever_vector_index_path: str | None = Field(
+        default=None, alias="RETRIEVER_VECTOR_INDEX_PATH"
+    )
+    retriever_vector_probes: int = Field(default=8, ge=1, alias="RETRIEVER_VECTOR_PROBES")
+    retriever_embedder: str | None = Field(default=None, alias="RETRIEVER_EMBEDDER")
+    hybrid_lexical: str = Field(default="bm25", alias="HYBRID_LEXICAL")
+    hybrid_dense: str = Field(default="vector", alias="HYBRID_DENSE")
+    hybrid_weights: dict[str, float] = Field(default_factory=dict, alias="HYBRID_WEIGHTS")
+    hybrid_tenant_weights: dict[str, dict[str, float]] = Field(
+        default_factory=dict, alias="HYBRID_TENANT_WEIGHTS"
+    )
+    hybrid_lexical_confidence: float | None = Field(
+        default=None, alias="HYBRID_LEXICAL_CONFIDENCE"
+    )
+    pipeline_process_workers: int = Field(default=0, ge=0, alias="PIPELINE_PROCESS_WORKERS")
+    pipeline_process_min_docs: int = Field(default=32, ge=1, alias="PIPELINE_PROCESS_MIN_DOCS")
+    pipeline_process_min_chars: int = Field(
+        default=16_384, ge=1, alias="PIPELINE_PROCESS_MIN_CHARS"
+    )
+    pipeline_spec: str | None = Field(default=None, alias="PIPELINE_SPEC")
+    generate_batch_concurrency: int = Field(
+        default=8, ge=1, alias="GENERATE_BATCH_CONCURRENCY"
+    )
+    loop_monitor_interval: float = Field(default=0.5, ge=0, alias="LOOP_MONITOR_INTERVAL")
+    loop_lag_threshold: float = Field(default=0.25, gt=0, alias="LOOP_LAG_THRESHOLD")
+    metrics_cache_ttl: float = Field(default=0.0, ge=0, alias="METRICS_CACHE_TTL")
+    json_backend: str = Field(default="auto", alias="JSON_BACKEND")
+    audit_log_dir: str | None = Field(default=None, alias="AUDIT_LOG_DIR")
+    audit_log_batch_size: int = Field(default=256, ge=1, alias="AUDIT_LOG_BATCH_SIZE")
+    audit_log_flush_interval: float = Field(
+        default=1.0, ge=0, alias="AUDIT_LOG_FLUSH_INTERVAL"
+    )
 
     @field_validator(
         "cors_allow_origins",
@@ -89,6 +166,8 @@ class Settings(BaseSettings):
         "ip_allowlist",
         "allowed_api_keys",
         "callback_url_allowed_hosts",
+        "pipeline_retrievers",
+        "retriever_preload",
         mode="before",
     )
     @classmethod
@@ -107,6 +186,42 @@ class Settings(BaseSettings):
             return [item for item in value.split(",") if item]
         return list(value)
 
+    @field_validator("pipeline_cache_backend")
+    @classmethod
+    def _check_pipeline_cache_backend(cls, value: str) -> str:
+        normalized = value.strip().lower()
+        if normalized not in {"none", "memory", "redis"}:
+            msg = "PIPELINE_CACHE_BACKEND must be one of none, memory, redis"
+            raise ValueError(msg)
+        return normalized
+
+    @field_validator("pipeline_fusion")
+    @classmethod
+    def _check_pipeline_fusion(cls, value: str) -> str:
+        normalized = value.strip().lower()
+        if normalized not in {"rrf", "normalized"}:
+            msg = "PIPELINE_FUSION must be one of rrf, normalized"
+            raise ValueError(msg)
+        return normalized
+
+    @field_validator("retriever_offload")
+    @classmethod
+    def _check_retriever_offload(cls, value: str) -> str:
+        normalized = value.strip().lower()
+        if normalized not in {"none", "thread", "process"}:
+            msg = "RETRIEVER_OFFLOAD must be one of none, thread, process"
+            raise ValueError(msg)
+        return normalized
+
+    @field_validator("json_backend")
+    @classmethod
+    def _check_json_backend(cls, value: str) -> str:
+        normalized = value.strip().lower()
+        if normalized not in JSON_BACKENDS:
+            msg = f"JSON_BACKEND must be one of {', '.join(JSON_BACKENDS)}"
+            raise ValueError(msg)
+        return normalized
+
     @field_validator("rates_api", "rates_ip", "rates_org", mode="before")
     @classmethod
     def _parse_rate(cls, value: Any) -> RateQuota:
@@ -4,6 +4,7 @@ from __future__ import annotations
 
 import logging
 from contextlib import suppress
+from typing import Any
 
 from fastapi import FastAPI
 
@@ -14,13 +15,29 @@ try:
 except ImportError:  # pragma: no cover - optional dependency
     FastAPIInstrumentor = None
 
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # pragma: no cover - optional dependency
+    otel_trace = None
+
+_tracer: Any | None = None
+
+
+def get_tracer() -> Any | None:
+    """Return the tracer for internal spans, or ``None`` while OTel is disabled."""
+
+    return _tracer
+
 
 def try_enable_otel(app: FastAPI) -> None:
     """Instrument *app* with OpenTelemetry if available."""
 
+    global _tracer
     if FastAPIInstrumentor is None:
         log.info("otel_disabled: missing dependency")
         return
     with suppress(Exception):
         FastAPIInstrumentor.instrument_app(app)
+        if otel_trace is not None:
+            _tracer = otel_trace.get_tracer("factsynth_ultimate")
         log.info("otel_enabled")
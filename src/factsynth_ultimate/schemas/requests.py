@@ -119,6 +119,13 @@ class GenerateReq(BaseModel):
     seed: int | None = None
 
 
+class GenerateBatchReq(BaseModel):
+    """Batch of generation requests streamed back as NDJSON."""
+
+    items: list[GenerateReq] = Field(min_length=1, max_length=10_000)
+    concurrency: Annotated[int, Field(ge=1, le=64)] | None = None
+
+
 class FeedbackReq(BaseModel):
     """User feedback metrics payload."""
 
@@ -6,13 +6,12 @@ import asyncio
 import logging
 from collections.abc import Callable, Iterable
 from contextlib import ExitStack
-from importlib import metadata
-from importlib.metadata import EntryPoint
-from typing import Any, cast
+from typing import Any
 
 from ..core.trace import index, normalize_trace, parse, start_trace
 from .redaction import redact_pii
 from .retrievers.base import Retriever
+from .retrievers.registry import get_registry
 
 logger = logging.getLogger(__name__)
 
@@ -20,43 +19,9 @@ ResultDict = dict[str, Any]
 
 
 def _load_retriever(name: str) -> Retriever:
-    """Load a retriever registered under the given entry-point ``name``."""
+    """Load a new retriever registered under the given entry-point ``name``."""
 
-    try:
-        candidates: Iterable[EntryPoint] = metadata.entry_points(
-            group="factsynth_ultimate.retrievers"
-        )
-    except TypeError:
-        eps = metadata.entry_points()
-        select = getattr(eps, "select", None)
-        if callable(select):
-            candidates = cast(
-                Iterable[EntryPoint],
-                select(group="factsynth_ultimate.retrievers"),
-            )
-        else:
-            get_group = getattr(eps, "get", None)
-            if callable(get_group):
-                candidates = cast(
-                    Iterable[EntryPoint],
-                    get_group("factsynth_ultimate.retrievers", ()),
-                )
-            else:
-                candidates = ()
-    for ep in candidates:
-        if ep.name != name:
-            continue
-        loaded = ep.load()
-        if isinstance(loaded, Retriever):
-            return loaded
-        if callable(loaded):
-            candidate = loaded()
-            if isinstance(candidate, Retriever):
-                return candidate
-        raise TypeError(
-            f"Entry point '{name}' must provide a Retriever instance or factory",
-        )
-    raise LookupError(f"Retriever '{name}' not found")
+    return get_registry().load(name)
 
 
 def evaluate_claim(  # noqa: PLR0913,C901,PLR0912
@@ -81,18 +46,24 @@ def evaluate_claim(  # noqa: PLR0913,C901,PLR0912
     retriever:
         Either an instance implementing :class:`Retriever` or the name of a
         registered entry point in the ``factsynth_ultimate.retrievers`` group.
-        Loaded retrievers may optionally define ``close`` or ``aclose`` methods
-        which will be invoked when evaluation completes.
+        Instances may optionally define ``close`` or ``aclose`` methods which
+        will be invoked when evaluation completes. Named retrievers are shared
+        through the process-wide registry and only closed once no other
+        caller holds them.
     """
 
     out: ResultDict = {}
+    leased: str | None = None
     if isinstance(retriever, str):
-        retriever = _load_retriever(retriever)
+        leased = retriever
+        retriever = get_registry().acquire(leased)
     if retriever is not None:
         if not callable(getattr(retriever, "search", None)):
             raise TypeError("retriever must implement search()")
     with ExitStack() as stack:
-        if retriever:
+        if leased is not None:
+            stack.callback(get_registry().release, leased)
+        elif retriever:
             aclose = getattr(retriever, "aclose", None)
             if callable(aclose):
                 try:
@@ -0,0 +1,154 @@
+"""Bilingual lexicons for translating query terms before retrieval.
+
+A :class:`Lexicon` is compiled once from a ``{source: target}`` mapping.
+Single-word entries are looked up in a dictionary per token, so the cost of
+translation does not grow with the size of the lexicon. Multi-word phrases
+are compiled into one regular expression whose alternation is factored into
+a prefix trie, and :meth:`Lexicon.translate` rewrites a text in a single
+pass that tries phrases before single words.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Iterable, Mapping
+from pathlib import Path
+
+import regex as re
+import yaml
+
+from ..tokenization import normalize, tokenize
+
+_WORD_RE = re.compile(r"\w+")
+
+#: Built-in Ukrainian to English keywords.
+UA_TO_EN: dict[str, str] = {
+    "мікросервіси": "microservices",
+    "мікросервіс": "microservice",
+    "хмара": "cloud",
+}
+
+
+def _key(text: str) -> str:
+    return normalize(text).lower()
+
+
+def _trie_pattern(phrases: Iterable[str]) -> str:
+    """Return a regex alternation of ``phrases`` factored by common prefixes."""
+
+    trie: dict[str, dict] = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict[str, dict]) -> str:
+        ends = "" in node
+        branches = [re.escape(char) + build(child) for char, child in node.items() if char]
+        if not branches:
+            return ""
+        # The optional continuation is greedy, so the longest phrase wins.
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        if ends:
+            return f"(?:{body})?"
+        return body
+
+    return build(trie)
+
+
+class Lexicon:
+    """Compiled ``source -> target`` term mapping applied in one pass.
+
+    Keys are matched case-insensitively on whole words; translated terms are
+    returned in lower case.
+    """
+
+    def __init__(self, entries: Mapping[str, str]) -> None:
+        self._words: dict[str, str] = {}
+        self._phrases: dict[str, str] = {}
+        self._phrase_tokens: dict[tuple[str, ...], list[str]] = {}
+        for source, target in entries.items():
+            key = _key(source)
+            if not key:
+                continue
+            value = _key(target)
+            if _WORD_RE.fullmatch(key):
+                self._words[key] = value
+            else:
+                self._phrases[key] = value
+                self._phrase_tokens[tuple(tokenize(key))] = tokenize(value)
+        self._word_tokens = {key: tokenize(value) for key, value in self._words.items()}
+        self._longest = max(map(len, self._phrase_tokens), default=1)
+        alternation = _trie_pattern(self._phrases)
+        pattern = rf"\b{alternation}\b|\w+" if alternation else r"\w+"
+        self._pattern = re.compile(pattern)
+
+    @classmethod
+    def load(cls, path: Path | str) -> Lexicon:
+        """Load a lexicon from a JSON or YAML mapping, or a tab-separated file."""
+
+        source = Path(path)
+        text = source.read_text(encoding="utf-8")
+        if source.suffix == ".json":
+            entries = json.loads(text)
+        elif source.suffix in {".yaml", ".yml"}:
+            entries = yaml.safe_load(text) or {}
+        else:
+            entries = {}
+            for line_no, line in enumerate(text.splitlines(), start=1):
+                if not line.strip() or line.startswith("#"):
+                    continue
+                term, sep, translation = line.partition("\t")
+                if not sep:
+                    raise ValueError(f"{path}:{line_no}: expected 'term<TAB>translation'")
+                entries[term] = translation
+        if not isinstance(entries, Mapping):
+            raise ValueError(f"{path} must contain a mapping of terms")
+        return cls({str(term): str(translation) for term, translation in entries.items()})
+
+    def __len__(self) -> int:
+        return len(self._words) + len(self._phrases)
+
+    def __contains__(self, term: object) -> bool:
+        if not isinstance(term, str):
+            return False
+        key = _key(term)
+        return key in self._words or key in self._phrases
+
+    def translate(self, text: str) -> str:
+        """Return lower-cased ``text`` with every known term translated."""
+
+        def replace(match: re.Match[str]) -> str:
+            found = match.group()
+            return self._phrases.get(found) or self._words.get(found, found)
+
+        return self._pattern.sub(replace, normalize(text).lower())
+
+    def translate_tokens(self, tokens: Iterable[str]) -> list[str]:
+        """Return lower-cased ``tokens`` with known words and phrases translated.
+
+        Phrases are matched greedily, longest first.
+        """
+
+        lowered = [token.lower() for token in tokens]
+        out: list[str] = []
+        pos = 0
+        while pos < len(lowered):
+            for size in range(min(self._longest, len(lowered) - pos), 1, -1):
+                replacement = self._phrase_tokens.get(tuple(lowered[pos : pos + size]))
+                if replacement is not None:
+                    out.extend(replacement)
+                    pos += size
+                    break
+            else:
+                token = lowered[pos]
+                out.extend(self._word_tokens.get(token, (token,)))
+                pos += 1
+        return out
+
+
+DEFAULT_LEXICON = Lexicon(UA_TO_EN)
+
+
+__all__ = ["DEFAULT_LEXICON", "UA_TO_EN", "Lexicon"]
@@ -0,0 +1,115 @@
+"""MinHash signatures of word shingles for near-duplicate detection.
+
+A document is reduced to its set of ``shingle``-word sequences. Each of
+``num_perm`` universal hash functions ``(a * h + b) mod p`` is applied to the
+CRC32 of every shingle and the minimum is kept, so the share of positions on
+which two signatures agree estimates the Jaccard similarity of the shingle
+sets. Signatures are deterministic for a given ``seed``, which lets indexes
+compute them once at build time and store them with their documents.
+
+:func:`lsh_bands` chooses how to cut signatures into bands for
+locality-sensitive hashing: documents sharing any band become candidate
+duplicates, whose similarity is then estimated from the full signatures.
+"""
+
+from __future__ import annotations
+
+import random
+import zlib
+from collections.abc import Sequence
+from typing import Any
+
+from ..tokenization import tokenize
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+class MinHasher:
+    """Compute MinHash signatures of ``shingle``-word sequences."""
+
+    def __init__(self, num_perm: int = 64, *, shingle: int = 3, seed: int = 1) -> None:
+        if num_perm < 1:
+            raise ValueError("num_perm must be at least 1")
+        if shingle < 1:
+            raise ValueError("shingle must be at least 1")
+        self.num_perm = num_perm
+        self.shingle = shingle
+        self.seed = seed
+        rng = random.Random(seed)
+        # Coefficients below 2**31 keep a * h + b within 64 bits for NumPy.
+        self._a = [rng.randrange(1, 1 << 31) for _ in range(num_perm)]
+        self._b = [rng.randrange(0, 1 << 31) for _ in range(num_perm)]
+
+    @property
+    def params(self) -> dict[str, int]:
+        """Return the parameters that determine the signatures."""
+
+        return {"num_perm": self.num_perm, "shingle": self.shingle, "seed": self.seed}
+
+    def shingle_hashes(self, text: str) -> list[int]:
+        """Return the CRC32 of every distinct word shingle in ``text``."""
+
+        words = [token.casefold() for token in tokenize(text)]
+        size = min(self.shingle, len(words))
+        shingles = {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+        return [zlib.crc32(item.encode("utf-8")) for item in shingles if item]
+
+    def signature(self, text: str) -> tuple[int, ...]:
+        """Return the MinHash signature of ``text``."""
+
+        hashes = self.shingle_hashes(text)
+        if not hashes:
+            return (_MAX_HASH,) * self.num_perm
+        return tuple(
+            min(((a * h + b) % _PRIME) & _MAX_HASH for h in hashes)
+            for a, b in zip(self._a, self._b)
+        )
+
+    def signatures(self, texts: Sequence[str]) -> Any:
+        """Return the signatures of ``texts`` as a ``uint32`` NumPy matrix.
+
+        Gives the same values as :meth:`signature`, vectorized over the
+        shingles of each text for index builds.
+        """
+
+        import numpy as np
+
+        a = np.array(self._a, dtype=np.uint64)[:, None]
+        b = np.array(self._b, dtype=np.uint64)[:, None]
+        out = np.full((len(texts), self.num_perm), _MAX_HASH, dtype=np.uint32)
+        for row, text in enumerate(texts):
+            hashes = self.shingle_hashes(text)
+            if hashes:
+                values = (a * np.array(hashes, dtype=np.uint64) + b) % np.uint64(_PRIME)
+                out[row] = (values & np.uint64(_MAX_HASH)).min(axis=1)
+        return out
+
+
+def similarity(first: Sequence[int], second: Sequence[int]) -> float:
+    """Estimate the Jaccard similarity of two signatures of equal length."""
+
+    if len(first) != len(second):
+        raise ValueError("signatures must have the same length")
+    return sum(x == y for x, y in zip(first, second)) / len(first)
+
+
+def lsh_bands(num_perm: int, threshold: float) -> tuple[int, int]:
+    """Return ``(bands, rows)`` for LSH over ``num_perm`` signature positions.
+
+    Among the exact splits of the signature, picks the one whose candidate
+    curve ``(1 / bands) ** (1 / rows)`` rises closest below ``threshold``, so
+    pairs at the threshold are very likely to share a band.
+    """
+
+    if not 0 < threshold <= 1:
+        raise ValueError("threshold must be in (0, 1]")
+    splits = [(num_perm // rows, rows) for rows in range(1, num_perm + 1) if num_perm % rows == 0]
+    below = [split for split in splits if (1 / split[0]) ** (1 / split[1]) <= threshold]
+    return max(below, key=lambda split: split[1]) if below else splits[0]
+
+
+DEFAULT_MINHASH = MinHasher()
+
+
+__all__ = ["DEFAULT_MINHASH", "MinHasher", "lsh_bands", "similarity"]
@@ -1,5 +1,22 @@
 """Retriever implementations and protocol definitions."""
 
-from .base import RetrievedDoc, Retriever
+from .base import PartialResults, RetrievedDoc, Retriever, is_partial
+from .fanout import FanoutRetriever
+from .hybrid import HybridRetriever, fusion_context
+from .offload import OffloadedRetriever, RetrieverBusyError, offload_blocking
+from .registry import RetrieverRegistry, get_registry
 
-__all__ = ["RetrievedDoc", "Retriever"]
+__all__ = [
+    "FanoutRetriever",
+    "HybridRetriever",
+    "OffloadedRetriever",
+    "PartialResults",
+    "RetrievedDoc",
+    "Retriever",
+    "RetrieverBusyError",
+    "RetrieverRegistry",
+    "fusion_context",
+    "get_registry",
+    "is_partial",
+    "offload_blocking",
+]
@@ -3,22 +3,46 @@
 from __future__ import annotations
 
 from collections.abc import AsyncIterable, Iterable
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Protocol, runtime_checkable
 
 
 @dataclass
 class RetrievedDoc:
-    """Result returned by a retriever search."""
+    """Result returned by a retriever search.
+
+    Retrievers serving indexes built with MinHash signatures attach the
+    document's ``signature`` for near-duplicate suppression.
+    """
 
     id: str
     text: str
     score: float
+    signature: tuple[int, ...] | None = field(default=None, repr=False, compare=False)
+
+
+class PartialResults(list[RetrievedDoc]):
+    """Ranking that left out some of its sources."""
+
+    partial = True
+
+
+def is_partial(results: object) -> bool:
+    """Return whether ``results`` is a ranking flagged as ``partial``."""
+
+    return bool(getattr(results, "partial", False))
 
 
 @runtime_checkable
 class Retriever(Protocol):
-    """Protocol for search backends used by :func:`evaluate_claim`."""
+    """Protocol for search backends used by :func:`evaluate_claim`.
+
+    Implementations returning documents in descending score order may set a
+    ``score_sorted = True`` attribute so consumers can stop reading once they
+    hold enough results. A ranking that leaves out some of its sources, such
+    as a shard or backend that timed out, carries a true ``partial``
+    attribute so consumers do not cache or share it.
+    """
 
     def search(self, query: str, k: int = 5) -> Iterable[RetrievedDoc]:
         """Return up to ``k`` documents relevant to ``query``."""
@@ -0,0 +1,303 @@
+"""BM25 and BM25+ retrieval over NumPy postings.
+
+Postings are stored in a compressed sparse row layout: the entries for term
+``t`` live at ``offsets[t]:offsets[t + 1]`` of the contiguous ``doc_ids`` and
+``term_freqs`` arrays. Inverse document frequencies and the per-document
+length normalization ``k1 * (1 - b + b * len / avg_len)`` are computed once at
+construction. Scoring a query gathers the postings of its terms, computes
+every term's contribution in one vectorized step and scatter-adds them per
+candidate document, followed by a partial sort for the top ``k``. The cost
+depends on the length of those postings, not on the corpus size.
+"""
+
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from array import array
+from collections import Counter
+from collections.abc import Iterable, Mapping, Sequence
+from typing import ClassVar
+
+import numpy as np
+
+from ...tokenization import tokenize
+from .base import RetrievedDoc, Retriever
+from .local import Fixture
+
+
+def _terms(text: str) -> list[str]:
+    return [token.lower() for token in tokenize(text)]
+
+
+def bm25_idf(df: np.ndarray, n_docs: int) -> np.ndarray:
+    """Return the non-negative BM25 inverse document frequency for ``df``."""
+
+    return np.log1p((n_docs - df + 0.5) / (df + 0.5))
+
+
+def top_k(docs: np.ndarray, scores: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Return the ``k`` best positive ``scores`` and their ``docs``, best first.
+
+    ``docs`` must be ascending; ties keep the earliest documents.
+    """
+
+    positive = scores > 0
+    docs, scores = docs[positive], scores[positive]
+    if docs.size > k:
+        kth = -np.partition(-scores, k - 1)[k - 1]
+        above = scores > kth
+        tied = scores == kth
+        tied &= np.cumsum(tied) <= k - np.count_nonzero(above)
+        keep = above | tied
+        docs, scores = docs[keep], scores[keep]
+    order = np.lexsort((docs, -scores))
+    return docs[order], scores[order]
+
+
+def check_bm25_params(k1: float, b: float, delta: float) -> None:
+    """Raise :class:`ValueError` unless ``k1``, ``b`` and ``delta`` are valid."""
+
+    if k1 < 0:
+        raise ValueError("k1 must not be negative")
+    if not 0 <= b <= 1:
+        raise ValueError("b must be between 0 and 1")
+    if delta < 0:
+        raise ValueError("delta must not be negative")
+
+
+class BM25Scorer(ABC):
+    """BM25 and BM25+ ranking over postings in compressed sparse row layout.
+
+    ``k1`` controls term-frequency saturation and ``b`` the strength of
+    document length normalization. BM25+ adds ``delta`` to the contribution
+    of every matching term so long documents are not scored below documents
+    that lack the term entirely; ``delta=1.0`` is the usual choice. Only
+    documents sharing at least one term with the query are returned.
+
+    Subclasses provide the ``offsets``, ``doc_ids`` and ``term_freqs`` arrays
+    and must implement the abstract term lookup, IDF, length normalization
+    and document store hooks.
+    """
+
+    #: Results are returned in descending score order.
+    score_sorted: ClassVar[bool] = True
+    #: Scoring is CPU-bound, so ``asearch`` should run in an executor.
+    blocking: ClassVar[bool] = True
+
+    ids: Sequence[str]
+    offsets: np.ndarray
+    doc_ids: np.ndarray
+    term_freqs: np.ndarray
+    doc_lengths: np.ndarray
+    avg_length: float
+
+    def __init__(self, *, k1: float = 1.2, b: float = 0.75, delta: float = 0.0) -> None:
+        check_bm25_params(k1, b, delta)
+        self.k1 = float(k1)
+        self.b = float(b)
+        self.delta = float(delta)
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Return the number of indexed documents."""
+
+    @abstractmethod
+    def _term_id(self, term: str) -> int | None:
+        """Return the postings row of ``term``, or ``None`` when it is unknown."""
+
+    @abstractmethod
+    def _idf(self, term_ids: list[int]) -> np.ndarray:
+        """Return the inverse document frequency of each term row."""
+
+    @abstractmethod
+    def _length_norm(self, docs: np.ndarray) -> np.ndarray:
+        """Return the length normalization of ``docs``."""
+
+    @abstractmethod
+    def _document(self, doc: int) -> tuple[str, str]:
+        """Return the id and text of document ``doc``."""
+
+    def _signature(self, doc: int) -> tuple[int, ...] | None:
+        return None
+
+    def _retrieved(self, doc: int, score: float) -> RetrievedDoc:
+        doc_id, text = self._document(doc)
+        return RetrievedDoc(id=doc_id, text=text, score=score, signature=self._signature(doc))
+
+    def _normalize(self, docs: np.ndarray, avg_length: float) -> np.ndarray:
+        if not avg_length:
+            return np.full(docs.size, self.k1)
+        relative = self.doc_lengths[docs].astype(np.float64) / avg_length
+        return self.k1 * (1.0 - self.b + self.b * relative)
+
+    def document_frequency(self, term: str) -> int:
+        """Return the number of indexed documents containing ``term``."""
+
+        term_id = self._term_id(term)
+        if term_id is None:
+            return 0
+        return int(self.offsets[term_id + 1] - self.offsets[term_id])
+
+    def close(self) -> None:
+        """Close hook to satisfy the :class:`Retriever` protocol."""
+
+        return None
+
+    async def aclose(self) -> None:
+        """Async close hook to satisfy the :class:`Retriever` protocol."""
+
+        self.close()
+
+    def score_candidates(self, query: str) -> tuple[np.ndarray, np.ndarray]:
+        """Return ids and BM25 scores of documents sharing a term with ``query``.
+
+        Ids are in ascending order. Work is proportional to the postings of
+        the query terms rather than to the corpus size.
+        """
+
+        return self.score_terms(list(dict.fromkeys(_terms(query))))
+
+    def score_terms(
+        self,
+        terms: Sequence[str],
+        *,
+        idf: Mapping[str, float] | None = None,
+        avg_length: float | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Score the documents containing any of the distinct ``terms``.
+
+        ``idf`` and ``avg_length`` replace this index's own collection
+        statistics, so several indexes can be ranked as one collection.
+        """
+
+        found = [(term, term_id) for term in terms if (term_id := self._term_id(term)) is not None]
+        if not found:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float64)
+        term_ids = [term_id for _, term_id in found]
+        offsets = self.offsets
+        spans = [slice(int(offsets[t]), int(offsets[t + 1])) for t in term_ids]
+        docs = np.concatenate([self.doc_ids[span] for span in spans])
+        tf = np.concatenate([self.term_freqs[span] for span in spans]).astype(np.float64)
+        if idf is None:
+            per_term = self._idf(term_ids)
+        else:
+            per_term = np.array([idf[term] for term, _ in found], dtype=np.float64)
+        weights = np.repeat(per_term, [span.stop - span.start for span in spans])
+        if avg_length is None:
+            norm = self._length_norm(docs)
+        else:
+            norm = self._normalize(docs, avg_length)
+        gains = weights * (tf * (self.k1 + 1.0) / (tf + norm) + self.delta)
+        if len(term_ids) == 1:
+            return docs, gains
+        n_docs = len(self)
+        if docs.size * 8 >= n_docs:
+            # Dense accumulation beats sorting once postings cover much of the corpus.
+            totals = np.bincount(docs, weights=gains, minlength=n_docs)
+            candidates = np.flatnonzero(totals)
+            return candidates, totals[candidates]
+        candidates, slots = np.unique(docs, return_inverse=True)
+        return candidates, np.bincount(slots, weights=gains, minlength=candidates.size)
+
+    def search(self, query: str, k: int = 5) -> list[RetrievedDoc]:
+        """Return the top ``k`` documents for ``query`` by descending score."""
+
+        if k <= 0:
+            return []
+        matched, scores = top_k(*self.score_candidates(query), k)
+        return [
+            self._retrieved(doc, score) for doc, score in zip(matched.tolist(), scores.tolist())
+        ]
+
+    async def asearch(self, query: str, k: int = 5) -> list[RetrievedDoc]:
+        """Async wrapper around :meth:`search` for compatibility."""
+
+        return self.search(query, k=k)
+
+
+class BM25Retriever(BM25Scorer):
+    """Rank in-memory fixtures with BM25, building postings at construction."""
+
+    def __init__(
+        self,
+        fixtures: Iterable[Fixture],
+        *,
+        k1: float = 1.2,
+        b: float = 0.75,
+        delta: float = 0.0,
+    ) -> None:
+        super().__init__(k1=k1, b=b, delta=delta)
+        self.ids: list[str] = []
+        self.texts: list[str] = []
+        self.vocabulary: dict[str, int] = {}
+
+        term_ids = array("i")
+        doc_ids = array("i")
+        freqs = array("f")
+        lengths = array("f")
+        for doc_id, fix in enumerate(fixtures):
+            self.ids.append(fix.id)
+            self.texts.append(fix.text)
+            counts = Counter(_terms(fix.text))
+            lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                term_ids.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+                doc_ids.append(doc_id)
+                freqs.append(tf)
+
+        terms = np.frombuffer(term_ids, dtype=np.int32)
+        order = np.argsort(terms, kind="stable")
+        df = np.bincount(terms, minlength=len(self.vocabulary))
+        self.offsets = np.zeros(len(self.vocabulary) + 1, dtype=np.int64)
+        np.cumsum(df, out=self.offsets[1:])
+        self.doc_ids = np.frombuffer(doc_ids, dtype=np.int32)[order]
+        self.term_freqs = np.frombuffer(freqs, dtype=np.float32)[order]
+
+        n_docs = len(self.ids)
+        self.doc_lengths = np.frombuffer(lengths, dtype=np.float32).copy()
+        self.avg_length = avg_length = float(self.doc_lengths.mean()) if n_docs else 0.0
+        relative = self.doc_lengths / avg_length if avg_length else np.ones(n_docs)
+        self.length_norm = (self.k1 * (1.0 - self.b + self.b * relative)).astype(np.float64)
+        self.idf = bm25_idf(df, n_docs)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _term_id(self, term: str) -> int | None:
+        return self.vocabulary.get(term)
+
+    def _idf(self, term_ids: list[int]) -> np.ndarray:
+        return self.idf[term_ids]
+
+    def _length_norm(self, docs: np.ndarray) -> np.ndarray:
+        return self.length_norm[docs]
+
+    def _document(self, doc: int) -> tuple[str, str]:
+        return self.ids[doc], self.texts[doc]
+
+
+def create_bm25_retriever() -> Retriever:
+    """Return a BM25 retriever instance for entry-point loading.
+
+    Serves the on-disk index at ``RETRIEVER_INDEX_PATH`` when configured.
+    """
+
+    from ...core.settings import load_settings
+
+    index_path = load_settings().retriever_index_path
+    if index_path:
+        from .index import MmapBM25Retriever
+
+        return MmapBM25Retriever(index_path)
+    fixtures = [Fixture(id="default", text="alpha is the first letter")]
+    return BM25Retriever(fixtures)
+
+
+__all__ = [
+    "BM25Retriever",
+    "BM25Scorer",
+    "bm25_idf",
+    "check_bm25_params",
+    "create_bm25_retriever",
+    "top_k",
+]
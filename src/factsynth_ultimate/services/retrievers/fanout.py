@@ -0,0 +1,300 @@
+"""Composite retriever querying several backends concurrently.
+
+:class:`FanoutRetriever` sends each query to every backend under a shared
+deadline. A backend that has not answered after ``hedge_after`` seconds gets
+a second, identical request and whichever finishes first wins. Backends still
+running at the deadline are cancelled and their results dropped. The
+surviving rankings are fused with reciprocal rank fusion (``"rrf"``) or a
+weighted sum of min-max normalized scores (``"normalized"``). When a backend
+is missing or reports a partial ranking itself, the fused ranking is
+returned as :class:`~.base.PartialResults`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterable, Iterable, Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from contextlib import suppress
+
+from ...core.metrics import RETRIEVER_LATENCY, RETRIEVER_OUTCOMES
+from .base import PartialResults, RetrievedDoc, Retriever, is_partial
+
+logger = logging.getLogger(__name__)
+
+FUSION_METHODS = ("rrf", "normalized")
+
+
+def _backend_name(retriever: Retriever) -> str:
+    return str(getattr(retriever, "name", None) or type(retriever).__name__)
+
+
+async def _collect(
+    results: Iterable[RetrievedDoc] | AsyncIterable[RetrievedDoc],
+) -> list[RetrievedDoc]:
+    if isinstance(results, AsyncIterable):
+        docs = [doc async for doc in results]
+    else:
+        docs = list(results)
+    return PartialResults(docs) if is_partial(results) else docs
+
+
+def reciprocal_rank_fusion(
+    rankings: Mapping[str, Sequence[RetrievedDoc]],
+    *,
+    k: int = 60,
+    weights: Mapping[str, float] | None = None,
+) -> list[RetrievedDoc]:
+    """Fuse per-backend rankings by weighted reciprocal rank."""
+
+    fused: dict[str, float] = {}
+    best: dict[str, RetrievedDoc] = {}
+    for name, docs in rankings.items():
+        weight = (weights or {}).get(name, 1.0)
+        ordered = sorted(docs, key=lambda doc: doc.score, reverse=True)
+        seen: set[str] = set()
+        for rank, doc in enumerate(ordered, start=1):
+            if doc.id in seen:
+                continue
+            seen.add(doc.id)
+            fused[doc.id] = fused.get(doc.id, 0.0) + weight / (k + rank)
+            best.setdefault(doc.id, doc)
+    return _materialize(fused, best)
+
+
+def normalized_score_fusion(
+    rankings: Mapping[str, Sequence[RetrievedDoc]],
+    *,
+    weights: Mapping[str, float] | None = None,
+) -> list[RetrievedDoc]:
+    """Fuse rankings by summing min-max normalized, weighted scores."""
+
+    fused: dict[str, float] = {}
+    best: dict[str, RetrievedDoc] = {}
+    for name, docs in rankings.items():
+        if not docs:
+            continue
+        weight = (weights or {}).get(name, 1.0)
+        scores = [doc.score for doc in docs]
+        low, high = min(scores), max(scores)
+        span = high - low
+        per_backend: dict[str, float] = {}
+        for doc in docs:
+            norm = (doc.score - low) / span if span > 0 else 1.0
+            if norm > per_backend.get(doc.id, -1.0):
+                per_backend[doc.id] = norm
+                best.setdefault(doc.id, doc)
+        for doc_id, norm in per_backend.items():
+            fused[doc_id] = fused.get(doc_id, 0.0) + weight * norm
+    return _materialize(fused, best)
+
+
+def _materialize(
+    fused: Mapping[str, float], best: Mapping[str, RetrievedDoc]
+) -> list[RetrievedDoc]:
+    ordered = sorted(fused.items(), key=lambda item: item[1], reverse=True)
+    return [
+        RetrievedDoc(id=doc_id, text=best[doc_id].text, score=score) for doc_id, score in ordered
+    ]
+
+
+class FanoutRetriever:
+    """Query several retrievers concurrently and fuse their rankings.
+
+    Results are returned in descending fused score, so the retriever
+    advertises ``score_sorted``.
+    """
+
+    score_sorted = True
+
+    def __init__(
+        self,
+        retrievers: Mapping[str, Retriever] | Sequence[Retriever],
+        *,
+        deadline: float = 1.0,
+        hedge_after: float | None = None,
+        fusion: str = "rrf",
+        rrf_k: int = 60,
+        weights: Mapping[str, float] | None = None,
+    ) -> None:
+        if isinstance(retrievers, Mapping):
+            backends = dict(retrievers)
+        else:
+            backends = {}
+            for retriever in retrievers:
+                name = _backend_name(retriever)
+                if name in backends:
+                    name = f"{name}-{len(backends)}"
+                backends[name] = retriever
+        if not backends:
+            raise ValueError("at least one retriever is required")
+        if deadline <= 0:
+            raise ValueError("deadline must be positive")
+        if hedge_after is not None and not 0 < hedge_after < deadline:
+            raise ValueError("hedge_after must be between 0 and deadline")
+        if fusion not in FUSION_METHODS:
+            raise ValueError(f"fusion must be one of: {', '.join(FUSION_METHODS)}")
+        if rrf_k <= 0:
+            raise ValueError("rrf_k must be positive")
+        self.backends = backends
+        self.deadline = float(deadline)
+        self.hedge_after = hedge_after
+        self.fusion = fusion
+        self.rrf_k = rrf_k
+        self.weights = dict(weights or {})
+
+    @property
+    def cache_id(self) -> str:
+        """Identify the fusion method and backends in pipeline cache keys.
+
+        Backends exposing their own ``cache_id`` contribute it, so a backend
+        whose results depend on request context also varies the fused key.
+        """
+
+        parts = []
+        for name in sorted(self.backends):
+            explicit = getattr(self.backends[name], "cache_id", None)
+            parts.append(f"{name}={explicit}" if explicit else name)
+        return f"fanout[{self.fusion}]({','.join(parts)})"
+
+    def _fuse(self, rankings: Mapping[str, Sequence[RetrievedDoc]], k: int) -> list[RetrievedDoc]:
+        if self.fusion == "rrf":
+            fused = reciprocal_rank_fusion(rankings, k=self.rrf_k, weights=self.weights)
+        else:
+            fused = normalized_score_fusion(rankings, weights=self.weights)
+        return fused[:k]
+
+    def _finish(
+        self, rankings: Mapping[str, Sequence[RetrievedDoc]], errors: list[BaseException], k: int
+    ) -> list[RetrievedDoc]:
+        if not rankings:
+            if errors:
+                raise RuntimeError("All retriever backends failed") from errors[0]
+            raise TimeoutError(f"No retriever backend answered within {self.deadline}s")
+        fused = self._fuse(rankings, k)
+        if len(rankings) < len(self.backends) or any(map(is_partial, rankings.values())):
+            return PartialResults(fused)
+        return fused
+
+    async def _attempt(self, retriever: Retriever, query: str, k: int) -> list[RetrievedDoc]:
+        return await _collect(await retriever.asearch(query, k=k))
+
+    async def _query_backend(
+        self, name: str, retriever: Retriever, query: str, k: int
+    ) -> list[RetrievedDoc]:
+        started = time.perf_counter()
+        attempts = {asyncio.ensure_future(self._attempt(retriever, query, k))}
+        try:
+            if self.hedge_after is not None:
+                done, _ = await asyncio.wait(attempts, timeout=self.hedge_after)
+                if not done:
+                    RETRIEVER_OUTCOMES.labels(name, "hedged").inc()
+                    attempts.add(asyncio.ensure_future(self._attempt(retriever, query, k)))
+            while True:
+                done, attempts = await asyncio.wait(attempts, return_when=asyncio.FIRST_COMPLETED)
+                failures = [task.exception() for task in done if task.exception() is not None]
+                winner = next((task for task in done if task.exception() is None), None)
+                if winner is not None:
+                    break
+                if not attempts:
+                    raise failures[0]  # type: ignore[misc]
+            RETRIEVER_LATENCY.labels(name).observe(time.perf_counter() - started)
+            RETRIEVER_OUTCOMES.labels(name, "ok").inc()
+            return winner.result()
+        finally:
+            for task in attempts:
+                task.cancel()
+
+    async def asearch(self, query: str, k: int = 5) -> list[RetrievedDoc]:
+        """Query every backend concurrently and return the fused top ``k``."""
+
+        tasks = {
+            asyncio.ensure_future(self._query_backend(name, retriever, query, k)): name
+            for name, retriever in self.backends.items()
+        }
+        done, pending = await asyncio.wait(tasks, timeout=self.deadline)
+        for task in pending:
+            task.cancel()
+            RETRIEVER_OUTCOMES.labels(tasks[task], "timeout").inc()
+        for task in pending:
+            with suppress(asyncio.CancelledError, Exception):
+                await task
+
+        rankings: dict[str, list[RetrievedDoc]] = {}
+        errors: list[BaseException] = []
+        for task in done:
+            name = tasks[task]
+            exc = task.exception()
+            if exc is None:
+                rankings[name] = task.result()
+                continue
+            RETRIEVER_OUTCOMES.labels(name, "error").inc()
+            logger.warning("Retriever backend %s failed: %s", name, exc)
+            errors.append(exc)
+        return self._finish(rankings, errors, k)
+
+    def search(self, query: str, k: int = 5) -> list[RetrievedDoc]:
+        """Query every backend in worker threads under the same deadline."""
+
+        def call(name: str, retriever: Retriever) -> list[RetrievedDoc]:
+            started = time.perf_counter()
+            results = retriever.search(query, k=k)
+            docs = PartialResults(results) if is_partial(results) else list(results)
+            RETRIEVER_LATENCY.labels(name).observe(time.perf_counter() - started)
+            RETRIEVER_OUTCOMES.labels(name, "ok").inc()
+            return docs
+
+        executor = ThreadPoolExecutor(max_workers=len(self.backends))
+        try:
+            futures = {
+                executor.submit(call, name, retriever): name
+                for name, retriever in self.backends.items()
+            }
+            done, pending = wait_futures(futures, timeout=self.deadline)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        rankings: dict[str, list[RetrievedDoc]] = {}
+        errors: list[BaseException] = []
+        for future in pending:
+            RETRIEVER_OUTCOMES.labels(futures[future], "timeout").inc()
+        for future in done:
+            name = futures[future]
+            exc = future.exception()
+            if exc is None:
+                rankings[name] = future.result()
+                continue
+            RETRIEVER_OUTCOMES.labels(name, "error").inc()
+            logger.warning("Retriever backend %s failed: %s", name, exc)
+            errors.append(exc)
+        return self._finish(rankings, errors, k)
+
+    def close(self) -> None:
+        """Close every backend retriever."""
+
+        for retriever in self.backends.values():
+            close = getattr(retriever, "close", None)
+            if callable(close):
+                close()
+
+    async def aclose(self) -> None:
+        """Asynchronously close every backend retriever."""
+
+        for retriever in self.backends.values():
+            aclose = getattr(retriever, "aclose", None)
+            if callable(aclose):
+                await aclose()
+            else:
+                close = getattr(retriever, "close", None)
+                if callable(close):
+                    close()
+
+
+__all__ = [
+    "FUSION_METHODS",
+    "FanoutRetriever",
+    "normalized_score_fusion",
+    "reciprocal_rank_fusion",
+]
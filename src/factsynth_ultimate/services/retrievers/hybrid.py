@@ -0,0 +1,242 @@
+"""Hybrid retriever fusing a lexical and a dense ranking.
+
+:class:`HybridRetriever` queries a lexical retriever (BM25 or the Jaccard
+fixture retriever) and a dense one (:class:`~.vector.VectorRetriever`)
+concurrently and fuses both rankings with weighted reciprocal rank fusion.
+Fused scores are divided by the best achievable fused score, so a document
+ranked first by every consulted side scores ``1.0``.
+
+Fusion weights come from three layers, later ones overriding earlier ones:
+the retriever defaults, the entry for the current tenant in
+``tenant_weights`` and the weights of the current request. Tenant and
+request weights are taken from :func:`fusion_context`, which callers enter
+around a pipeline run.
+
+With ``lexical_confidence`` set, the lexical side runs first. When even its
+``k``-th result scores at least that threshold, the lexical ranking is
+returned without consulting the dense side, which keeps tail latency down
+for queries that exact terms already answer well.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterator, Mapping, Sequence
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from ...core.metrics import RETRIEVER_OUTCOMES
+from .base import RetrievedDoc, Retriever
+from .fanout import _collect, reciprocal_rank_fusion
+from .offload import is_blocking
+
+SIDES = ("lexical", "dense")
+
+
+@dataclass(frozen=True)
+class _FusionContext:
+    tenant: str | None = None
+    weights: Mapping[str, float] | None = None
+
+
+_fusion_ctx: ContextVar[_FusionContext] = ContextVar("hybrid_fusion", default=_FusionContext())
+
+
+def _check_weights(weights: Mapping[str, float]) -> dict[str, float]:
+    unknown = set(weights) - set(SIDES)
+    if unknown:
+        raise ValueError(f"unknown fusion sides: {', '.join(sorted(unknown))}")
+    if any(weight < 0 for weight in weights.values()):
+        raise ValueError("fusion weights must not be negative")
+    return {side: float(weight) for side, weight in weights.items()}
+
+
+@contextmanager
+def fusion_context(
+    *, tenant: str | None = None, weights: Mapping[str, float] | None = None
+) -> Iterator[None]:
+    """Select the tenant and per-request fusion ``weights`` for hybrid searches."""
+
+    checked = _check_weights(weights) if weights else None
+    token = _fusion_ctx.set(_FusionContext(tenant=tenant, weights=checked))
+    try:
+        yield
+    finally:
+        _fusion_ctx.reset(token)
+
+
+def _side_id(retriever: Retriever) -> str:
+    explicit = getattr(retriever, "cache_id", None)
+    return str(explicit) if explicit else type(retriever).__name__
+
+
+class HybridRetriever:
+    """Fuse lexical and dense rankings by weighted reciprocal rank.
+
+    Each side is asked for ``depth * k`` candidates. Blocking sides run in
+    the default executor so both sides proceed concurrently in
+    :meth:`asearch`; :meth:`search` queries them one after the other.
+    """
+
+    score_sorted = True
+    blocking = False
+
+    def __init__(
+        self,
+        lexical: Retriever,
+        dense: Retriever,
+        *,
+        weights: Mapping[str, float] | None = None,
+        tenant_weights: Mapping[str, Mapping[str, float]] | None = None,
+        rrf_k: int = 60,
+        depth: int = 3,
+        lexical_confidence: float | None = None,
+    ) -> None:
+        if rrf_k <= 0:
+            raise ValueError("rrf_k must be positive")
+        if depth < 1:
+            raise ValueError("depth must be at least 1")
+        self.sides: dict[str, Retriever] = {"lexical": lexical, "dense": dense}
+        self.weights = {side: 1.0 for side in SIDES}
+        self.weights.update(_check_weights(weights or {}))
+        self.tenant_weights = {
+            tenant: _check_weights(overrides)
+            for tenant, overrides in (tenant_weights or {}).items()
+        }
+        self.rrf_k = rrf_k
+        self.depth = depth
+        self.lexical_confidence = lexical_confidence
+
+    def resolve_weights(self) -> dict[str, float]:
+        """Return the fusion weights in effect for the current context."""
+
+        ctx = _fusion_ctx.get()
+        weights = dict(self.weights)
+        if ctx.tenant is not None:
+            weights.update(self.tenant_weights.get(ctx.tenant, {}))
+        if ctx.weights:
+            weights.update(ctx.weights)
+        return weights
+
+    @property
+    def cache_id(self) -> str:
+        """Identify both sides and the weights in effect in pipeline cache keys."""
+
+        weights = ",".join(f"{side}={weight:g}" for side, weight in self.resolve_weights().items())
+        sides = ",".join(_side_id(retriever) for retriever in self.sides.values())
+        return f"hybrid({sides})[{weights}]"
+
+    def _confident(self, lexical: Sequence[RetrievedDoc], k: int) -> bool:
+        if self.lexical_confidence is None or len(lexical) < k:
+            return False
+        scores = sorted((doc.score for doc in lexical), reverse=True)
+        return scores[k - 1] >= self.lexical_confidence
+
+    def _prefiltered(self, weights: Mapping[str, float]) -> bool:
+        return self.lexical_confidence is not None and weights["lexical"] > 0
+
+    def _fuse(
+        self,
+        rankings: Mapping[str, Sequence[RetrievedDoc]],
+        weights: Mapping[str, float],
+        k: int,
+    ) -> list[RetrievedDoc]:
+        if "dense" not in rankings and weights["dense"] > 0:
+            RETRIEVER_OUTCOMES.labels("dense", "skipped").inc()
+        fused = reciprocal_rank_fusion(rankings, k=self.rrf_k, weights=weights)
+        best = sum(weights[side] for side in rankings) / (self.rrf_k + 1)
+        if best <= 0:
+            return []
+        return [
+            RetrievedDoc(id=doc.id, text=doc.text, score=doc.score / best) for doc in fused[:k]
+        ]
+
+    async def _asearch_side(self, side: str, query: str, k: int) -> list[RetrievedDoc]:
+        retriever = self.sides[side]
+        if is_blocking(retriever):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, lambda: list(retriever.search(query, k=k)))
+        return await _collect(await retriever.asearch(query, k=k))
+
+    async def asearch(self, query: str, k: int = 5) -> list[RetrievedDoc]:
+        """Return the fused top ``k`` documents for ``query``."""
+
+        if k <= 0:
+            return []
+        weights = self.resolve_weights()
+        depth = self.depth * k
+        rankings: dict[str, list[RetrievedDoc]] = {}
+        if self._prefiltered(weights):
+            rankings["lexical"] = await self._asearch_side("lexical", query, depth)
+            if weights["dense"] > 0 and not self._confident(rankings["lexical"], k):
+                rankings["dense"] = await self._asearch_side("dense", query, depth)
+        else:
+            active = [side for side in SIDES if weights[side] > 0]
+            results = await asyncio.gather(
+                *(self._asearch_side(side, query, depth) for side in active)
+            )
+            rankings.update(zip(active, results))
+        return self._fuse(rankings, weights, k)
+
+    def search(self, query: str, k: int = 5) -> list[RetrievedDoc]:
+        """Synchronous variant of :meth:`asearch` querying the sides in turn."""
+
+        if k <= 0:
+            return []
+        weights = self.resolve_weights()
+        depth = self.depth * k
+        rankings: dict[str, list[RetrievedDoc]] = {}
+        for side in SIDES:
+            if weights[side] <= 0:
+                continue
+            if side == "dense" and self._prefiltered(weights):
+                if self._confident(rankings["lexical"], k):
+                    continue
+            rankings[side] = list(self.sides[side].search(query, k=depth))
+        return self._fuse(rankings, weights, k)
+
+    def close(self) -> None:
+        """Close both sides."""
+
+        for retriever in self.sides.values():
+            close = getattr(retriever, "close", None)
+            if callable(close):
+                close()
+
+    async def aclose(self) -> None:
+        """Asynchronously close both sides."""
+
+        for retriever in self.sides.values():
+            aclose = getattr(retriever, "aclose", None)
+            if callable(aclose):
+                await aclose()
+            else:
+                close = getattr(retriever, "close", None)
+                if callable(close):
+                    close()
+
+
+def create_hybrid_retriever() -> Retriever:
+    """Return a hybrid retriever instance for entry-point loading.
+
+    Both sides are loaded from the retriever entry points named by
+    ``HYBRID_LEXICAL`` and ``HYBRID_DENSE``.
+    """
+
+    from ...core.settings import load_settings
+    from .registry import get_registry
+
+    settings = load_settings()
+    # Fresh instances: the hybrid retriever closes its sides with itself.
+    registry = get_registry()
+    return HybridRetriever(
+        registry.load(settings.hybrid_lexical),
+        registry.load(settings.hybrid_dense),
+        weights=settings.hybrid_weights,
+        tenant_weights=settings.hybrid_tenant_weights,
+        lexical_confidence=settings.hybrid_lexical_confidence,
+    )
+
+
+__all__ = ["SIDES", "HybridRetriever", "create_hybrid_retriever", "fusion_context"]
@@ -0,0 +1,268 @@
+"""Versioned on-disk BM25 index opened with memory maps.
+
+An index directory holds flat little-endian arrays next to a ``meta.json``
+header that is written last and names the format version::
+
+    meta.json            format, version, document/term counts, average length
+    terms.bin/.off       vocabulary, UTF-8 terms sorted bytewise, with offsets
+    postings.off         per-term start offsets into the postings (int64)
+    postings.doc/.tf     document ids (int32) and term frequencies (float32)
+    lengths.f32          token count of every document
+    ids.bin/.off         document ids, UTF-8 with offsets
+    texts.bin/.off       document texts, UTF-8 with offsets
+    signatures.u32       MinHash signature of every document (uint32 rows)
+
+:class:`MmapBM25Retriever` maps these files instead of reading them, so
+opening an index costs the same for any corpus size and worker processes
+serving the same index share one copy in the page cache. Terms are found by
+binary search over the sorted vocabulary; IDF and length normalization are
+computed for the touched postings only. Returned documents carry their
+precomputed MinHash signature for near-duplicate suppression; indexes written
+without signatures, or with other MinHash parameters, are served without.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+from collections.abc import Iterable, Iterator, Sequence
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from ..minhash import DEFAULT_MINHASH
+from .bm25 import BM25Retriever, BM25Scorer, bm25_idf
+from .local import Fixture
+
+INDEX_FORMAT = "factsynth-bm25"
+INDEX_VERSION = 1
+
+_OFFSET = np.dtype("<u8")
+
+
+class IndexFormatError(ValueError):
+    """Raised when an index directory is missing, incomplete or unsupported."""
+
+
+def _write_array(path: Path, values: np.ndarray, dtype: str) -> None:
+    np.ascontiguousarray(values, dtype=np.dtype(dtype)).tofile(path)
+
+
+def _write_strings(directory: Path, name: str, values: Sequence[str]) -> None:
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=_OFFSET)
+    np.cumsum([len(item) for item in encoded], out=offsets[1:])
+    (directory / f"{name}.bin").write_bytes(b"".join(encoded))
+    _write_array(directory / f"{name}.off", offsets, "<u8")
+
+
+def write_index(retriever: BM25Retriever, directory: Path | str) -> Path:
+    """Write the postings and documents of ``retriever`` to ``directory``."""
+
+    out = Path(directory)
+    out.mkdir(parents=True, exist_ok=True)
+    meta_path = out / "meta.json"
+    meta_path.unlink(missing_ok=True)
+
+    terms = sorted(retriever.vocabulary, key=lambda term: term.encode("utf-8"))
+    old_ids = np.fromiter(
+        (retriever.vocabulary[term] for term in terms), dtype=np.int64, count=len(terms)
+    )
+    starts = retriever.offsets[old_ids]
+    sizes = retriever.offsets[old_ids + 1] - starts
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    np.cumsum(sizes, out=offsets[1:])
+    # Gather each term's postings span in sorted-vocabulary order.
+    gather = np.repeat(starts - offsets[:-1], sizes) + np.arange(offsets[-1])
+
+    _write_strings(out, "terms", terms)
+    _write_array(out / "postings.off", offsets, "<i8")
+    _write_array(out / "postings.doc", retriever.doc_ids[gather], "<i4")
+    _write_array(out / "postings.tf", retriever.term_freqs[gather], "<f4")
+    _write_array(out / "lengths.f32", retriever.doc_lengths, "<f4")
+    _write_strings(out, "ids", retriever.ids)
+    _write_strings(out, "texts", retriever.texts)
+    _write_array(out / "signatures.u32", DEFAULT_MINHASH.signatures(retriever.texts), "<u4")
+
+    lengths = retriever.doc_lengths
+    meta = {
+        "format": INDEX_FORMAT,
+        "version": INDEX_VERSION,
+        "documents": len(retriever),
+        "terms": len(terms),
+        "postings": int(offsets[-1]),
+        "avg_length": float(lengths.mean()) if lengths.size else 0.0,
+        "minhash": DEFAULT_MINHASH.params,
+    }
+    meta_path.write_text(json.dumps(meta, indent=2, sort_keys=True) + "\n")
+    return out
+
+
+def read_corpus(path: Path | str) -> Iterator[Fixture]:
+    """Yield fixtures from a JSON Lines file of ``{"id", "text"}`` objects.
+
+    Records without an ``id`` are numbered by their position in the file.
+    """
+
+    with Path(path).open(encoding="utf-8") as fh:
+        position = 0
+        for line_no, line in enumerate(fh, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                text = record["text"]
+            except (ValueError, KeyError, TypeError) as exc:
+                raise ValueError(f"{path}:{line_no}: expected an object with 'text'") from exc
+            if not isinstance(text, str):
+                raise ValueError(f"{path}:{line_no}: 'text' must be a string")
+            yield Fixture(id=str(record.get("id", position)), text=text)
+            position += 1
+
+
+def build_index(
+    fixtures: Iterable[Fixture] | Path | str, directory: Path | str
+) -> dict[str, Any]:
+    """Index ``fixtures`` (or a JSON Lines corpus path) into ``directory``.
+
+    Returns the metadata written to ``meta.json``.
+    """
+
+    source = read_corpus(fixtures) if isinstance(fixtures, (str, Path)) else fixtures
+    out = write_index(BM25Retriever(source), directory)
+    return json.loads((out / "meta.json").read_text())
+
+
+def _map_array(path: Path, dtype: str) -> np.ndarray:
+    if path.stat().st_size == 0:
+        return np.empty(0, dtype=np.dtype(dtype))
+    return np.memmap(path, dtype=np.dtype(dtype), mode="r")
+
+
+class _StringTable:
+    """Memory-mapped sequence of UTF-8 strings addressed by offsets."""
+
+    def __init__(self, directory: Path, name: str) -> None:
+        self.offsets = _map_array(directory / f"{name}.off", "<u8")
+        with (directory / f"{name}.bin").open("rb") as fh:
+            size = os.fstat(fh.fileno()).st_size
+            self._data = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def raw(self, index: int) -> bytes:
+        start, stop = self.offsets[index : index + 2].tolist()
+        return self._data[start:stop] if self._data is not None else b""
+
+    def __getitem__(self, index: int) -> str:
+        return self.raw(index).decode("utf-8")
+
+    def find(self, key: bytes) -> int | None:
+        """Return the position of ``key`` in a bytewise sorted table."""
+
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.raw(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < len(self) and self.raw(lo) == key else None
+
+    def close(self) -> None:
+        if self._data is not None:
+            self._data.close()
+            self._data = None
+
+
+def read_meta(directory: Path | str) -> dict[str, Any]:
+    """Return the validated ``meta.json`` header of an index directory."""
+
+    path = Path(directory) / "meta.json"
+    try:
+        meta = json.loads(path.read_text())
+    except FileNotFoundError as exc:
+        raise IndexFormatError(f"{directory} is not a complete index") from exc
+    except ValueError as exc:
+        raise IndexFormatError(f"{path} is not valid JSON") from exc
+    if meta.get("format") != INDEX_FORMAT:
+        raise IndexFormatError(f"{directory} is not a {INDEX_FORMAT} index")
+    if meta.get("version") != INDEX_VERSION:
+        raise IndexFormatError(
+            f"unsupported index version {meta.get('version')}; expected {INDEX_VERSION}"
+        )
+    return meta
+
+
+class MmapBM25Retriever(BM25Scorer):
+    """BM25 retriever serving an index written by :func:`build_index`."""
+
+    def __init__(
+        self,
+        directory: Path | str,
+        *,
+        k1: float = 1.2,
+        b: float = 0.75,
+        delta: float = 0.0,
+    ) -> None:
+        super().__init__(k1=k1, b=b, delta=delta)
+        self.directory = Path(directory)
+        meta = read_meta(self.directory)
+        self.n_docs = int(meta["documents"])
+        self.avg_length = float(meta["avg_length"])
+        self.cache_id = f"bm25-index:{self.directory.resolve()}"
+        self.terms = _StringTable(self.directory, "terms")
+        self.offsets = _map_array(self.directory / "postings.off", "<i8")
+        self.doc_ids = _map_array(self.directory / "postings.doc", "<i4")
+        self.term_freqs = _map_array(self.directory / "postings.tf", "<f4")
+        self.doc_lengths = _map_array(self.directory / "lengths.f32", "<f4")
+        self.ids = _StringTable(self.directory, "ids")
+        self.texts = _StringTable(self.directory, "texts")
+        self.signatures: np.ndarray | None = None
+        if meta.get("minhash") == DEFAULT_MINHASH.params:
+            signatures = _map_array(self.directory / "signatures.u32", "<u4")
+            self.signatures = signatures.reshape(self.n_docs, DEFAULT_MINHASH.num_perm)
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    def _term_id(self, term: str) -> int | None:
+        return self.terms.find(term.encode("utf-8"))
+
+    def _idf(self, term_ids: list[int]) -> np.ndarray:
+        df = np.array(
+            [self.offsets[t + 1] - self.offsets[t] for t in term_ids], dtype=np.float64
+        )
+        return bm25_idf(df, self.n_docs)
+
+    def _length_norm(self, docs: np.ndarray) -> np.ndarray:
+        return self._normalize(docs, self.avg_length)
+
+    def _document(self, doc: int) -> tuple[str, str]:
+        return self.ids[doc], self.texts[doc]
+
+    def _signature(self, doc: int) -> tuple[int, ...] | None:
+        if self.signatures is None:
+            return None
+        return tuple(self.signatures[doc].tolist())
+
+    def close(self) -> None:
+        """Release the memory maps held by this retriever."""
+
+        for table in (self.terms, self.ids, self.texts):
+            table.close()
+
+
+__all__ = [
+    "INDEX_FORMAT",
+    "INDEX_VERSION",
+    "IndexFormatError",
+    "MmapBM25Retriever",
+    "build_index",
+    "read_corpus",
+    "read_meta",
+    "write_index",
+]
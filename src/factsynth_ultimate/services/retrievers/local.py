@@ -2,12 +2,13 @@
 
 from __future__ import annotations
 
-import re
+import heapq
 from collections.abc import Iterable
 from dataclasses import dataclass
 from typing import ClassVar
 
 from ...tokenization import tokenize
+from ..lexicon import DEFAULT_LEXICON, Lexicon
 from .base import RetrievedDoc, Retriever
 
 
@@ -24,26 +25,36 @@ class LocalFixtureRetriever:
 
     The search implementation tokenizes both the query and fixture text and
     scores candidates by Jaccard overlap of token sets. To improve matching for
-    Ukrainian queries against English fixtures we first substitute common
-    Ukrainian keywords with their English equivalents before tokenization.
+    Ukrainian queries against English fixtures, query tokens are translated
+    with ``lexicon`` (by default :data:`~..lexicon.DEFAULT_LEXICON`) first.
+
+    An inverted index from token to fixture positions is built once at
+    construction, so a query only touches fixtures sharing at least one token
+    with it. Jaccard scores are derived from the overlap count and the
+    precomputed token-set sizes. Fixtures added to :attr:`fixtures` after
+    construction are not indexed.
     """
 
-    _UA_TO_EN: ClassVar[dict[str, str]] = {
-        "мікросервіси": "microservices",
-        "мікросервіс": "microservice",
-        "хмара": "cloud",
-    }
+    #: Results are returned in descending score order.
+    score_sorted: ClassVar[bool] = True
+    #: ``asearch`` runs the CPU-bound scan inline, so offload it to an executor.
+    blocking: ClassVar[bool] = True
 
-    def __init__(self, fixtures: Iterable[Fixture]):
+    def __init__(self, fixtures: Iterable[Fixture], *, lexicon: Lexicon | None = None):
         self.fixtures = list(fixtures)
+        self.lexicon = lexicon or DEFAULT_LEXICON
+        self._postings: dict[str, list[int]] = {}
+        self._sizes: list[int] = []
+        for index, fix in enumerate(self.fixtures):
+            tokens = {t.lower() for t in tokenize(fix.text)}
+            self._sizes.append(len(tokens))
+            for token in tokens:
+                self._postings.setdefault(token, []).append(index)
 
     def _translate_query(self, query: str) -> str:
-        """Translate common Ukrainian keywords to English."""
+        """Translate known Ukrainian terms to English."""
 
-        q = query.lower()
-        for ua, en in self._UA_TO_EN.items():
-            q = re.sub(rf"\b{ua}\b", en, q)
-        return q
+        return self.lexicon.translate(query)
 
     def close(self) -> None:
         """Close hook to satisfy the :class:`Retriever` protocol."""
@@ -58,18 +69,36 @@ class LocalFixtureRetriever:
     def search(self, query: str, k: int = 5) -> list[RetrievedDoc]:
         """Return top ``k`` fixtures ranked by similarity to ``query``."""
 
-        translated = self._translate_query(query)
-        q_tokens = {t.lower() for t in tokenize(translated)}
-        results: list[RetrievedDoc] = []
-        for fix in self.fixtures:
-            f_tokens = {t.lower() for t in tokenize(fix.text)}
-            if q_tokens or f_tokens:
-                score = len(q_tokens & f_tokens) / len(q_tokens | f_tokens)
-            else:
-                score = 0.0
-            results.append(RetrievedDoc(id=fix.id, text=fix.text, score=score))
-        results.sort(key=lambda d: d.score, reverse=True)
-        return results[:k]
+        if k <= 0:
+            return []
+        q_tokens = set(self.lexicon.translate_tokens(tokenize(query)))
+        overlaps: dict[int, int] = {}
+        for token in q_tokens:
+            for index in self._postings.get(token, ()):
+                overlaps[index] = overlaps.get(index, 0) + 1
+
+        sizes = self._sizes
+        q_size = len(q_tokens)
+        # Ties keep fixture order, matching a stable descending sort.
+        top = heapq.nlargest(
+            k,
+            (
+                (shared / (q_size + sizes[index] - shared), -index)
+                for index, shared in overlaps.items()
+            ),
+        )
+        fixtures = self.fixtures
+        results = [
+            RetrievedDoc(id=fixtures[-neg].id, text=fixtures[-neg].text, score=score)
+            for score, neg in top
+        ]
+        # Fixtures without shared tokens score zero and fill up in order.
+        for index, fix in enumerate(fixtures):
+            if len(results) >= k:
+                break
+            if index not in overlaps:
+                results.append(RetrievedDoc(id=fix.id, text=fix.text, score=0.0))
+        return results
 
     async def asearch(self, query: str, k: int = 5) -> list[RetrievedDoc]:
         """Async wrapper around :meth:`search` for compatibility."""
@@ -78,7 +107,15 @@ class LocalFixtureRetriever:
 
 
 def create_fixture_retriever() -> Retriever:
-    """Return a default retriever instance for entry-point loading."""
+    """Return a default retriever instance for entry-point loading.
 
+    Query terms are translated with the lexicon at ``RETRIEVER_LEXICON_PATH``
+    when configured.
+    """
+
+    from ...core.settings import load_settings
+
+    lexicon_path = load_settings().retriever_lexicon_path
+    lexicon = Lexicon.load(lexicon_path) if lexicon_path else None
     fixtures = [Fixture(id="default", text="alpha is the first letter")]
-    return LocalFixtureRetriever(fixtures)
+    return LocalFixtureRetriever(fixtures, lexicon=lexicon)
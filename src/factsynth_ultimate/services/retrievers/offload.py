@@ -0,0 +1,215 @@
+"""Run blocking retrievers off the event loop.
+
+Many retrievers do synchronous CPU or I/O work, either exposing only
+``search`` or wrapping it in an ``async def asearch`` that never awaits.
+:class:`OffloadedRetriever` runs ``search`` in a dedicated, bounded thread or
+process pool instead. At most ``max_pending`` calls may be queued or running;
+further callers wait for a slot, or fail with :class:`RetrieverBusyError`
+after ``queue_timeout`` seconds. The time every call spends waiting before a
+worker picks it up is recorded in ``factsynth_retriever_executor_queue_seconds``.
+
+An owned process pool installs the wrapped retriever in each worker once, when
+the worker starts, so calls only send the query and ``k``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import multiprocessing
+import time
+import uuid
+from collections.abc import Iterable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any
+
+from ...core.metrics import RETRIEVER_QUEUE_TIME, RETRIEVER_REJECTED
+from .base import RetrievedDoc, Retriever
+
+EXECUTOR_KINDS = ("thread", "process")
+
+
+class RetrieverBusyError(RuntimeError):
+    """Raised when a blocking retriever's executor queue stays full too long."""
+
+
+def is_blocking(retriever: Retriever) -> bool:
+    """Return ``True`` when ``retriever`` should be run in an executor.
+
+    Retrievers declare this with a ``blocking`` attribute. Without one, a
+    retriever that lacks a coroutine ``asearch`` is treated as blocking.
+    """
+
+    declared = getattr(retriever, "blocking", None)
+    if declared is not None:
+        return bool(declared)
+    return not inspect.iscoroutinefunction(getattr(retriever, "asearch", None))
+
+
+def _timed_search(
+    retriever: Retriever, query: str, k: int
+) -> tuple[float, list[RetrievedDoc]]:
+    started = time.time()
+    return started, list(retriever.search(query, k=k))
+
+
+# Retrievers installed in this worker process, keyed by the owning adapter.
+_INSTALLED: dict[str, Retriever] = {}
+
+
+def _install(token: str, retriever: Retriever) -> None:
+    _INSTALLED[token] = retriever
+
+
+def _installed_search(token: str, query: str, k: int) -> tuple[float, list[RetrievedDoc]]:
+    return _timed_search(_INSTALLED[token], query, k)
+
+
+class OffloadedRetriever:
+    """Adapter running a blocking retriever's ``search`` in an executor."""
+
+    blocking = False
+
+    def __init__(
+        self,
+        retriever: Retriever,
+        *,
+        kind: str = "thread",
+        max_workers: int = 4,
+        max_pending: int = 64,
+        queue_timeout: float | None = None,
+        executor: Executor | None = None,
+        name: str | None = None,
+    ) -> None:
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"kind must be one of: {', '.join(EXECUTOR_KINDS)}")
+        if max_workers < 1 or max_pending < 1:
+            raise ValueError("max_workers and max_pending must be at least 1")
+        if queue_timeout is not None and queue_timeout <= 0:
+            raise ValueError("queue_timeout must be positive")
+        self.retriever = retriever
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self.name = name or type(retriever).__name__
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._token = uuid.uuid4().hex
+        self._installed = False
+        self._slots: asyncio.Semaphore | None = None
+        self._slots_loop: asyncio.AbstractEventLoop | None = None
+
+    def __getattr__(self, attr: str) -> Any:
+        # Forward optional capabilities such as ``score_sorted``.
+        if attr == "retriever":
+            raise AttributeError(attr)
+        return getattr(self.retriever, attr)
+
+    @property
+    def cache_id(self) -> str:
+        """Identify the wrapped retriever in pipeline cache keys."""
+
+        explicit = getattr(self.retriever, "cache_id", None)
+        if explicit:
+            return str(explicit)
+        kind = type(self.retriever)
+        return f"{kind.__module__}.{kind.__qualname__}"
+
+    @property
+    def executor(self) -> Executor:
+        """Return the executor, creating the owned pool on first use."""
+
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_install,
+                    initargs=(self._token, self.retriever),
+                )
+                self._installed = True
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix=f"factsynth-retriever-{self.name}",
+                )
+        return self._executor
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_pending)
+            self._slots_loop = loop
+        return self._slots
+
+    def search(self, query: str, k: int = 5) -> Iterable[RetrievedDoc]:
+        """Call the wrapped retriever directly on the current thread."""
+
+        return self.retriever.search(query, k=k)
+
+    async def asearch(self, query: str, k: int = 5) -> list[RetrievedDoc]:
+        """Run the wrapped ``search`` in the executor without blocking the loop."""
+
+        submitted = time.time()
+        slots = self._semaphore()
+        try:
+            await asyncio.wait_for(slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError as exc:
+            RETRIEVER_REJECTED.labels(self.name).inc()
+            raise RetrieverBusyError(f"Retriever {self.name} executor queue is full") from exc
+        try:
+            loop = asyncio.get_running_loop()
+            executor = self.executor
+            if self._installed:
+                call = loop.run_in_executor(executor, _installed_search, self._token, query, k)
+            else:
+                call = loop.run_in_executor(executor, _timed_search, self.retriever, query, k)
+            started, docs = await call
+        finally:
+            slots.release()
+        RETRIEVER_QUEUE_TIME.labels(self.name).observe(max(0.0, started - submitted))
+        return docs
+
+    def close(self) -> None:
+        """Shut down the owned executor and close the wrapped retriever."""
+
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._installed = False
+        close = getattr(self.retriever, "close", None)
+        if callable(close):
+            close()
+
+    async def aclose(self) -> None:
+        """Asynchronous counterpart of :meth:`close`."""
+
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._installed = False
+        aclose = getattr(self.retriever, "aclose", None)
+        if callable(aclose):
+            await aclose()
+        else:
+            close = getattr(self.retriever, "close", None)
+            if callable(close):
+                close()
+
+
+def offload_blocking(retriever: Retriever, **options: Any) -> Retriever:
+    """Wrap ``retriever`` in :class:`OffloadedRetriever` when it is blocking."""
+
+    if isinstance(retriever, OffloadedRetriever) or not is_blocking(retriever):
+        return retriever
+    return OffloadedRetriever(retriever, **options)
+
+
+__all__ = [
+    "EXECUTOR_KINDS",
+    "OffloadedRetriever",
+    "RetrieverBusyError",
+    "is_blocking",
+    "offload_blocking",
+]
@@ -0,0 +1,220 @@
+"""Process-wide registry of shared retrievers loaded from entry points.
+
+Retrievers registered in the ``factsynth_ultimate.retrievers`` entry-point
+group can be expensive to construct, for example when they open an on-disk
+index. :class:`RetrieverRegistry` resolves the entry points once and hands
+out one shared instance per name. Every :meth:`~RetrieverRegistry.acquire`
+takes a reference that a matching :meth:`~RetrieverRegistry.release` drops;
+the instance is closed when the last reference goes away. The application
+lifespan holds a reference to each retriever listed in ``RETRIEVER_PRELOAD``
+so they are loaded at startup and stay warm until shutdown; the shared fact
+pipeline holds one to each ``PIPELINE_RETRIEVERS`` entry until then too.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
+from importlib import metadata
+from importlib.metadata import EntryPoint
+from typing import cast
+
+from .base import Retriever
+
+RETRIEVER_GROUP = "factsynth_ultimate.retrievers"
+
+
+def _scan_entry_points(group: str) -> list[EntryPoint]:
+    try:
+        return list(cast(Iterable[EntryPoint], metadata.entry_points(group=group)))
+    except TypeError:
+        eps = metadata.entry_points()
+        select = getattr(eps, "select", None)
+        if callable(select):
+            return list(cast(Iterable[EntryPoint], select(group=group)))
+        get_group = getattr(eps, "get", None)
+        if callable(get_group):
+            return list(cast(Iterable[EntryPoint], get_group(group, ())))
+        return []
+
+
+def _instantiate(name: str, entry_point: EntryPoint) -> Retriever:
+    loaded = entry_point.load()
+    if isinstance(loaded, Retriever):
+        return loaded
+    if callable(loaded):
+        candidate = loaded()
+        if isinstance(candidate, Retriever):
+            return candidate
+    raise TypeError(f"Entry point '{name}' must provide a Retriever instance or factory")
+
+
+# Pending ``aclose`` tasks, referenced until done so they are not collected.
+_CLOSING: set[asyncio.Task[None]] = set()
+
+
+def close_retriever(retriever: Retriever) -> None:
+    """Close ``retriever``, scheduling ``aclose`` when only that is available.
+
+    Inside a running event loop the ``aclose`` task is only scheduled; async
+    callers that need it finished should use :func:`aclose_retriever`.
+    """
+
+    close = getattr(retriever, "close", None)
+    aclose = getattr(retriever, "aclose", None)
+    if callable(close):
+        close()
+    elif callable(aclose):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(aclose())
+        else:
+            task = loop.create_task(aclose())
+            _CLOSING.add(task)
+            task.add_done_callback(_CLOSING.discard)
+
+
+async def aclose_retriever(retriever: Retriever) -> None:
+    """Asynchronously close ``retriever``, preferring ``aclose``."""
+
+    aclose = getattr(retriever, "aclose", None)
+    if callable(aclose):
+        await aclose()
+        return
+    close = getattr(retriever, "close", None)
+    if callable(close):
+        close()
+
+
+@dataclass
+class _Lease:
+    retriever: Retriever
+    refs: int = 0
+
+
+class RetrieverRegistry:
+    """Shared, reference-counted retriever instances keyed by entry-point name."""
+
+    def __init__(self, group: str = RETRIEVER_GROUP) -> None:
+        self.group = group
+        self._lock = threading.Lock()
+        self._entry_points: dict[str, EntryPoint] | None = None
+        self._leases: dict[str, _Lease] = {}
+        self._loading: dict[str, threading.Lock] = {}
+
+    def entry_point(self, name: str) -> EntryPoint:
+        """Return the entry point registered as ``name``.
+
+        Entry points are scanned on first use; an unknown name triggers one
+        rescan in case distributions were installed since.
+        """
+
+        for rescan in (False, True):
+            with self._lock:
+                if self._entry_points is None or rescan:
+                    self._entry_points = {
+                        ep.name: ep for ep in _scan_entry_points(self.group)
+                    }
+                found = self._entry_points.get(name)
+            if found is not None:
+                return found
+        raise LookupError(f"Retriever '{name}' not found")
+
+    def load(self, name: str) -> Retriever:
+        """Construct a new, unshared retriever from the ``name`` entry point."""
+
+        return _instantiate(name, self.entry_point(name))
+
+    def acquire(self, name: str) -> Retriever:
+        """Return the shared ``name`` retriever, loading it on first use.
+
+        Each call takes a reference that must be given back with
+        :meth:`release` or :meth:`arelease`.
+        """
+
+        with self._lock:
+            lease = self._leases.get(name)
+            if lease is not None:
+                lease.refs += 1
+                return lease.retriever
+            loading = self._loading.setdefault(name, threading.Lock())
+        # Loading may be slow; hold only this name's lock meanwhile.
+        with loading:
+            with self._lock:
+                lease = self._leases.get(name)
+                if lease is not None:
+                    lease.refs += 1
+                    return lease.retriever
+            retriever = self.load(name)
+            with self._lock:
+                self._leases[name] = _Lease(retriever, refs=1)
+            return retriever
+
+    def _drop(self, name: str) -> Retriever | None:
+        with self._lock:
+            lease = self._leases.get(name)
+            if lease is None:
+                raise KeyError(f"Retriever '{name}' is not acquired")
+            lease.refs -= 1
+            if lease.refs > 0:
+                return None
+            del self._leases[name]
+            return lease.retriever
+
+    def release(self, name: str) -> None:
+        """Drop a reference to ``name``, closing it when none remain."""
+
+        retriever = self._drop(name)
+        if retriever is not None:
+            close_retriever(retriever)
+
+    async def arelease(self, name: str) -> None:
+        """Asynchronous :meth:`release` awaiting ``aclose`` when available."""
+
+        retriever = self._drop(name)
+        if retriever is not None:
+            await aclose_retriever(retriever)
+
+    @contextmanager
+    def lease(self, name: str) -> Iterator[Retriever]:
+        """Hold a reference to the shared ``name`` retriever for a block."""
+
+        retriever = self.acquire(name)
+        try:
+            yield retriever
+        finally:
+            self.release(name)
+
+    def refcount(self, name: str) -> int:
+        """Return the number of outstanding references to ``name``."""
+
+        with self._lock:
+            lease = self._leases.get(name)
+            return lease.refs if lease else 0
+
+    def loaded(self) -> list[str]:
+        """Return the names of the currently loaded retrievers."""
+
+        with self._lock:
+            return sorted(self._leases)
+
+
+@lru_cache(maxsize=1)
+def get_registry() -> RetrieverRegistry:
+    """Return the process-wide :class:`RetrieverRegistry`."""
+
+    return RetrieverRegistry()
+
+
+__all__ = [
+    "RETRIEVER_GROUP",
+    "RetrieverRegistry",
+    "aclose_retriever",
+    "close_retriever",
+    "get_registry",
+]
@@ -0,0 +1,356 @@
+"""Incrementally updated BM25 index built from immutable segments.
+
+:class:`SegmentedBM25Retriever` follows the log-structured merge layout used
+by Lucene-style engines. New and updated documents go to a small in-memory
+delta segment that queries see immediately; once it reaches
+``flush_threshold`` documents it is frozen into an immutable segment. When
+more than ``max_segments`` segments exist, the run of ``merge_factor``
+adjacent segments with the fewest documents is rewritten into one on a
+background thread and swapped in atomically. Merging only adjacent segments
+keeps the document order, so ties rank as they would without the merge.
+
+Every segment carries the generation of the delta it was flushed from.
+Updating or removing a document that an older segment holds records a
+tombstone with the current generation, which hides those copies without
+rewriting them; ids seen for the first time leave no tombstone. Merges drop
+dead documents together with the tombstones that no longer mask any
+remaining segment.
+
+Queries score all segments with collection-wide statistics: document
+frequencies and the average length are summed over segments, so ranking
+matches a single index over the same documents. As in Lucene, documents
+hidden by tombstones still count towards those statistics until a merge
+removes them.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import ClassVar
+
+import numpy as np
+
+from .base import RetrievedDoc
+from .bm25 import BM25Retriever, BM25Scorer, _terms, bm25_idf, check_bm25_params, top_k
+from .local import Fixture
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class _Segment:
+    scorer: BM25Scorer
+    generation: int
+    total_length: float = field(init=False)
+    ids: frozenset[str] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        scorer = self.scorer
+        object.__setattr__(self, "total_length", float(scorer.doc_lengths.sum()))
+        object.__setattr__(self, "ids", frozenset(scorer.ids[i] for i in range(len(scorer))))
+
+    def __len__(self) -> int:
+        return len(self.scorer)
+
+
+def _live(doc_id: str, generation: int, tombstones: dict[str, int]) -> bool:
+    return tombstones.get(doc_id, -1) <= generation
+
+
+class SegmentedBM25Retriever:
+    """BM25 retriever accepting document ingestion and removal at runtime.
+
+    ``base`` is an optional initial segment: an existing BM25 index such as
+    :class:`~.index.MmapBM25Retriever`, or fixtures to index in memory. With
+    ``background=False`` merges run inline on the ingesting thread.
+    """
+
+    #: Results are returned in descending score order.
+    score_sorted: ClassVar[bool] = True
+    #: Scoring is CPU-bound, so ``asearch`` should run in an executor.
+    blocking: ClassVar[bool] = True
+
+    def __init__(
+        self,
+        base: BM25Scorer | Iterable[Fixture] | None = None,
+        *,
+        k1: float = 1.2,
+        b: float = 0.75,
+        delta: float = 0.0,
+        flush_threshold: int = 1000,
+        max_segments: int = 8,
+        merge_factor: int = 4,
+        background: bool = True,
+    ) -> None:
+        if flush_threshold < 1:
+            raise ValueError("flush_threshold must be positive")
+        if merge_factor < 2:
+            raise ValueError("merge_factor must be at least 2")
+        if max_segments < 1:
+            raise ValueError("max_segments must be positive")
+        check_bm25_params(k1, b, delta)
+        self.k1, self.b, self.delta = float(k1), float(b), float(delta)
+        self.flush_threshold = flush_threshold
+        self.max_segments = max_segments
+        self.merge_factor = merge_factor
+        self.background = background
+
+        self._lock = threading.RLock()
+        self._segments: tuple[_Segment, ...] = ()
+        self._delta: dict[str, Fixture] = {}
+        self._delta_segment: _Segment | None = None
+        # Both maps are replaced, never mutated, so searches can hold them.
+        self._tombstones: dict[str, int] = {}
+        # Number of tombstones masking a document of each segment, by id().
+        self._masked: dict[int, int] = {}
+        self._generation = 1
+        self._version = 0
+        self._merging = False
+        self._merge_lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+
+        if isinstance(base, BM25Scorer):
+            if (base.k1, base.b, base.delta) != (self.k1, self.b, self.delta):
+                raise ValueError("base index was built with different BM25 parameters")
+            self._segments = (_Segment(base, 0),)
+        elif base is not None:
+            self._segments = (_Segment(self._build(base), 0),)
+
+    @property
+    def cache_id(self) -> str:
+        """Identify the current contents in pipeline cache keys."""
+
+        return f"bm25-segments:{id(self):x}:{self._version}"
+
+    @property
+    def segments(self) -> tuple[BM25Scorer, ...]:
+        """Return the immutable segments, excluding the in-memory delta."""
+
+        return tuple(segment.scorer for segment in self._segments)
+
+    def _build(self, fixtures: Iterable[Fixture]) -> BM25Retriever:
+        return BM25Retriever(fixtures, k1=self.k1, b=self.b, delta=self.delta)
+
+    def ingest(self, fixtures: Iterable[Fixture]) -> None:
+        """Add or replace documents; they are searchable on return."""
+
+        with self._lock:
+            tombstones, masked = dict(self._tombstones), dict(self._masked)
+            for fix in fixtures:
+                self._mask_locked(fix.id, tombstones, masked)
+                self._delta[fix.id] = fix
+            self._tombstones, self._masked = tombstones, masked
+            self._delta_segment = None
+            self._version += 1
+            crowded = len(self._delta) >= self.flush_threshold and self._flush_locked()
+        if crowded:
+            self._schedule_merge()
+
+    def remove(self, ids: Iterable[str]) -> None:
+        """Hide the documents with ``ids`` from subsequent searches."""
+
+        with self._lock:
+            tombstones, masked = dict(self._tombstones), dict(self._masked)
+            for doc_id in ids:
+                self._mask_locked(doc_id, tombstones, masked)
+                if self._delta.pop(doc_id, None) is not None:
+                    self._delta_segment = None
+            self._tombstones, self._masked = tombstones, masked
+            self._version += 1
+
+    def _mask_locked(
+        self, doc_id: str, tombstones: dict[str, int], masked: dict[int, int]
+    ) -> None:
+        """Tombstone ``doc_id`` if a segment holds it; the delta is replaced in place."""
+
+        found = False
+        for segment in self._segments:
+            if doc_id in segment.ids:
+                found = True
+                if _live(doc_id, segment.generation, tombstones):
+                    masked[id(segment)] = masked.get(id(segment), 0) + 1
+        if found:
+            tombstones[doc_id] = self._generation
+
+    def flush(self) -> None:
+        """Freeze the delta into an immutable segment."""
+
+        with self._lock:
+            crowded = self._flush_locked()
+        if crowded:
+            self._schedule_merge()
+
+    def _flush_locked(self) -> bool:
+        """Freeze the delta and report whether segments now need merging."""
+
+        if not self._delta:
+            return False
+        segment = _Segment(self._build(self._delta.values()), self._generation)
+        self._segments = (*self._segments, segment)
+        self._delta = {}
+        self._delta_segment = None
+        self._generation += 1
+        return len(self._segments) > self.max_segments
+
+    def _schedule_merge(self) -> None:
+        with self._lock:
+            if self._merging:
+                return
+            self._merging = True
+        if not self.background:
+            self._merge_pending()
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="factsynth-bm25-merge"
+            )
+        self._executor.submit(self._merge_pending)
+
+    def _merge_pending(self) -> None:
+        try:
+            while True:
+                # Check and clear under the lock so a flush racing with the
+                # last merge still finds a merge scheduled.
+                with self._lock:
+                    if len(self._segments) <= self.max_segments:
+                        self._merging = False
+                        return
+                self._merge(self.merge_factor)
+        except Exception:
+            logger.exception("Background merge of BM25 segments failed")
+            with self._lock:
+                self._merging = False
+
+    def merge(self) -> None:
+        """Flush the delta and merge every segment into one, dropping dead documents."""
+
+        self.flush()
+        self._merge(None)
+
+    def _merge(self, count: int | None) -> None:
+        """Merge the smallest run of ``count`` adjacent segments, or all for ``None``."""
+
+        with self._merge_lock:
+            with self._lock:
+                inputs = list(self._segments)
+                if count is not None and count < len(inputs):
+                    start = min(
+                        range(len(inputs) - count + 1),
+                        key=lambda first: sum(map(len, inputs[first : first + count])),
+                    )
+                    inputs = inputs[start : start + count]
+                tombstones = dict(self._tombstones)
+            if inputs:
+                self._replace(inputs, tombstones)
+
+    def _replace(self, inputs: list[_Segment], tombstones: dict[str, int]) -> None:
+        live = []
+        for segment in inputs:
+            scorer = segment.scorer
+            for doc in range(len(scorer)):
+                doc_id, text = scorer._document(doc)
+                if _live(doc_id, segment.generation, tombstones):
+                    live.append(Fixture(id=doc_id, text=text))
+        merged = (
+            _Segment(self._build(live), max(segment.generation for segment in inputs))
+            if live
+            else None
+        )
+
+        with self._lock:
+            replaced = {id(segment) for segment in inputs}
+            segments: list[_Segment] = []
+            for segment in self._segments:
+                if id(segment) not in replaced:
+                    segments.append(segment)
+                elif merged is not None:
+                    segments.append(merged)
+                    merged = None
+            self._segments = tuple(segments)
+            tombstones: dict[str, int] = {}
+            masked: dict[int, int] = {}
+            for doc_id, generation in self._tombstones.items():
+                for segment in segments:
+                    if segment.generation < generation and doc_id in segment.ids:
+                        tombstones[doc_id] = generation
+                        masked[id(segment)] = masked.get(id(segment), 0) + 1
+            self._tombstones, self._masked = tombstones, masked
+            self._version += 1
+
+    def _snapshot(self) -> tuple[list[_Segment], dict[str, int], dict[int, int]]:
+        with self._lock:
+            segments = list(self._segments)
+            if self._delta:
+                if self._delta_segment is None:
+                    self._delta_segment = _Segment(
+                        self._build(self._delta.values()), self._generation
+                    )
+                segments.append(self._delta_segment)
+            return segments, self._tombstones, self._masked
+
+    def search(self, query: str, k: int = 5) -> list[RetrievedDoc]:
+        """Return the top ``k`` live documents for ``query`` across all segments."""
+
+        if k <= 0:
+            return []
+        segments, tombstones, masked = self._snapshot()
+        terms = list(dict.fromkeys(_terms(query)))
+        n_docs = sum(len(segment) for segment in segments)
+        if not terms or not n_docs:
+            return []
+        df = np.array(
+            [sum(seg.scorer.document_frequency(term) for seg in segments) for term in terms],
+            dtype=np.float64,
+        )
+        idf = dict(zip(terms, bm25_idf(df, n_docs).tolist()))
+        avg_length = sum(segment.total_length for segment in segments) / n_docs
+
+        hits: list[tuple[float, int, int, str]] = []
+        for position, segment in enumerate(segments):
+            scorer = segment.scorer
+            # Only documents masked by a tombstone can push live ones out of the top k.
+            depth = k + masked.get(id(segment), 0)
+            docs, scores = top_k(
+                *scorer.score_terms(terms, idf=idf, avg_length=avg_length), depth
+            )
+            taken = 0
+            for doc, score in zip(docs.tolist(), scores.tolist()):
+                doc_id = scorer.ids[doc]
+                if not _live(doc_id, segment.generation, tombstones):
+                    continue
+                hits.append((-score, position, doc, doc_id))
+                taken += 1
+                if taken == k:
+                    break
+        hits.sort()
+        return [
+            segments[position].scorer._retrieved(doc, -neg_score)
+            for neg_score, position, doc, _ in hits[:k]
+        ]
+
+    async def asearch(self, query: str, k: int = 5) -> list[RetrievedDoc]:
+        """Async wrapper around :meth:`search` for compatibility."""
+
+        return self.search(query, k=k)
+
+    def close(self) -> None:
+        """Wait for running merges and close every segment."""
+
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        with self._lock:
+            for segment in self._segments:
+                segment.scorer.close()
+
+    async def aclose(self) -> None:
+        """Async close hook to satisfy the :class:`Retriever` protocol."""
+
+        self.close()
+
+
+__all__ = ["SegmentedBM25Retriever"]
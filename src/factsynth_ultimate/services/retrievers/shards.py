@@ -0,0 +1,443 @@
+"""BM25 search scattered across index shards served by worker processes.
+
+A sharded index directory splits the corpus into contiguous document ranges,
+each written as a regular :mod:`.index` directory, next to collection-wide
+statistics and a ``shards.json`` header written last::
+
+    shards.json          format, version, shard directories, document count,
+                         average length
+    global/terms.bin/.off  union vocabulary, sorted bytewise, with offsets
+    global/df.i8         number of documents containing each term
+    shard-000/ ...       one memory-mapped BM25 index per shard
+
+:class:`ShardedBM25Retriever` gives every shard its own single-worker
+executor, so each worker process maps one shard and keeps it warm. A query
+is tokenized once, scattered to all shards and every shard returns its top
+``k``, scored with the global IDF and average length so shard scores are
+directly comparable. The per-shard rankings are merged into the global top
+``k``, which equals the ranking of a single index over the whole corpus.
+
+Shards that do not answer within ``shard_timeout`` seconds, or that fail,
+are left out. The result is then a :class:`ShardedResults` list flagged as
+``partial`` and naming the ``missing`` shards. A shard whose call is still
+running when it times out gets a fresh worker, so later queries do not queue
+behind the stuck call.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import json
+import logging
+import multiprocessing
+import uuid
+from collections.abc import Iterable, Sequence
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from ...core.metrics import RETRIEVER_OUTCOMES
+from .base import RetrievedDoc, Retriever
+from .bm25 import BM25Retriever, _terms, bm25_idf, check_bm25_params, top_k
+from .index import (
+    IndexFormatError,
+    MmapBM25Retriever,
+    _map_array,
+    _StringTable,
+    _write_array,
+    _write_strings,
+    read_corpus,
+    write_index,
+)
+from .local import Fixture
+from .offload import EXECUTOR_KINDS
+
+logger = logging.getLogger(__name__)
+
+SHARDS_FORMAT = "factsynth-bm25-shards"
+SHARDS_VERSION = 1
+
+
+class ShardedResults(list[RetrievedDoc]):
+    """Merged ranking that records which shards did not contribute."""
+
+    def __init__(
+        self, docs: Iterable[RetrievedDoc] = (), *, missing: Sequence[int] = ()
+    ) -> None:
+        super().__init__(docs)
+        self.missing = tuple(sorted(missing))
+
+    @property
+    def partial(self) -> bool:
+        """Return ``True`` when at least one shard is missing from the ranking."""
+
+        return bool(self.missing)
+
+
+def build_sharded_index(
+    fixtures: Iterable[Fixture] | Path | str, directory: Path | str, *, shards: int
+) -> dict[str, Any]:
+    """Split ``fixtures`` (or a JSON Lines corpus path) into ``shards`` indexes.
+
+    Returns the metadata written to ``shards.json``.
+    """
+
+    if shards < 1:
+        raise ValueError("shards must be at least 1")
+    source = read_corpus(fixtures) if isinstance(fixtures, (str, Path)) else fixtures
+    docs = list(source)
+    out = Path(directory)
+    out.mkdir(parents=True, exist_ok=True)
+    meta_path = out / "shards.json"
+    meta_path.unlink(missing_ok=True)
+
+    bounds = np.linspace(0, len(docs), shards + 1).astype(int)
+    names: list[str] = []
+    df: dict[str, int] = {}
+    total_length = 0.0
+    for number, (start, stop) in enumerate(zip(bounds[:-1], bounds[1:])):
+        shard = BM25Retriever(docs[start:stop])
+        name = f"shard-{number:03d}"
+        write_index(shard, out / name)
+        names.append(name)
+        counts = np.diff(shard.offsets).tolist()
+        for term, term_id in shard.vocabulary.items():
+            df[term] = df.get(term, 0) + counts[term_id]
+        total_length += float(shard.doc_lengths.sum())
+
+    stats = out / "global"
+    stats.mkdir(exist_ok=True)
+    terms = sorted(df, key=lambda term: term.encode("utf-8"))
+    _write_strings(stats, "terms", terms)
+    _write_array(stats / "df.i8", np.array([df[term] for term in terms]), "<i8")
+
+    meta = {
+        "format": SHARDS_FORMAT,
+        "version": SHARDS_VERSION,
+        "documents": len(docs),
+        "terms": len(terms),
+        "avg_length": total_length / len(docs) if docs else 0.0,
+        "shards": names,
+    }
+    meta_path.write_text(json.dumps(meta, indent=2, sort_keys=True) + "\n")
+    return meta
+
+
+def read_shards_meta(directory: Path | str) -> dict[str, Any]:
+    """Return the validated ``shards.json`` header of a sharded index."""
+
+    path = Path(directory) / "shards.json"
+    try:
+        meta = json.loads(path.read_text())
+    except FileNotFoundError as exc:
+        raise IndexFormatError(f"{directory} is not a complete sharded index") from exc
+    except ValueError as exc:
+        raise IndexFormatError(f"{path} is not valid JSON") from exc
+    if meta.get("format") != SHARDS_FORMAT:
+        raise IndexFormatError(f"{directory} is not a {SHARDS_FORMAT} index")
+    if meta.get("version") != SHARDS_VERSION:
+        raise IndexFormatError(
+            f"unsupported sharded index version {meta.get('version')}; "
+            f"expected {SHARDS_VERSION}"
+        )
+    return meta
+
+
+@dataclass(frozen=True)
+class _ShardSpec:
+    """Everything a worker needs to open one shard; sent with every call."""
+
+    owner: str
+    directory: str
+    stats: str
+    n_docs: int
+    avg_length: float
+    k1: float
+    b: float
+    delta: float
+
+
+class _ShardSearcher:
+    """One opened shard together with the collection-wide statistics."""
+
+    def __init__(self, spec: _ShardSpec) -> None:
+        self.spec = spec
+        self.index = MmapBM25Retriever(spec.directory, k1=spec.k1, b=spec.b, delta=spec.delta)
+        stats = Path(spec.stats)
+        self.terms = _StringTable(stats, "terms")
+        self.df = _map_array(stats / "df.i8", "<i8")
+
+    def global_idf(self, terms: Sequence[str]) -> dict[str, float]:
+        idf = {}
+        for term in terms:
+            position = self.terms.find(term.encode("utf-8"))
+            if position is not None:
+                df = np.float64(self.df[position])
+                idf[term] = float(bm25_idf(df, self.spec.n_docs))
+        return idf
+
+    def search(self, terms: Sequence[str], k: int) -> list[RetrievedDoc]:
+        idf = self.global_idf(terms)
+        scored = self.index.score_terms(list(idf), idf=idf, avg_length=self.spec.avg_length)
+        matched, scores = top_k(*scored, k)
+        return [
+            self.index._retrieved(doc, score)
+            for doc, score in zip(matched.tolist(), scores.tolist())
+        ]
+
+    def close(self) -> None:
+        self.index.close()
+        self.terms.close()
+
+
+# Shards opened in this process, keyed by their spec, which is unique to the
+# owning retriever. A worker process only ever opens its own shard.
+_OPEN_SHARDS: dict[_ShardSpec, _ShardSearcher] = {}
+
+
+def _search_shard(spec: _ShardSpec, terms: Sequence[str], k: int) -> list[RetrievedDoc]:
+    searcher = _OPEN_SHARDS.get(spec)
+    if searcher is None:
+        searcher = _OPEN_SHARDS[spec] = _ShardSearcher(spec)
+    return searcher.search(terms, k)
+
+
+def _close_shard(spec: _ShardSpec) -> None:
+    searcher = _OPEN_SHARDS.pop(spec, None)
+    if searcher is not None:
+        searcher.close()
+
+
+def merge_shard_results(
+    rankings: Sequence[Sequence[RetrievedDoc]], k: int
+) -> list[RetrievedDoc]:
+    """Merge per-shard rankings into the global top ``k``.
+
+    Ties are broken by shard and then by rank within the shard, which keeps
+    the document order of a single index over the concatenated shards.
+    """
+
+    ranked = (
+        (-doc.score, shard, rank, doc)
+        for shard, docs in enumerate(rankings)
+        for rank, doc in enumerate(docs)
+    )
+    return [entry[3] for entry in heapq.nsmallest(k, ranked, key=lambda entry: entry[:3])]
+
+
+class ShardedBM25Retriever:
+    """Scatter BM25 queries over index shards and gather the global top ``k``.
+
+    ``kind="process"`` (the default) serves every shard from its own worker
+    process so shards are scored in parallel on separate cores;
+    ``kind="thread"`` keeps the shards in this process. Call :meth:`start`
+    to open the shards up front instead of on the first query.
+    """
+
+    score_sorted = True
+    blocking = False
+
+    def __init__(
+        self,
+        directory: Path | str,
+        *,
+        kind: str = "process",
+        shard_timeout: float | None = 1.0,
+        k1: float = 1.2,
+        b: float = 0.75,
+        delta: float = 0.0,
+        name: str = "bm25-shards",
+    ) -> None:
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"kind must be one of: {', '.join(EXECUTOR_KINDS)}")
+        if shard_timeout is not None and shard_timeout <= 0:
+            raise ValueError("shard_timeout must be positive")
+        check_bm25_params(k1, b, delta)
+        self.directory = Path(directory)
+        meta = read_shards_meta(self.directory)
+        self.kind = kind
+        self.shard_timeout = shard_timeout
+        self.name = name
+        self.cache_id = f"bm25-shards:{self.directory.resolve()}"
+        self.n_docs = int(meta["documents"])
+        owner = uuid.uuid4().hex
+        self.specs = [
+            _ShardSpec(
+                owner=owner,
+                directory=str(self.directory / shard),
+                stats=str(self.directory / "global"),
+                n_docs=self.n_docs,
+                avg_length=float(meta["avg_length"]),
+                k1=float(k1),
+                b=float(b),
+                delta=float(delta),
+            )
+            for shard in meta["shards"]
+        ]
+        self._executors: list[Executor] | None = None
+
+    def __len__(self) -> int:
+        return self.n_docs
+
+    @property
+    def executors(self) -> list[Executor]:
+        """Return one single-worker executor per shard, creating them on first use."""
+
+        if self._executors is None:
+            self._executors = [self._new_executor(number) for number in range(len(self.specs))]
+        return self._executors
+
+    def _new_executor(self, number: int) -> Executor:
+        if self.kind == "process":
+            context = multiprocessing.get_context("spawn")
+            return ProcessPoolExecutor(max_workers=1, mp_context=context)
+        return ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix=f"factsynth-{self.name}-{number}"
+        )
+
+    def _replace_executor(self, number: int) -> None:
+        """Give shard ``number`` a fresh worker while its stuck call runs out.
+
+        A shard call that is already running cannot be cancelled, so every
+        later query would queue behind it on the single worker and time out
+        too. The old executor is shut down without waiting and exits once
+        the stuck call returns.
+        """
+
+        if self._executors is None:
+            return
+        logger.warning("Replacing the worker of shard %s of %s", number, self.name)
+        self._executors[number].shutdown(wait=False, cancel_futures=True)
+        self._executors[number] = self._new_executor(number)
+
+    def start(self) -> None:
+        """Start the workers and open every shard before the first query."""
+
+        self._finish(self._wait(self._submit([], 1), None), 0)
+
+    def _submit(self, terms: list[str], k: int) -> list[Future[list[RetrievedDoc]]]:
+        return [
+            executor.submit(_search_shard, spec, terms, k)
+            for executor, spec in zip(self.executors, self.specs)
+        ]
+
+    def _wait(
+        self, futures: list[Future[list[RetrievedDoc]]], timeout: float | None
+    ) -> list[list[RetrievedDoc] | BaseException | None]:
+        wait_futures(futures, timeout=timeout)
+        return self._collect(futures)
+
+    def _collect(
+        self, futures: list[Future[list[RetrievedDoc]]]
+    ) -> list[list[RetrievedDoc] | BaseException | None]:
+        outcomes: list[list[RetrievedDoc] | BaseException | None] = []
+        for number, future in enumerate(futures):
+            if not future.done():
+                if not future.cancel():
+                    self._replace_executor(number)
+                outcomes.append(None)
+            else:
+                outcomes.append(future.exception() or future.result())
+        return outcomes
+
+    def _finish(
+        self, outcomes: Sequence[list[RetrievedDoc] | BaseException | None], k: int
+    ) -> ShardedResults:
+        rankings: list[list[RetrievedDoc]] = []
+        missing: list[int] = []
+        errors: list[BaseException] = []
+        for number, outcome in enumerate(outcomes):
+            if isinstance(outcome, list):
+                rankings.append(outcome)
+                continue
+            missing.append(number)
+            rankings.append([])
+            if outcome is None:
+                logger.warning("Shard %s of %s timed out", number, self.name)
+            else:
+                logger.warning("Shard %s of %s failed: %s", number, self.name, outcome)
+                errors.append(outcome)
+        if len(missing) == len(outcomes):
+            if errors:
+                raise RuntimeError(f"All shards of {self.name} failed") from errors[0]
+            raise TimeoutError(f"No shard of {self.name} answered within {self.shard_timeout}s")
+        RETRIEVER_OUTCOMES.labels(self.name, "partial" if missing else "ok").inc()
+        return ShardedResults(merge_shard_results(rankings, k), missing=missing)
+
+    def search(self, query: str, k: int = 5) -> ShardedResults:
+        """Return the global top ``k`` documents for ``query``."""
+
+        if k <= 0:
+            return ShardedResults()
+        terms = list(dict.fromkeys(_terms(query)))
+        return self._finish(self._wait(self._submit(terms, k), self.shard_timeout), k)
+
+    async def asearch(self, query: str, k: int = 5) -> ShardedResults:
+        """Scatter ``query`` without blocking the event loop."""
+
+        if k <= 0:
+            return ShardedResults()
+        terms = list(dict.fromkeys(_terms(query)))
+        futures = self._submit(terms, k)
+        pending = [asyncio.wrap_future(future) for future in futures]
+        await asyncio.wait(pending, timeout=self.shard_timeout)
+        outcomes = self._collect(futures)
+        for task in pending:
+            if task.done() and not task.cancelled():
+                # Already collected from the concurrent future; mark it retrieved.
+                task.exception()
+            else:
+                task.cancel()
+        return self._finish(outcomes, k)
+
+    def close(self) -> None:
+        """Shut down the shard workers."""
+
+        if self._executors is not None:
+            for executor in self._executors:
+                executor.shutdown(wait=False, cancel_futures=True)
+            self._executors = None
+        if self.kind == "thread":
+            for spec in self.specs:
+                _close_shard(spec)
+
+    async def aclose(self) -> None:
+        """Asynchronous counterpart of :meth:`close`."""
+
+        self.close()
+
+
+def create_sharded_retriever() -> Retriever:
+    """Return a sharded BM25 retriever for entry-point loading.
+
+    Serves the sharded index at ``RETRIEVER_SHARDS_PATH`` and opens every
+    shard before returning.
+    """
+
+    from ...core.settings import load_settings
+
+    settings = load_settings()
+    if not settings.retriever_shards_path:
+        raise ValueError("RETRIEVER_SHARDS_PATH must point to a sharded index")
+    retriever = ShardedBM25Retriever(
+        settings.retriever_shards_path, shard_timeout=settings.retriever_shard_timeout
+    )
+    retriever.start()
+    return retriever
+
+
+__all__ = [
+    "SHARDS_FORMAT",
+    "SHARDS_VERSION",
+    "ShardedBM25Retriever",
+    "ShardedResults",
+    "build_sharded_index",
+    "create_sharded_retriever",
+    "merge_shard_results",
+    "read_shards_meta",
+]
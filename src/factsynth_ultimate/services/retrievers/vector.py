@@ -0,0 +1,510 @@
+"""Dense vector retrieval over a memory-mapped embedding matrix.
+
+Documents are embedded by a pluggable local callable mapping a batch of texts
+to a ``(len(texts), dim)`` array, and ranked by cosine similarity. A vector
+index directory mirrors the BM25 index layout of :mod:`.index`::
+
+    meta.json            format, version, dimension, counts and options
+    vectors.bin          row-normalized embeddings, float32 or int8
+    scales.f32           per-row dequantization scales (int8 only)
+    centroids.f32        IVF partition centroids (IVF only)
+    lists.off/.idx       IVF partition offsets (int64) and member rows (int32)
+    ids.bin/.off         document ids, UTF-8 with offsets
+    texts.bin/.off       document texts, UTF-8 with offsets
+
+Exact search scores the matrix in row blocks with one matrix product per
+block against every pending query and keeps the running top ``k`` with
+``argpartition``. For large corpora the index can be partitioned by
+spherical k-means (IVF); a query then scans only the ``n_probe`` partitions
+whose centroids are closest to it.
+
+:meth:`VectorRetriever.asearch` batches queries that arrive within
+``batch_window`` seconds of each other, embeds them in one call and scores
+them with one matrix product per block, off the event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import importlib
+import json
+from collections.abc import Callable, Iterable, Sequence
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+from typing import Any, ClassVar
+
+import numpy as np
+
+from .base import RetrievedDoc, Retriever
+from .bm25 import _terms
+from .index import (
+    IndexFormatError,
+    _map_array,
+    _StringTable,
+    _write_array,
+    _write_strings,
+    read_corpus,
+)
+from .local import Fixture
+
+VECTOR_FORMAT = "factsynth-vectors"
+VECTOR_VERSION = 1
+
+#: Maps a batch of texts to a ``(len(texts), dim)`` array of embeddings.
+Embedder = Callable[[Sequence[str]], np.ndarray]
+
+
+class HashingEmbedder:
+    """Embed texts by signed feature hashing of their lower-cased tokens.
+
+    Needs no model download, so it serves as the default embedder and in
+    tests. Token order is ignored; it captures lexical overlap only.
+    """
+
+    def __init__(self, dim: int = 256) -> None:
+        if dim < 1:
+            raise ValueError("dim must be positive")
+        self.dim = dim
+
+    def __call__(self, texts: Sequence[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in _terms(text):
+                digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+                value = int.from_bytes(digest, "little")
+                out[row, value % self.dim] += 1.0 if value >> 63 else -1.0
+        return out
+
+
+def load_embedder(spec: str | None) -> Embedder:
+    """Return the embedder named by ``spec`` (``"module:attribute"``).
+
+    Classes are instantiated without arguments. ``None`` selects
+    :class:`HashingEmbedder`.
+    """
+
+    if not spec:
+        return HashingEmbedder()
+    module, sep, attribute = spec.partition(":")
+    if not sep or not module or not attribute:
+        raise ValueError(f"embedder must be given as 'module:attribute', got {spec!r}")
+    loaded = getattr(importlib.import_module(module), attribute)
+    embedder = loaded() if isinstance(loaded, type) else loaded
+    if not callable(embedder):
+        raise TypeError(f"embedder {spec!r} is not callable")
+    return embedder
+
+
+def _embed(embedder: Embedder, texts: Sequence[str]) -> np.ndarray:
+    vectors = np.asarray(embedder(texts), dtype=np.float32)
+    if vectors.ndim != 2 or vectors.shape[0] != len(texts):
+        raise ValueError("embedder must return one row per text")
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
+
+
+def quantize(vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Return symmetric per-row int8 codes and the scales restoring them."""
+
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    safe = np.where(scales > 0, scales, 1.0)[:, None]
+    codes = np.clip(np.rint(vectors / safe), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def kmeans(
+    vectors: np.ndarray, n_lists: int, *, iterations: int = 10, seed: int = 0
+) -> np.ndarray:
+    """Return ``n_lists`` unit-length centroids of ``vectors`` (spherical k-means).
+
+    Centroids are trained on a sample of at most ``256 * n_lists`` rows.
+    """
+
+    rng = np.random.default_rng(seed)
+    n_rows = vectors.shape[0]
+    if not 0 < n_lists <= n_rows:
+        raise ValueError("n_lists must be between 1 and the number of vectors")
+    sample_size = min(n_rows, 256 * n_lists)
+    sample = np.asarray(vectors[np.sort(rng.choice(n_rows, sample_size, replace=False))])
+    sample = sample.astype(np.float32)
+    centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        empty = ~sums.any(axis=1)
+        # Restart empty partitions from random rows instead of dropping them.
+        sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        centroids = np.divide(sums, norms, out=np.zeros_like(sums), where=norms > 0)
+    return centroids
+
+
+def _top_rows(scores: np.ndarray, rows: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Keep the ``k`` best columns of every row of ``scores``."""
+
+    if scores.shape[1] <= k:
+        return scores, rows
+    keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(scores, keep, axis=1), np.take_along_axis(rows, keep, axis=1)
+
+
+@dataclass
+class VectorIndex:
+    """Normalized document embeddings with optional int8 codes and IVF lists."""
+
+    ids: Sequence[str]
+    texts: Sequence[str]
+    vectors: np.ndarray
+    scales: np.ndarray | None = None
+    centroids: np.ndarray | None = None
+    list_offsets: np.ndarray | None = None
+    list_rows: np.ndarray | None = None
+    directory: Path | None = None
+
+    #: Rows scored per matrix product in exact search.
+    block_rows: ClassVar[int] = 65_536
+
+    @classmethod
+    def build(
+        cls,
+        fixtures: Iterable[Fixture],
+        embedder: Embedder,
+        *,
+        int8: bool = False,
+        n_lists: int = 0,
+        batch_size: int = 256,
+        seed: int = 0,
+    ) -> VectorIndex:
+        """Embed ``fixtures`` in batches and index them in memory."""
+
+        ids: list[str] = []
+        texts: list[str] = []
+        blocks = []
+        remaining = iter(fixtures)
+        while batch := list(islice(remaining, batch_size)):
+            blocks.append(_embed(embedder, [fix.text for fix in batch]))
+            ids.extend(fix.id for fix in batch)
+            texts.extend(fix.text for fix in batch)
+        vectors = np.concatenate(blocks) if blocks else np.zeros((0, 1), dtype=np.float32)
+        index = cls(ids=ids, texts=texts, vectors=vectors)
+        if n_lists:
+            index.centroids = kmeans(vectors, n_lists, seed=seed)
+            assign = np.argmax(vectors @ index.centroids.T, axis=1)
+            index.list_rows = np.argsort(assign, kind="stable").astype(np.int32)
+            index.list_offsets = np.zeros(n_lists + 1, dtype=np.int64)
+            np.cumsum(np.bincount(assign, minlength=n_lists), out=index.list_offsets[1:])
+        if int8:
+            index.vectors, index.scales = quantize(vectors)
+        return index
+
+    @classmethod
+    def open(cls, directory: Path | str) -> VectorIndex:
+        """Map a vector index written by :meth:`save`."""
+
+        path = Path(directory)
+        try:
+            meta = json.loads((path / "meta.json").read_text())
+        except FileNotFoundError as exc:
+            raise IndexFormatError(f"{directory} is not a complete index") from exc
+        except ValueError as exc:
+            raise IndexFormatError(f"{path / 'meta.json'} is not valid JSON") from exc
+        if meta.get("format") != VECTOR_FORMAT:
+            raise IndexFormatError(f"{directory} is not a {VECTOR_FORMAT} index")
+        if meta.get("version") != VECTOR_VERSION:
+            raise IndexFormatError(
+                f"unsupported index version {meta.get('version')}; expected {VECTOR_VERSION}"
+            )
+        shape = (int(meta["documents"]), int(meta["dim"]))
+        vectors = _map_array(path / "vectors.bin", meta["dtype"]).reshape(shape)
+        index = cls(
+            ids=_StringTable(path, "ids"),
+            texts=_StringTable(path, "texts"),
+            vectors=vectors,
+            directory=path,
+        )
+        if meta["dtype"] == "<i1":
+            index.scales = _map_array(path / "scales.f32", "<f4")
+        if meta["lists"]:
+            index.centroids = _map_array(path / "centroids.f32", "<f4").reshape(
+                int(meta["lists"]), shape[1]
+            )
+            index.list_offsets = _map_array(path / "lists.off", "<i8")
+            index.list_rows = _map_array(path / "lists.idx", "<i4")
+        return index
+
+    def save(self, directory: Path | str) -> dict[str, Any]:
+        """Write this index to ``directory`` and return its metadata."""
+
+        out = Path(directory)
+        out.mkdir(parents=True, exist_ok=True)
+        meta_path = out / "meta.json"
+        meta_path.unlink(missing_ok=True)
+        dtype = "<i1" if self.scales is not None else "<f4"
+        _write_array(out / "vectors.bin", self.vectors, dtype)
+        if self.scales is not None:
+            _write_array(out / "scales.f32", self.scales, "<f4")
+        if self.centroids is not None:
+            _write_array(out / "centroids.f32", self.centroids, "<f4")
+            _write_array(out / "lists.off", self.list_offsets, "<i8")
+            _write_array(out / "lists.idx", self.list_rows, "<i4")
+        _write_strings(out, "ids", self.ids)
+        _write_strings(out, "texts", self.texts)
+        meta = {
+            "format": VECTOR_FORMAT,
+            "version": VECTOR_VERSION,
+            "documents": len(self),
+            "dim": self.dim,
+            "dtype": dtype,
+            "lists": 0 if self.centroids is None else len(self.centroids),
+        }
+        meta_path.write_text(json.dumps(meta, indent=2, sort_keys=True) + "\n")
+        return meta
+
+    def __len__(self) -> int:
+        return int(self.vectors.shape[0])
+
+    @property
+    def dim(self) -> int:
+        return int(self.vectors.shape[1])
+
+    def _score(self, rows: slice | np.ndarray, queries: np.ndarray) -> np.ndarray:
+        block = np.asarray(self.vectors[rows], dtype=np.float32)
+        scores = block @ queries.T
+        if self.scales is not None:
+            scores *= np.asarray(self.scales[rows])[:, None]
+        return scores.T
+
+    def _exact(self, queries: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        n_queries = queries.shape[0]
+        best = np.empty((n_queries, 0), dtype=np.float32)
+        best_rows = np.empty((n_queries, 0), dtype=np.int64)
+        for start in range(0, len(self), self.block_rows):
+            stop = min(start + self.block_rows, len(self))
+            scores = self._score(slice(start, stop), queries)
+            rows = np.broadcast_to(np.arange(start, stop), scores.shape)
+            scores, rows = _top_rows(scores, rows, k)
+            best, best_rows = _top_rows(
+                np.concatenate([best, scores], axis=1),
+                np.concatenate([best_rows, rows], axis=1),
+                k,
+            )
+        return best, best_rows
+
+    def _probe(
+        self, queries: np.ndarray, k: int, n_probe: int
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        assert self.centroids is not None
+        assert self.list_offsets is not None and self.list_rows is not None
+        closest = np.asarray(self.centroids) @ queries.T
+        n_probe = min(n_probe, closest.shape[0])
+        probes = np.argpartition(-closest, n_probe - 1, axis=0)[:n_probe].T
+        out = []
+        for query, lists in zip(queries, probes):
+            rows = np.concatenate(
+                [self.list_rows[self.list_offsets[c] : self.list_offsets[c + 1]] for c in lists]
+            ).astype(np.int64)
+            rows.sort()
+            scores, kept = _top_rows(self._score(rows, query[None]), rows[None], k)
+            out.append((scores[0], kept[0]))
+        return out
+
+    def search(
+        self, queries: np.ndarray, k: int, *, n_probe: int | None = None
+    ) -> list[list[tuple[int, float]]]:
+        """Return ``(row, similarity)`` pairs of the top ``k`` rows per query.
+
+        ``queries`` must be normalized. IVF indexes scan ``n_probe``
+        partitions; pass ``n_probe=None`` on a flat index for exact search.
+        Only rows with positive similarity are returned.
+        """
+
+        if queries.shape[1] != self.dim:
+            raise ValueError(f"query dimension {queries.shape[1]} does not match {self.dim}")
+        if k <= 0 or not len(self):
+            return [[] for _ in range(queries.shape[0])]
+        if self.centroids is not None and n_probe is not None:
+            pairs = self._probe(queries, k, n_probe)
+        else:
+            pairs = list(zip(*self._exact(queries, k)))
+        results = []
+        for scores, rows in pairs:
+            positive = scores > 0
+            scores, rows = scores[positive], rows[positive]
+            order = np.lexsort((rows, -scores))
+            results.append(list(zip(rows[order].tolist(), scores[order].tolist())))
+        return results
+
+    def close(self) -> None:
+        """Release the memory maps of an opened index."""
+
+        for table in (self.ids, self.texts):
+            if isinstance(table, _StringTable):
+                table.close()
+
+
+class VectorRetriever:
+    """Cosine-similarity retriever over a :class:`VectorIndex`.
+
+    ``n_probe`` partitions are scanned on IVF indexes. Concurrent
+    :meth:`asearch` calls arriving within ``batch_window`` seconds are
+    embedded and scored together, up to ``max_batch`` queries at a time.
+    """
+
+    #: Results are returned in descending score order.
+    score_sorted: ClassVar[bool] = True
+    #: ``asearch`` batches queries itself and scores them off the event loop.
+    blocking: ClassVar[bool] = False
+
+    def __init__(
+        self,
+        index: VectorIndex,
+        embedder: Embedder,
+        *,
+        n_probe: int = 8,
+        batch_window: float = 0.002,
+        max_batch: int = 64,
+    ) -> None:
+        if n_probe < 1:
+            raise ValueError("n_probe must be positive")
+        if max_batch < 1:
+            raise ValueError("max_batch must be positive")
+        self.index = index
+        self.embedder = embedder
+        self.n_probe = n_probe
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.cache_id = f"vector-index:{index.directory.resolve()}" if index.directory else None
+        self._pending: list[tuple[str, int, asyncio.Future[list[RetrievedDoc]]]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._batches: set[asyncio.Task[None]] = set()
+
+    def search_many(self, queries: Sequence[str], k: int = 5) -> list[list[RetrievedDoc]]:
+        """Embed ``queries`` together and return the top ``k`` documents of each."""
+
+        if not queries:
+            return []
+        hits = self.index.search(
+            _embed(self.embedder, queries),
+            k,
+            n_probe=self.n_probe if self.index.centroids is not None else None,
+        )
+        index = self.index
+        return [
+            [
+                RetrievedDoc(id=index.ids[row], text=index.texts[row], score=score)
+                for row, score in found
+            ]
+            for found in hits
+        ]
+
+    def search(self, query: str, k: int = 5) -> list[RetrievedDoc]:
+        """Return the top ``k`` documents for ``query`` by cosine similarity."""
+
+        return self.search_many([query], k=k)[0]
+
+    async def asearch(self, query: str, k: int = 5) -> list[RetrievedDoc]:
+        """Queue ``query`` for the next micro-batch and await its results."""
+
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[list[RetrievedDoc]] = loop.create_future()
+        self._pending.append((query, k, future))
+        if len(self._pending) >= self.max_batch or self.batch_window <= 0:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.batch_window, self._dispatch)
+        return await future
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(
+        self, batch: list[tuple[str, int, asyncio.Future[list[RetrievedDoc]]]]
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        queries = [query for query, _, _ in batch]
+        try:
+            results = await loop.run_in_executor(
+                None, self.search_many, queries, max(k for _, k, _ in batch)
+            )
+        except Exception as exc:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, k, future), docs in zip(batch, results):
+            if not future.done():
+                future.set_result(docs[: max(k, 0)])
+
+    def close(self) -> None:
+        """Release the memory maps of the underlying index."""
+
+        self.index.close()
+
+    async def aclose(self) -> None:
+        """Wait for in-flight batches, then close the index."""
+
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+        self.close()
+
+
+def build_vector_index(
+    fixtures: Iterable[Fixture] | Path | str,
+    directory: Path | str,
+    *,
+    embedder: Embedder | None = None,
+    int8: bool = False,
+    n_lists: int = 0,
+) -> dict[str, Any]:
+    """Embed ``fixtures`` (or a JSON Lines corpus path) into ``directory``.
+
+    Returns the metadata written to ``meta.json``.
+    """
+
+    source = read_corpus(fixtures) if isinstance(fixtures, (str, Path)) else fixtures
+    index = VectorIndex.build(source, embedder or HashingEmbedder(), int8=int8, n_lists=n_lists)
+    return index.save(directory)
+
+
+def create_vector_retriever() -> Retriever:
+    """Return a vector retriever instance for entry-point loading.
+
+    Serves the index at ``RETRIEVER_VECTOR_INDEX_PATH`` when configured and
+    embeds queries with ``RETRIEVER_EMBEDDER``.
+    """
+
+    from ...core.settings import load_settings
+
+    settings = load_settings()
+    embedder = load_embedder(settings.retriever_embedder)
+    if settings.retriever_vector_index_path:
+        index = VectorIndex.open(settings.retriever_vector_index_path)
+    else:
+        fixtures = [Fixture(id="default", text="alpha is the first letter")]
+        index = VectorIndex.build(fixtures, embedder)
+    return VectorRetriever(index, embedder, n_probe=settings.retriever_vector_probes)
+
+
+__all__ = [
+    "VECTOR_FORMAT",
+    "VECTOR_VERSION",
+    "Embedder",
+    "HashingEmbedder",
+    "VectorIndex",
+    "VectorRetriever",
+    "build_vector_index",
+    "create_vector_retriever",
+    "kmeans",
+    "load_embedder",
+    "quantize",
+]
@@ -52,6 +52,7 @@ STORE_ACTIVE_BACKEND = Gauge(
     "factsynth_store_active_backend",
     "Indicator of the currently active store backend",
     ("store", "backend"),
+    multiprocess_mode="livemax",
 )
 
 
@@ -5,6 +5,7 @@ from __future__ import annotations
 import asyncio
 import textwrap
 from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import aclosing
 from dataclasses import dataclass
 
 from facts import FactPipeline
@@ -38,6 +39,57 @@ def _chunk_text(text: str, *, limit: int) -> list[str]:
     )
 
 
+class _IncrementalChunker:
+    """Wrap text fed piecewise into the same chunks :func:`_chunk_text` yields.
+
+    Greedy wrapping never revisits a completed line, so every line but the
+    last is final once more text arrives and can be emitted immediately.
+    """
+
+    def __init__(self, limit: int) -> None:
+        if limit <= 0:
+            raise ValueError("limit must be positive")
+        self.limit = limit
+        self._pending = ""
+
+    def feed(self, text: str) -> list[str]:
+        """Add ``text`` and return chunks that can no longer change."""
+
+        self._pending = " ".join(part for part in (self._pending, text) if part)
+        lines = _chunk_text(self._pending, limit=self.limit)
+        if len(lines) <= 1:
+            return []
+        self._pending = lines[-1]
+        return lines[:-1]
+
+    def flush(self) -> list[str]:
+        """Return the remaining buffered chunk, if any."""
+
+        lines = _chunk_text(self._pending, limit=self.limit)
+        self._pending = ""
+        return lines
+
+
+async def _pipeline_fragments(pipeline: FactPipeline, query: str) -> AsyncIterator[str]:
+    astream = getattr(pipeline, "astream", None)
+    if astream is None:
+        yield await pipeline.arun(query)
+        return
+    async with aclosing(astream(query)) as fragments:
+        async for fragment in fragments:
+            yield fragment
+
+
+async def _text_chunks(pipeline: FactPipeline, query: str, limit: int) -> AsyncIterator[str]:
+    chunker = _IncrementalChunker(limit)
+    async with aclosing(_pipeline_fragments(pipeline, query)) as fragments:
+        async for fragment in fragments:
+            for chunk in chunker.feed(fragment):
+                yield chunk
+    for chunk in chunker.flush():
+        yield chunk
+
+
 async def stream_facts(
     pipeline: FactPipeline,
     query: str,
@@ -49,6 +101,11 @@ async def stream_facts(
 ) -> AsyncIterator[FactStreamChunk]:
     """Yield fact chunks generated by ``pipeline`` for ``query``.
 
+    Chunks are emitted as soon as the pipeline's :meth:`FactPipeline.astream`
+    produces enough text to complete them, so the first chunk does not wait
+    for the whole pipeline run. Pipelines without ``astream`` fall back to
+    chunking the result of ``arun``.
+
     Args:
         pipeline: The :class:`FactPipeline` instance providing synthesized facts.
         query: User supplied query text.
@@ -65,20 +122,21 @@ async def stream_facts(
     start_index = max(0, int(start_at))
     sleep_delay = max(0.0, float(delay))
 
-    chunks = _chunk_text(await pipeline.arun(query), limit=chunk_size)
-    if not chunks or start_index >= len(chunks):
-        return
-
     first_chunk = True
-    for index in range(start_index, len(chunks)):
-        if is_disconnected and await is_disconnected():
-            break
-        if not first_chunk and sleep_delay > 0:
-            await asyncio.sleep(sleep_delay)
+    async with aclosing(_text_chunks(pipeline, query, chunk_size)) as chunks:
+        index = -1
+        async for text in chunks:
+            index += 1
+            if index < start_index:
+                continue
             if is_disconnected and await is_disconnected():
                 break
-        yield FactStreamChunk(index=index, text=chunks[index])
-        first_chunk = False
+            if not first_chunk and sleep_delay > 0:
+                await asyncio.sleep(sleep_delay)
+                if is_disconnected and await is_disconnected():
+                    break
+            yield FactStreamChunk(index=index, text=text)
+            first_chunk = False
 
 
 __all__ = ["FactStreamChunk", "stream_facts"]
@@ -2,11 +2,15 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
+import os
 from http import HTTPStatus
 
 import pytest
 
-from facts import NoFactsFoundError
+from facts import FactPipeline, NoFactsFoundError, load_plan
+from factsynth_ultimate.api.v1 import generate
 from factsynth_ultimate.api.v1.generate import (
     PipelineNotReadyError,
     get_fact_pipeline,
@@ -156,3 +160,96 @@ async def test_generate_rejects_low_entropy_output(client, base_headers):
     payload = response.json()
     assert payload["status"] == HTTPStatus.BAD_GATEWAY
     assert payload["title"] == "Generated text entropy too low"
+
+
+class BatchPipeline:
+    """Pipeline stub tracking concurrency and failing for selected queries."""
+
+    def __init__(self) -> None:
+        self.queries: list[str] = []
+        self.active = 0
+        self.peak = 0
+
+    async def arun(self, query: str) -> str:
+        self.queries.append(query)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(0.01)
+        finally:
+            self.active -= 1
+        if query == "unknown":
+            raise NoFactsFoundError("no supporting knowledge")
+        return f"Curated facts about {query}."
+
+
+@pytest.mark.anyio
+async def test_generate_batch_streams_ndjson_with_dedupe(client, base_headers):
+    pipeline = BatchPipeline()
+    app = client._transport.app
+    app.dependency_overrides[get_fact_pipeline] = lambda: pipeline
+    texts = ["Kyiv", "Lviv", "Kyiv", "unknown", "Odesa", "Kyiv"]
+    try:
+        response = await client.post(
+            "/v1/generate/batch",
+            headers=base_headers,
+            json={"items": [{"text": t} for t in texts], "concurrency": 2},
+        )
+    finally:
+        app.dependency_overrides.pop(get_fact_pipeline, None)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    by_index = {line["index"]: line for line in lines}
+    assert sorted(by_index) == list(range(len(texts)))
+    for index in (0, 2, 5):
+        assert by_index[index]["output"] == {"text": "Curated facts about Kyiv."}
+    problem = by_index[3]["problem"]
+    assert problem["status"] == HTTPStatus.NOT_FOUND
+    assert problem["title"] == "Facts not found"
+    assert sorted(pipeline.queries) == ["Kyiv", "Lviv", "Odesa", "unknown"]
+    assert pipeline.peak <= 2
+
+
+@pytest.mark.anyio
+async def test_generate_batch_runs_at_most_concurrency_tasks():
+    baseline = len(asyncio.all_tasks())
+    seen: list[int] = []
+
+    class TaskCountingPipeline(StubPipeline):
+        async def arun(self, query: str) -> str:
+            seen.append(len(asyncio.all_tasks()) - baseline)
+            await asyncio.sleep(0)
+            return f"Curated facts about {query}."
+
+    groups = {f"query {i}": [i] for i in range(200)}
+    lines = [
+        json.loads(line)
+        async for line in generate._generate_batch_lines(TaskCountingPipeline(), groups, 3)
+    ]
+
+    assert sorted(line["index"] for line in lines) == list(range(200))
+    assert max(seen) <= 3
+
+
+@pytest.mark.anyio
+async def test_generate_batch_rejects_empty_batch(client, base_headers):
+    response = await client.post("/v1/generate/batch", headers=base_headers, json={"items": []})
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_shared_pipeline_picks_up_edited_spec(tmp_path, monkeypatch):
+    spec = tmp_path / "pipeline.yaml"
+    spec.write_text("documents:\n  - dedupe\n")
+    pipeline = FactPipeline(coalesce=False, plan=load_plan(spec))
+    monkeypatch.setattr(generate, "_pipeline_singleton", lambda: pipeline)
+    first = pipeline.plan
+
+    assert get_fact_pipeline().plan is first
+    spec.write_text("documents:\n  - dedupe\noutput:\n  - redact\n")
+    stat = spec.stat()
+    os.utime(spec, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert get_fact_pipeline().plan is not first
+    assert pipeline.plan.fingerprint != first.fingerprint
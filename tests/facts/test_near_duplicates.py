@@ -0,0 +1,123 @@
+"""Tests for MinHash near-duplicate suppression."""
+
+from __future__ import annotations
+
+import pytest
+
+from facts import FactPipeline, NearDuplicateFilter, compile_plan, suppress_near_duplicates
+from factsynth_ultimate.services.minhash import DEFAULT_MINHASH, MinHasher, lsh_bands, similarity
+from factsynth_ultimate.services.retrievers.base import RetrievedDoc
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+STORY = (
+    "The city council approved a new budget for public transport on Monday, "
+    "adding night buses and extending the tram line to the northern district"
+)
+DOCS = [
+    RetrievedDoc(id="wire", text=STORY, score=0.7),
+    RetrievedDoc(id="mirror", text=STORY + " (via Agency)", score=0.9),
+    RetrievedDoc(id="syndicated", text="UPDATE: " + STORY.upper(), score=0.8),
+    RetrievedDoc(id="other", text="Kyiv is the capital of Ukraine", score=0.6),
+    RetrievedDoc(id="weather", text="Rain is expected across the region this weekend", score=0.5),
+]
+
+
+class ListRetriever:
+    def search(self, query: str, k: int = 5) -> list[RetrievedDoc]:
+        return list(DOCS)
+
+    async def asearch(self, query: str, k: int = 5) -> list[RetrievedDoc]:
+        return self.search(query, k)
+
+
+def _jaccard(hasher: MinHasher, first: str, second: str) -> float:
+    a, b = set(hasher.shingle_hashes(first)), set(hasher.shingle_hashes(second))
+    return len(a & b) / len(a | b)
+
+
+def test_signature_similarity_estimates_jaccard():
+    hasher = MinHasher(256)
+    first = " ".join(f"w{i}" for i in range(120))
+    second = " ".join(f"w{i}" for i in range(30, 150))
+
+    estimate = similarity(hasher.signature(first), hasher.signature(second))
+
+    assert estimate == pytest.approx(_jaccard(hasher, first, second), abs=0.08)
+    assert similarity(hasher.signature(STORY), hasher.signature(STORY.lower())) == 1.0
+
+
+def test_vectorized_signatures_match():
+    pytest.importorskip("numpy")
+    texts = [STORY, "", "two words", DOCS[3].text]
+    matrix = DEFAULT_MINHASH.signatures(texts)
+    assert [tuple(row) for row in matrix.tolist()] == [
+        DEFAULT_MINHASH.signature(text) for text in texts
+    ]
+
+
+def test_lsh_bands_split_signature_below_threshold():
+    assert lsh_bands(64, 0.8) == (8, 8)
+    assert lsh_bands(64, 0.5) == (16, 4)
+    with pytest.raises(ValueError):
+        lsh_bands(64, 0)
+
+
+def test_suppression_keeps_best_copy():
+    kept = suppress_near_duplicates(DOCS, threshold=0.7)
+    assert [doc.id for doc in kept] == ["mirror", "other", "weather"]
+
+
+def test_filter_prefers_stored_signatures():
+    stored = DEFAULT_MINHASH.signature(STORY)
+    near = NearDuplicateFilter(0.8)
+    assert near.admit(RetrievedDoc(id="a", text="unrelated", score=1.0, signature=stored))
+    assert not near.admit(RetrievedDoc(id="b", text=STORY, score=0.5))
+    assert near.admit(RetrievedDoc(id="c", text="other text entirely", score=0.4))
+    assert len(near) == 2
+
+
+def test_filter_recomputes_signatures_from_other_hashers():
+    stored = DEFAULT_MINHASH.signature(STORY)
+    near = NearDuplicateFilter(0.8, hasher=MinHasher(shingle=2))
+    assert near.admit(RetrievedDoc(id="a", text="unrelated", score=1.0, signature=stored))
+    assert near.admit(RetrievedDoc(id="b", text=STORY, score=0.5))
+    assert not near.admit(RetrievedDoc(id="c", text=STORY.lower(), score=0.4, signature=stored))
+
+
+def test_filter_is_linear_for_distinct_documents():
+    near = NearDuplicateFilter(0.8)
+    docs = [
+        RetrievedDoc(id=str(i), text=f"report {i} on topic {i * 7} from desk {i * 13}", score=1.0)
+        for i in range(1000)
+    ]
+    assert all(near.admit(doc) for doc in docs)
+    largest = max(len(bucket) for bucket in near._buckets.values())
+    assert largest < 50
+
+
+@pytest.mark.anyio
+async def test_plan_stage_frees_top_k_slots():
+    plan = compile_plan({"candidates": 10, "documents": [{"near_dedupe": {"threshold": 0.7}}]})
+    pipeline = FactPipeline(retriever=ListRetriever(), coalesce=False, plan=plan, top_k=3)
+
+    result = await pipeline.arun("budget")
+
+    assert result.count("city council") == 1
+    assert "Kyiv is the capital of Ukraine." in result
+    assert "Rain is expected" in result
+
+
+def test_index_documents_carry_signatures(tmp_path):
+    pytest.importorskip("numpy")
+    from factsynth_ultimate.services.retrievers.index import MmapBM25Retriever, build_index
+    from factsynth_ultimate.services.retrievers.local import Fixture
+
+    build_index([Fixture(id=doc.id, text=doc.text) for doc in DOCS], tmp_path)
+    retriever = MmapBM25Retriever(tmp_path)
+    found = retriever.search("city council budget", k=5)
+    retriever.close()
+
+    assert found
+    for doc in found:
+        assert doc.signature == DEFAULT_MINHASH.signature(doc.text)
@@ -0,0 +1,157 @@
+"""Tests for the FactPipeline result cache."""
+
+from __future__ import annotations
+
+import asyncio
+
+import fakeredis.aioredis
+import pytest
+
+from facts import FactPipeline, MemoryResultCache, NoFactsFoundError, RedisResultCache
+from factsynth_ultimate.core.metrics import PIPELINE_CACHE
+from factsynth_ultimate.services.retrievers.base import RetrievedDoc
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+
+class CountingRetriever:
+    def __init__(self, text: str = "Kyiv is the capital of Ukraine") -> None:
+        self.text = text
+        self.calls = 0
+
+    def search(self, query: str, k: int = 5) -> list[RetrievedDoc]:
+        self.calls += 1
+        if not self.text:
+            return []
+        return [RetrievedDoc(id="kyiv", text=self.text, score=1.0)]
+
+    async def asearch(self, query: str, k: int = 5) -> list[RetrievedDoc]:
+        return self.search(query, k=k)
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _count(result: str) -> float:
+    return PIPELINE_CACHE.labels("memory", result)._value.get()
+
+
+@pytest.mark.anyio
+async def test_identical_queries_hit_cache():
+    retriever = CountingRetriever()
+    pipeline = FactPipeline(retriever=retriever, cache=MemoryResultCache())
+    hits, misses = _count("hit"), _count("miss")
+
+    first = await pipeline.arun("Kyiv capital")
+    second = await pipeline.arun("  kyiv   CAPITAL ")
+
+    assert first == second == "Kyiv is the capital of Ukraine."
+    assert retriever.calls == 1
+    assert _count("hit") == hits + 1
+    assert _count("miss") == misses + 1
+
+
+@pytest.mark.anyio
+async def test_cache_key_includes_pipeline_config():
+    retriever = CountingRetriever()
+    cache = MemoryResultCache()
+    await FactPipeline(retriever=retriever, top_k=1, cache=cache).arun("Kyiv")
+    await FactPipeline(retriever=retriever, top_k=2, cache=cache).arun("Kyiv")
+    assert retriever.calls == 2
+
+
+@pytest.mark.anyio
+async def test_expired_entries_are_recomputed():
+    clock = Clock()
+    retriever = CountingRetriever()
+    pipeline = FactPipeline(
+        retriever=retriever, cache=MemoryResultCache(clock=clock), cache_ttl=10.0
+    )
+    await pipeline.arun("Kyiv")
+    clock.now += 11.0
+    await pipeline.arun("Kyiv")
+    assert retriever.calls == 2
+
+
+@pytest.mark.anyio
+async def test_stale_entries_served_while_revalidating():
+    clock = Clock()
+    retriever = CountingRetriever()
+    pipeline = FactPipeline(
+        retriever=retriever,
+        cache=MemoryResultCache(clock=clock),
+        cache_ttl=10.0,
+        cache_stale_ttl=30.0,
+    )
+    await pipeline.arun("Kyiv")
+    retriever.text = "Kyiv is the largest city in Ukraine"
+    clock.now += 15.0
+
+    stale = await pipeline.arun("Kyiv")
+    assert stale == "Kyiv is the capital of Ukraine."
+    await asyncio.sleep(0)
+    await asyncio.gather(*pipeline._refreshing.values())
+    assert retriever.calls == 2
+
+    fresh = await pipeline.arun("Kyiv")
+    assert fresh == "Kyiv is the largest city in Ukraine."
+    assert retriever.calls == 2
+
+
+@pytest.mark.anyio
+async def test_errors_are_not_cached():
+    retriever = CountingRetriever(text="")
+    pipeline = FactPipeline(retriever=retriever, cache=MemoryResultCache())
+    for _ in range(2):
+        with pytest.raises(NoFactsFoundError):
+            await pipeline.arun("nothing")
+    assert retriever.calls == 2
+
+
+@pytest.mark.anyio
+async def test_memory_cache_is_size_bounded():
+    cache = MemoryResultCache(maxsize=2)
+    pipeline = FactPipeline(retriever=CountingRetriever(), cache=cache)
+    for query in ("a", "b", "c"):
+        await pipeline.arun(query)
+    assert len(cache) == 2
+
+
+@pytest.mark.anyio
+async def test_redis_cache_shares_results():
+    client = fakeredis.aioredis.FakeRedis()
+    retriever = CountingRetriever()
+    first = FactPipeline(retriever=retriever, cache=RedisResultCache(client))
+    second = FactPipeline(retriever=retriever, cache=RedisResultCache(client))
+
+    await first.arun("Kyiv")
+    assert await second.arun("Kyiv") == "Kyiv is the capital of Ukraine."
+    assert retriever.calls == 1
+    ttl = await client.ttl("factsynth:pipeline:" + first.cache_key("Kyiv"))
+    assert 0 < ttl <= 60
+
+
+@pytest.mark.anyio
+async def test_cache_failures_fall_back_to_pipeline():
+    class BrokenCache(MemoryResultCache):
+        async def get(self, key):
+            raise ConnectionError("down")
+
+        async def set(self, key, entry, retain):
+            raise ConnectionError("down")
+
+    retriever = CountingRetriever()
+    pipeline = FactPipeline(retriever=retriever, cache=BrokenCache())
+    assert await pipeline.arun("Kyiv") == "Kyiv is the capital of Ukraine."
+
+
+def test_invalid_cache_ttls_rejected():
+    with pytest.raises(ValueError):
+        FactPipeline(retriever=CountingRetriever(), cache_ttl=0)
+    with pytest.raises(ValueError):
+        FactPipeline(retriever=CountingRetriever(), cache_stale_ttl=-1)
@@ -0,0 +1,200 @@
+"""Tests for declarative pipeline plans."""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from pathlib import Path
+
+import pytest
+
+from facts import FactPipeline, NoFactsFoundError, PlanError, compile_plan, load_plan
+from facts.plan import ParallelStage, PipelinePlan
+from factsynth_ultimate.services.retrievers.base import RetrievedDoc
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+CONFIG = Path(__file__).resolve().parents[2] / "config"
+
+DOCS = [
+    RetrievedDoc(id="kyiv", text="Kyiv is the capital of Ukraine", score=0.9),
+    RetrievedDoc(id="copy", text="kyiv is the capital of ukraine", score=0.95),
+    RetrievedDoc(id="war", text="Violence near the capital of Ukraine", score=0.8),
+    RetrievedDoc(id="mail", text="Write to the capital office at desk@example.com", score=0.7),
+    RetrievedDoc(id="weak", text="Lviv has old coffee houses", score=0.6),
+]
+
+
+class PlanRetriever:
+    def __init__(self) -> None:
+        self.requested: list[int] = []
+
+    def search(self, query: str, k: int = 5) -> list[RetrievedDoc]:
+        self.requested.append(k)
+        return list(DOCS)
+
+    async def asearch(self, query: str, k: int = 5) -> list[RetrievedDoc]:
+        return self.search(query, k)
+
+
+def _pipeline(spec: dict, **kwargs) -> FactPipeline:
+    plan = compile_plan(spec, base_dir=CONFIG)
+    return FactPipeline(retriever=PlanRetriever(), coalesce=False, plan=plan, **kwargs)
+
+
+@pytest.mark.anyio
+async def test_quality_policy_gates_documents():
+    pipeline = _pipeline(
+        {"documents": ["dedupe", {"quality": {"policy": "quality_policy.yaml"}}]}, top_k=5
+    )
+
+    result = await pipeline.arun("capital of Ukraine")
+
+    assert result == (
+        "kyiv is the capital of ukraine. Write to the capital office at desk@example.com."
+    )
+
+
+@pytest.mark.anyio
+async def test_parallel_branches_keep_documents_passing_all():
+    pipeline = _pipeline(
+        {
+            "candidates": 8,
+            "documents": [
+                {
+                    "parallel": [
+                        {"quality": {"weights": {"SQS": 1}, "filters": {"min_score": 0.75}}},
+                        [{"nli": {"threshold": 0.6}}, "redact"],
+                    ]
+                }
+            ],
+        },
+        top_k=5,
+    )
+
+    result = await pipeline.arun("capital of Ukraine")
+
+    assert result == (
+        "kyiv is the capital of ukraine. Kyiv is the capital of Ukraine. "
+        "Violence near the capital of Ukraine."
+    )
+    assert pipeline.retriever.requested == [8]
+
+
+@pytest.mark.anyio
+async def test_output_stages_redact_streamed_and_full_results():
+    pipeline = _pipeline({"output": ["redact"]}, top_k=5)
+
+    result = await pipeline.arun("capital office")
+    fragments = [fragment async for fragment in pipeline.astream("capital office")]
+
+    assert "desk@example.com" not in result
+    assert "[REDACTED_EMAIL]" in result
+    assert " ".join(fragments) == result
+
+
+@pytest.mark.anyio
+async def test_empty_stage_short_circuits_parallel_branches():
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    class SlowStage:
+        name = "slow"
+
+        async def __call__(self, docs, query):
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return docs
+
+    class DropAll:
+        name = "drop"
+
+        async def __call__(self, docs, query):
+            await started.wait()
+            return []
+
+    plan = PipelinePlan(documents=(ParallelStage([[SlowStage()], [DropAll()]]),))
+    pipeline = FactPipeline(retriever=PlanRetriever(), coalesce=False, plan=plan)
+
+    with pytest.raises(NoFactsFoundError):
+        await pipeline.arun("capital")
+    assert cancelled.is_set()
+
+
+def test_sync_run_applies_plan():
+    pipeline = _pipeline(
+        {"documents": [{"quality": {"weights": {"ESS": 1}, "filters": {"min_score": 1}}}]}
+    )
+
+    assert pipeline.run("Lviv coffee") == "Lviv has old coffee houses."
+
+
+def test_plan_is_part_of_cache_key():
+    plain = FactPipeline(retriever=PlanRetriever())
+    planned = _pipeline({"output": ["redact"]})
+
+    assert plain.cache_key("capital") != planned.cache_key("capital")
+
+
+def test_load_plan_reuses_compiled_plan_until_file_changes(tmp_path):
+    spec = tmp_path / "pipeline.yaml"
+    spec.write_text("documents:\n  - dedupe\n")
+
+    first = load_plan(spec)
+    assert load_plan(spec) is first
+
+    spec.write_text("documents:\n  - dedupe\noutput:\n  - redact\n")
+    stat = spec.stat()
+    os.utime(spec, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    reloaded = load_plan(spec)
+    assert reloaded is not first
+    assert [stage.name for stage in reloaded.output] == ["redact_output"]
+
+
+def _touch(path: Path) -> None:
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+def test_policy_file_changes_fingerprint_and_reload(tmp_path):
+    spec = tmp_path / "pipeline.yaml"
+    spec.write_text("documents:\n  - quality:\n      policy: policy.yaml\n")
+    policy = tmp_path / "policy.yaml"
+    policy.write_text("weights:\n  SQS: 1.0\nfilters:\n  min_score: 0.2\n")
+
+    first = load_plan(spec)
+    assert first.sources == (str(spec.resolve()), str(policy.resolve()))
+
+    policy.write_text("weights:\n  SQS: 1.0\nfilters:\n  min_score: 0.9\n")
+    _touch(policy)
+    reloaded = load_plan(spec)
+
+    assert reloaded is not first
+    assert reloaded.fingerprint != first.fingerprint
+    assert reloaded.documents[0].min_score == 0.9
+
+
+def test_shipped_spec_compiles():
+    plan = load_plan(CONFIG / "pipeline.yaml")
+
+    assert [stage.name for stage in plan.documents] == ["dedupe", "parallel"]
+
+
+@pytest.mark.parametrize(
+    "spec",
+    [
+        {"documents": ["shuffle"]},
+        {"output": ["dedupe"]},
+        {"documents": [{"quality": {"weights": {"XYZ": 1}}}]},
+        {"documents": [{"parallel": ["dedupe"]}]},
+        {"candidates": 0},
+        {"stages": []},
+    ],
+)
+def test_invalid_specs_are_rejected(spec):
+    with pytest.raises(PlanError):
+        compile_plan(spec, base_dir=CONFIG)
@@ -0,0 +1,93 @@
+"""Tests for bounded top-k ranking over sync and async iterables."""
+
+from __future__ import annotations
+
+import pytest
+
+from facts import FactPipeline, aselect_top_k, select_top_k
+from facts.pipeline import default_ranker
+from factsynth_ultimate.services.retrievers.base import RetrievedDoc
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+
+def _docs(n: int) -> list[RetrievedDoc]:
+    return [
+        RetrievedDoc(id=f"d{i % (n // 2)}", text=f"fact {i}", score=(i * 37 % n) / n)
+        for i in range(n)
+    ]
+
+
+class Counting:
+    def __init__(self, docs: list[RetrievedDoc]) -> None:
+        self.docs = docs
+        self.consumed = 0
+
+    def __iter__(self):
+        for doc in self.docs:
+            self.consumed += 1
+            yield doc
+
+    async def __aiter__(self):
+        for doc in self.docs:
+            self.consumed += 1
+            yield doc
+
+
+def _reference(docs: list[RetrievedDoc], limit: int) -> list[RetrievedDoc]:
+    ranked = sorted(docs, key=lambda doc: doc.score, reverse=True)
+    unique: dict[str, RetrievedDoc] = {}
+    for doc in ranked:
+        unique.setdefault(doc.id, doc)
+    return list(unique.values())[:limit]
+
+
+@pytest.mark.parametrize("limit", [1, 3, 10])
+def test_default_ranker_matches_full_sort(limit):
+    docs = _docs(500)
+    assert default_ranker(iter(docs), limit) == _reference(docs, limit)
+
+
+@pytest.mark.anyio
+async def test_async_iterables_are_ranked_without_materialising():
+    docs = _docs(200)
+    source = Counting(docs)
+    assert await aselect_top_k(source, 3) == _reference(docs, 3)
+    assert source.consumed == len(docs)
+
+
+@pytest.mark.anyio
+async def test_score_sorted_input_stops_early():
+    docs = sorted(_docs(100), key=lambda doc: doc.score, reverse=True)
+    sync_source, async_source = Counting(docs), Counting(docs)
+    expected = _reference(docs, 3)
+
+    assert select_top_k(sync_source, 3, score_sorted=True) == expected
+    assert await aselect_top_k(async_source, 3, score_sorted=True) == expected
+    assert sync_source.consumed == async_source.consumed < len(docs)
+
+
+@pytest.mark.anyio
+async def test_pipeline_stops_reading_score_sorted_retrievers():
+    docs = sorted(_docs(100), key=lambda doc: doc.score, reverse=True)
+
+    class SortedRetriever:
+        score_sorted = True
+
+        def __init__(self) -> None:
+            self.source = Counting(docs)
+
+        def search(self, query: str, k: int = 5):
+            return iter(self.source)
+
+        async def asearch(self, query: str, k: int = 5):
+            return self.source
+
+    expected = " ".join(f"{doc.text}." for doc in _reference(docs, 2))
+    retriever = SortedRetriever()
+    pipeline = FactPipeline(retriever=retriever, top_k=2, coalesce=False)
+    assert await pipeline.arun("facts") == expected
+    assert retriever.source.consumed < len(docs)
+    retriever.source.consumed = 0
+    assert pipeline.run("facts") == expected
+    assert retriever.source.consumed < len(docs)
@@ -0,0 +1,223 @@
+"""Tests for single-flight coalescing of pipeline runs."""
+
+from __future__ import annotations
+
+import asyncio
+
+import fakeredis.aioredis
+import pytest
+
+from facts import FactPipeline, LocalResult, RedisSingleFlight, SingleFlight
+from factsynth_ultimate.core.metrics import PIPELINE_COALESCED
+from factsynth_ultimate.services.retrievers.base import RetrievedDoc
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+
+class GatedRetriever:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.gate = asyncio.Event()
+
+    def search(self, query: str, k: int = 5) -> list[RetrievedDoc]:
+        raise AssertionError("sync search not expected")
+
+    async def asearch(self, query: str, k: int = 5) -> list[RetrievedDoc]:
+        self.calls += 1
+        await self.gate.wait()
+        return [RetrievedDoc(id="kyiv", text="Kyiv is the capital of Ukraine", score=1.0)]
+
+
+@pytest.mark.anyio
+async def test_concurrent_runs_share_one_computation():
+    retriever = GatedRetriever()
+    pipeline = FactPipeline(retriever=retriever)
+    shared = PIPELINE_COALESCED.labels("local")._value.get()
+
+    tasks = [asyncio.ensure_future(pipeline.arun("Kyiv capital")) for _ in range(50)]
+    await asyncio.sleep(0.01)
+    retriever.gate.set()
+    results = await asyncio.gather(*tasks)
+
+    assert set(results) == {"Kyiv is the capital of Ukraine."}
+    assert retriever.calls == 1
+    assert PIPELINE_COALESCED.labels("local")._value.get() == shared + 49
+    assert len(pipeline._flights) == 0
+
+
+@pytest.mark.anyio
+async def test_coalescing_can_be_disabled():
+    retriever = GatedRetriever()
+    retriever.gate.set()
+    pipeline = FactPipeline(retriever=retriever, coalesce=False)
+    await asyncio.gather(*(pipeline.arun("Kyiv") for _ in range(3)))
+    assert retriever.calls == 3
+
+
+@pytest.mark.anyio
+async def test_first_caller_cancellation_does_not_abort_others():
+    retriever = GatedRetriever()
+    pipeline = FactPipeline(retriever=retriever)
+
+    first = asyncio.ensure_future(pipeline.arun("Kyiv"))
+    await asyncio.sleep(0)
+    second = asyncio.ensure_future(pipeline.arun("Kyiv"))
+    await asyncio.sleep(0.01)
+    first.cancel()
+    await asyncio.sleep(0)
+    retriever.gate.set()
+
+    assert await second == "Kyiv is the capital of Ukraine."
+    assert first.cancelled()
+    assert retriever.calls == 1
+
+
+@pytest.mark.anyio
+async def test_work_cancelled_when_all_callers_leave():
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def work() -> str:
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return "never"
+
+    flights = SingleFlight()
+    callers = [asyncio.ensure_future(flights.do("k", work)) for _ in range(2)]
+    await started.wait()
+    for caller in callers:
+        caller.cancel()
+    await asyncio.gather(*callers, return_exceptions=True)
+    await asyncio.wait_for(cancelled.wait(), 1)
+    assert len(flights) == 0
+
+
+@pytest.mark.anyio
+async def test_errors_propagate_to_every_waiter():
+    calls = 0
+
+    async def boom() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise RuntimeError("failed")
+
+    flights = SingleFlight()
+    results = await asyncio.gather(
+        *(flights.do("k", boom) for _ in range(3)), return_exceptions=True
+    )
+    assert calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+@pytest.mark.anyio
+async def test_redis_coordinator_shares_result_across_workers():
+    client = fakeredis.aioredis.FakeRedis()
+    leader_gate = asyncio.Event()
+    calls = 0
+
+    async def compute() -> str:
+        nonlocal calls
+        calls += 1
+        await leader_gate.wait()
+        return "shared"
+
+    workers = [RedisSingleFlight(client, wait_timeout=2.0) for _ in range(3)]
+    tasks = [asyncio.ensure_future(worker.run("k", compute)) for worker in workers]
+    await asyncio.sleep(0.05)
+    leader_gate.set()
+
+    assert await asyncio.gather(*tasks) == ["shared"] * 3
+    assert calls == 1
+    assert await client.get("factsynth:flight:lock:k") is None
+
+
+@pytest.mark.anyio
+async def test_redis_followers_fall_back_when_leader_fails():
+    client = fakeredis.aioredis.FakeRedis()
+    calls = 0
+
+    async def compute() -> str:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            await asyncio.sleep(0.02)
+            raise RuntimeError("leader failed")
+        return "local"
+
+    leader = RedisSingleFlight(client, wait_timeout=2.0)
+    follower = RedisSingleFlight(client, wait_timeout=2.0)
+    first = asyncio.ensure_future(leader.run("k", compute))
+    await asyncio.sleep(0.005)
+    second = asyncio.ensure_future(follower.run("k", compute))
+
+    with pytest.raises(RuntimeError):
+        await first
+    assert await second == "local"
+    assert calls == 2
+
+
+@pytest.mark.anyio
+async def test_redis_leader_keeps_local_results():
+    client = fakeredis.aioredis.FakeRedis()
+    calls = 0
+
+    async def compute() -> str:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.02)
+        return LocalResult("partial") if calls == 1 else "complete"
+
+    leader = RedisSingleFlight(client, wait_timeout=2.0)
+    follower = RedisSingleFlight(client, wait_timeout=2.0)
+    first = asyncio.ensure_future(leader.run("k", compute))
+    await asyncio.sleep(0.005)
+    second = asyncio.ensure_future(follower.run("k", compute))
+
+    assert await first == "partial"
+    assert await second == "complete"
+    assert calls == 2
+
+
+@pytest.mark.anyio
+async def test_redis_release_keeps_lock_taken_over_by_another_leader():
+    client = fakeredis.aioredis.FakeRedis()
+    flight = RedisSingleFlight(client)
+    await client.set("factsynth:flight:lock:k", "other")
+
+    await flight._release("factsynth:flight:lock:k", "mine")
+
+    assert await client.get("factsynth:flight:lock:k") == b"other"
+
+
+@pytest.mark.anyio
+async def test_redis_followers_ignore_results_of_earlier_flights():
+    client = fakeredis.aioredis.FakeRedis()
+    leader = RedisSingleFlight(client, wait_timeout=2.0)
+    follower = RedisSingleFlight(client, wait_timeout=2.0)
+
+    async def old() -> str:
+        return "old"
+
+    assert await leader.run("k", old) == "old"
+    gate = asyncio.Event()
+    calls = 0
+
+    async def new() -> str:
+        nonlocal calls
+        calls += 1
+        await gate.wait()
+        return "new"
+
+    first = asyncio.ensure_future(leader.run("k", new))
+    await asyncio.sleep(0.01)
+    second = asyncio.ensure_future(follower.run("k", new))
+    await asyncio.sleep(0.05)
+    gate.set()
+
+    assert await asyncio.gather(first, second) == ["new", "new"]
+    assert calls == 1
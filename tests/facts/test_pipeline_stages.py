@@ -0,0 +1,76 @@
+"""Tests for per-stage pipeline timings and spans."""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+
+import pytest
+
+from facts import FactPipeline
+from factsynth_ultimate.core import tracing
+from factsynth_ultimate.core.metrics import PIPELINE_STAGE_SECONDS
+from factsynth_ultimate.services.retrievers.base import RetrievedDoc
+from factsynth_ultimate.services.retrievers.offload import OffloadedRetriever
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+STAGES = ("prepare", "search", "rank", "aggregate", "format")
+
+
+class StageRetriever:
+    def search(self, query: str, k: int = 5) -> list[RetrievedDoc]:
+        return [RetrievedDoc(id="kyiv", text="Kyiv is the capital of Ukraine", score=1.0)]
+
+    async def asearch(self, query: str, k: int = 5) -> list[RetrievedDoc]:
+        return self.search(query, k)
+
+
+def _count(stage: str) -> float:
+    histogram = PIPELINE_STAGE_SECONDS.labels(stage, "StageRetriever")
+    return next(
+        sample.value
+        for metric in histogram.collect()
+        for sample in metric.samples
+        if sample.name.endswith("_count")
+    )
+
+
+@pytest.mark.anyio
+async def test_each_stage_is_timed_per_retriever():
+    pipeline = FactPipeline(retriever=StageRetriever(), coalesce=False)
+    before = {stage: _count(stage) for stage in STAGES}
+
+    pipeline.run("Kyiv")
+    await pipeline.arun("Kyiv")
+
+    assert {stage: _count(stage) - before[stage] for stage in STAGES} == dict.fromkeys(
+        STAGES, 2
+    )
+
+
+@pytest.mark.anyio
+async def test_stages_open_spans_when_otel_enabled(monkeypatch):
+    spans: list[tuple[str, dict[str, str]]] = []
+
+    class RecordingTracer:
+        @contextmanager
+        def start_as_current_span(self, name, attributes=None):
+            spans.append((name, attributes))
+            yield
+
+    monkeypatch.setattr(tracing, "_tracer", RecordingTracer())
+    await FactPipeline(retriever=StageRetriever(), coalesce=False).arun("Kyiv")
+
+    assert [name for name, _ in spans] == [f"factsynth.pipeline.{stage}" for stage in STAGES]
+    assert all(attrs == {"factsynth.retriever": "StageRetriever"} for _, attrs in spans)
+
+
+def test_offloaded_retrievers_are_labelled_by_wrapped_type():
+    retriever = OffloadedRetriever(StageRetriever())
+    pipeline = FactPipeline(retriever=retriever, coalesce=False)
+    before = _count("search")
+    try:
+        pipeline.run("Kyiv")
+    finally:
+        retriever.close()
+    assert _count("search") - before == 1
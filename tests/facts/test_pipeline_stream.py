@@ -0,0 +1,200 @@
+"""Tests for incremental FactPipeline streaming."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+
+import pytest
+
+from facts import (
+    AggregationError,
+    FactPipeline,
+    MemoryResultCache,
+    NoFactsFoundError,
+    SearchError,
+    TopK,
+)
+from facts.pipeline import default_ranker
+from factsynth_ultimate.services.retrievers.base import RetrievedDoc
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+DOCS = [
+    RetrievedDoc(id="a", text="Kyiv is the capital of Ukraine", score=0.9),
+    RetrievedDoc(id="b", text="Kyiv stands on the Dnipro river", score=0.7),
+    RetrievedDoc(id="a", text="duplicate", score=0.5),
+    RetrievedDoc(id="c", text="Kyiv was founded in the fifth century", score=0.4),
+]
+
+
+class StreamingRetriever:
+    score_sorted = True
+
+    def __init__(self, docs: list[RetrievedDoc]) -> None:
+        self.docs = docs
+        self.released = asyncio.Event()
+        self.pulled = 0
+        self.closed = False
+
+    def search(self, query: str, k: int = 5) -> list[RetrievedDoc]:
+        return list(self.docs)
+
+    async def asearch(self, query: str, k: int = 5) -> list[RetrievedDoc]:
+        return list(self.docs)
+
+    async def astream(self, query: str, k: int = 5):
+        try:
+            for index, doc in enumerate(self.docs):
+                if index:
+                    await self.released.wait()
+                self.pulled += 1
+                yield doc
+        finally:
+            self.closed = True
+
+
+class ListRetriever:
+    def __init__(self, docs: list[RetrievedDoc]) -> None:
+        self.docs = docs
+
+    def search(self, query: str, k: int = 5) -> list[RetrievedDoc]:
+        return list(self.docs)
+
+    async def asearch(self, query: str, k: int = 5) -> list[RetrievedDoc]:
+        return list(self.docs)
+
+
+def test_top_k_matches_sorting_ranker():
+    rng = random.Random(7)
+    for _ in range(200):
+        docs = [
+            RetrievedDoc(id=str(rng.randrange(15)), text="t", score=rng.choice([0.1, 0.5, 0.9]))
+            for _ in range(rng.randrange(1, 40))
+        ]
+        limit = rng.randrange(1, 6)
+        top = TopK(limit)
+        for doc in docs:
+            top.push(doc)
+        assert top.results() == default_ranker(docs, limit)
+
+
+def test_top_k_tracks_threshold():
+    top = TopK(2)
+    top.push(RetrievedDoc(id="a", text="", score=0.2))
+    assert top.threshold is None
+    top.push(RetrievedDoc(id="b", text="", score=0.8))
+    top.push(RetrievedDoc(id="c", text="", score=0.5))
+    assert top.threshold == 0.5
+    assert len(top) == 2
+
+
+@pytest.mark.anyio
+async def test_astream_emits_first_sentence_before_retrieval_finishes():
+    retriever = StreamingRetriever(DOCS)
+    pipeline = FactPipeline(retriever=retriever, top_k=2)
+
+    stream = pipeline.astream("Kyiv")
+    first = await stream.__anext__()
+    assert first == "Kyiv is the capital of Ukraine."
+    assert retriever.pulled == 1
+
+    retriever.released.set()
+    rest = [fragment async for fragment in stream]
+    assert rest == ["Kyiv stands on the Dnipro river."]
+    assert retriever.pulled == 2
+    assert retriever.closed
+
+
+@pytest.mark.anyio
+async def test_astream_matches_arun_for_unsorted_retrievers():
+    shuffled = [DOCS[3], DOCS[2], DOCS[0], DOCS[1]]
+    pipeline = FactPipeline(retriever=ListRetriever(shuffled), top_k=3, coalesce=False)
+    fragments = [fragment async for fragment in pipeline.astream("Kyiv")]
+    assert " ".join(fragments) == await pipeline.arun("Kyiv")
+    assert len(fragments) == 3
+
+
+@pytest.mark.anyio
+async def test_astream_with_custom_aggregator_yields_whole_output():
+    pipeline = FactPipeline(
+        retriever=ListRetriever(DOCS),
+        aggregator=lambda docs: " / ".join(doc.id for doc in docs),
+    )
+    assert [fragment async for fragment in pipeline.astream("Kyiv")] == ["a / b / c."]
+
+
+@pytest.mark.anyio
+async def test_astream_errors():
+    with pytest.raises(NoFactsFoundError):
+        [f async for f in FactPipeline(retriever=ListRetriever([])).astream("Kyiv")]
+
+    blank = [RetrievedDoc(id="x", text="   ", score=1.0)]
+    with pytest.raises(AggregationError):
+        [f async for f in FactPipeline(retriever=ListRetriever(blank)).astream("Kyiv")]
+
+    class Broken(ListRetriever):
+        async def astream(self, query: str, k: int = 5):
+            yield DOCS[0]
+            raise ConnectionError("backend down")
+
+    with pytest.raises(SearchError):
+        [f async for f in FactPipeline(retriever=Broken(DOCS)).astream("Kyiv")]
+
+
+@pytest.mark.anyio
+async def test_astream_populates_and_serves_cache():
+    cache = MemoryResultCache()
+    pipeline = FactPipeline(retriever=ListRetriever(DOCS), top_k=2, cache=cache)
+    streamed = [fragment async for fragment in pipeline.astream("Kyiv")]
+    assert len(cache) == 1
+    assert [fragment async for fragment in pipeline.astream("Kyiv")] == [" ".join(streamed)]
+
+
+class CountingRetriever(ListRetriever):
+    def __init__(self, docs: list[RetrievedDoc]) -> None:
+        super().__init__(docs)
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def asearch(self, query: str, k: int = 5) -> list[RetrievedDoc]:
+        self.calls += 1
+        await self.release.wait()
+        return list(self.docs)
+
+
+@pytest.mark.anyio
+async def test_concurrent_astreams_share_one_retrieval():
+    retriever = CountingRetriever(DOCS)
+    pipeline = FactPipeline(retriever=retriever, top_k=2)
+
+    async def consume() -> list[str]:
+        return [fragment async for fragment in pipeline.astream("Kyiv")]
+
+    tasks = [asyncio.ensure_future(consume()) for _ in range(20)]
+    await asyncio.sleep(0)
+    retriever.release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert retriever.calls == 1
+    assert all(result == results[0] for result in results)
+    assert len(pipeline._streams) == 0
+
+
+@pytest.mark.anyio
+async def test_astream_and_arun_cache_separately():
+    docs = [
+        RetrievedDoc(id="a", text="Alpha fact", score=0.9),
+        RetrievedDoc(id="b", text="- Beta item", score=0.8),
+        RetrievedDoc(id="c", text="# Gamma", score=0.7),
+    ]
+    cache = MemoryResultCache()
+    pipeline = FactPipeline(retriever=ListRetriever(docs), top_k=3, cache=cache)
+
+    streamed = " ".join([fragment async for fragment in pipeline.astream("q")])
+    ran = await pipeline.arun("q")
+
+    assert pipeline.stream_cache_key("q") != pipeline.cache_key("q")
+    assert len(cache) == 2
+    assert await pipeline.arun("q") == ran
+    assert [fragment async for fragment in pipeline.astream("q")] == [streamed]
@@ -0,0 +1,105 @@
+"""Tests for offloading rank/aggregate/format work to a process pool."""
+
+from __future__ import annotations
+
+import os
+
+import pytest
+
+from facts import FactPipeline, NoFactsFoundError, ProcessingPool
+from facts.pipeline import default_aggregator, default_formatter, default_ranker
+from factsynth_ultimate.services.retrievers.base import RetrievedDoc
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+
+class ManyDocsRetriever:
+    def __init__(self, count: int) -> None:
+        self.docs = [
+            RetrievedDoc(id=str(i), text=f"Fact number {i} about # Kyiv", score=i / count)
+            for i in range(count)
+        ]
+
+    def search(self, query: str, k: int = 5) -> list[RetrievedDoc]:
+        return list(self.docs)
+
+    async def asearch(self, query: str, k: int = 5) -> list[RetrievedDoc]:
+        return list(self.docs)
+
+
+def _pid_formatter(text: str) -> str:
+    return f"{default_formatter(text)} pid={os.getpid()}"
+
+
+def _custom_ranker(docs, limit):
+    # Custom rankers receive every retrieved document, unlike the default one.
+    return default_ranker(docs, limit)
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = ProcessingPool(1, min_docs=10)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.mark.anyio
+async def test_large_inputs_run_in_worker_with_same_output(pool):
+    assert len(await pool.start()) == 1
+    retriever = ManyDocsRetriever(50)
+    inline = FactPipeline(retriever=retriever, coalesce=False, ranker=_custom_ranker)
+    pooled = FactPipeline(
+        retriever=retriever, coalesce=False, processing_pool=pool, ranker=_custom_ranker
+    )
+    assert await pooled.arun("Kyiv") == await inline.arun("Kyiv")
+
+    pooled.formatter = _pid_formatter
+    output = await pooled.arun("Kyiv")
+    assert not output.endswith(f"pid={os.getpid()}")
+
+
+@pytest.mark.anyio
+async def test_small_inputs_and_unpicklable_callables_stay_inline(pool):
+    small = FactPipeline(
+        retriever=ManyDocsRetriever(3),
+        coalesce=False,
+        processing_pool=pool,
+        ranker=_custom_ranker,
+        formatter=_pid_formatter,
+    )
+    assert (await small.arun("Kyiv")).endswith(f"pid={os.getpid()}")
+
+    large = FactPipeline(
+        retriever=ManyDocsRetriever(50),
+        coalesce=False,
+        processing_pool=pool,
+        ranker=_custom_ranker,
+        formatter=lambda text: f"{default_formatter(text)} pid={os.getpid()}",
+    )
+    assert (await large.arun("Kyiv")).endswith(f"pid={os.getpid()}")
+
+
+def test_should_offload_thresholds():
+    pool = ProcessingPool(1, min_docs=10, min_chars=100)
+    fns = (default_ranker, default_aggregator, default_formatter)
+    short = [RetrievedDoc(id="a", text="x" * 10, score=1.0)]
+    long = [RetrievedDoc(id="a", text="x" * 200, score=1.0)]
+    assert not pool.should_offload(short, *fns)
+    assert pool.should_offload(long, *fns)
+    assert pool.should_offload(short * 10, *fns)
+
+
+@pytest.mark.anyio
+async def test_worker_errors_propagate(pool):
+    pipeline = FactPipeline(
+        retriever=ManyDocsRetriever(50),
+        coalesce=False,
+        processing_pool=pool,
+        ranker=_empty_ranker,
+    )
+    with pytest.raises(NoFactsFoundError):
+        await pipeline.arun("Kyiv")
+
+
+def _empty_ranker(docs, limit):
+    return []
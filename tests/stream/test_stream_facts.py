@@ -0,0 +1,66 @@
+"""Tests for incremental chunking in :func:`stream_facts`."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from factsynth_ultimate.stream import _chunk_text, _IncrementalChunker, stream_facts
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+SENTENCES = [
+    "Kyiv is the capital of Ukraine.",
+    "It stands on the Dnipro river.",
+    "Its founding dates back to the fifth century.",
+]
+
+
+@pytest.mark.parametrize("limit", [5, 12, 20, 80])
+def test_incremental_chunker_matches_whole_text_wrapping(limit):
+    chunker = _IncrementalChunker(limit)
+    chunks: list[str] = []
+    for sentence in SENTENCES:
+        chunks.extend(chunker.feed(sentence))
+    chunks.extend(chunker.flush())
+    assert chunks == _chunk_text(" ".join(SENTENCES), limit=limit)
+
+
+class SlowStreamingPipeline:
+    def __init__(self) -> None:
+        self.release = asyncio.Event()
+
+    async def arun(self, query: str) -> str:  # pragma: no cover - not used
+        raise AssertionError("arun should not be called")
+
+    async def astream(self, query: str):
+        yield SENTENCES[0]
+        await self.release.wait()
+        for sentence in SENTENCES[1:]:
+            yield sentence
+
+
+@pytest.mark.anyio
+async def test_stream_facts_emits_before_pipeline_finishes():
+    pipeline = SlowStreamingPipeline()
+    stream = stream_facts(pipeline, "Kyiv", chunk_size=12)
+    first = await asyncio.wait_for(stream.__anext__(), 1)
+    assert first.index == 0
+    assert first.text == "Kyiv is the"
+
+    pipeline.release.set()
+    rest = [chunk async for chunk in stream]
+    texts = [first.text, *(chunk.text for chunk in rest)]
+    assert texts == _chunk_text(" ".join(SENTENCES), limit=12)
+    assert [chunk.index for chunk in rest] == list(range(1, len(texts)))
+
+
+@pytest.mark.anyio
+async def test_stream_facts_resumes_with_streaming_pipeline():
+    pipeline = SlowStreamingPipeline()
+    pipeline.release.set()
+    chunks = [chunk async for chunk in stream_facts(pipeline, "Kyiv", chunk_size=12, start_at=3)]
+    expected = _chunk_text(" ".join(SENTENCES), limit=12)
+    assert [chunk.text for chunk in chunks] == expected[3:]
+    assert chunks[0].index == 3
@@ -0,0 +1,115 @@
+import json
+import time
+
+import pytest
+
+from factsynth_ultimate import cli
+from factsynth_ultimate.core import audit
+from factsynth_ultimate.core.audit import AuditLogWriter, AuditRecord, query_audit
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+
+@pytest.fixture(autouse=True)
+def _reset_writer():
+    audit.close_audit_log()
+    yield
+    audit.close_audit_log()
+
+
+def _records() -> list[AuditRecord]:
+    return [
+        AuditRecord("score", "10.0.0.1", org="acme", request_id="r1", ts=100.0),
+        AuditRecord("generate", "10.0.0.2", org="globex", request_id="r2", ts=200.0),
+        AuditRecord("score", "10.0.0.3", org="acme", request_id="r3", ts=300.0),
+        AuditRecord("feedback", "10.0.0.4", org=None, request_id=None, ts=400.0),
+    ]
+
+
+def test_writer_batches_until_flush(tmp_path):
+    writer = AuditLogWriter(tmp_path, batch_size=3, flush_interval=60.0)
+    records = _records()
+    writer.append(records[0])
+    writer.append(records[1])
+    assert writer.segment is None
+
+    writer.append(records[2])
+    assert writer.segment is not None
+    lines = writer.segment.read_bytes().splitlines()
+    assert [AuditRecord.from_json(line) for line in lines] == records[:3]
+
+    writer.append(records[3])
+    writer.close()
+    index = json.loads(writer.segment.with_name(
+        writer.segment.name.replace(".ndjson", ".idx.json")
+    ).read_text())
+    assert index["count"] == 4
+    assert index["min_ts"] == 100.0
+    assert index["max_ts"] == 400.0
+    assert index["orgs"] == {"acme": 2, "globex": 1, "": 1}
+    with pytest.raises(RuntimeError):
+        writer.append(records[0])
+
+
+def test_writer_flushes_stale_batch_without_further_appends(tmp_path):
+    writer = AuditLogWriter(tmp_path, batch_size=100, flush_interval=0.05)
+    record = _records()[0]
+    writer.append(record)
+    deadline = time.monotonic() + 5.0
+    while not list(query_audit(tmp_path)) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert list(query_audit(tmp_path)) == [record]
+    writer.close()
+
+
+def test_writer_rotates_segments(tmp_path):
+    writer = AuditLogWriter(tmp_path, batch_size=1, max_segment_bytes=1)
+    for record in _records():
+        writer.append(record)
+    writer.close()
+    assert len(list(tmp_path.glob("*.ndjson"))) == 4
+    assert list(query_audit(tmp_path)) == _records()
+
+
+def test_query_filters_by_org_action_and_time(tmp_path):
+    writer = AuditLogWriter(tmp_path, batch_size=2, max_segment_bytes=1)
+    for record in _records():
+        writer.append(record)
+    writer.close()
+
+    acme = list(query_audit(tmp_path, org="acme"))
+    assert [r.request_id for r in acme] == ["r1", "r3"]
+    assert [r.request_id for r in query_audit(tmp_path, action="generate")] == ["r2"]
+    window = list(query_audit(tmp_path, since=150.0, until=350.0))
+    assert [r.request_id for r in window] == ["r2", "r3"]
+    assert list(query_audit(tmp_path, org="initech")) == []
+    assert list(query_audit(tmp_path / "missing")) == []
+
+
+def test_audit_event_appends_structured_record(tmp_path):
+    audit.configure_audit_log(tmp_path, batch_size=1)
+    audit.audit_event("ws_connect", "127.0.0.1:1 org=qa", org="qa", request_id="abc")
+    audit.close_audit_log()
+
+    (record,) = list(query_audit(tmp_path))
+    assert record.action == "ws_connect"
+    assert record.org == "qa"
+    assert record.request_id == "abc"
+    assert record.ts > 0
+
+
+def test_cli_audit_query(tmp_path, capsys):
+    writer = AuditLogWriter(tmp_path)
+    for record in _records():
+        writer.append(record)
+    writer.close()
+
+    exit_code = cli.main(["audit", "query", str(tmp_path), "--org", "acme", "--limit", "1"])
+    assert exit_code == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])["request_id"] == "r1"
+
+    exit_code = cli.main(["audit", "query", str(tmp_path / "missing")])
+    assert exit_code == 2
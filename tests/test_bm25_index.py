@@ -0,0 +1,109 @@
+import json
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from factsynth_ultimate.cli import main as fsctl_main
+from factsynth_ultimate.services.retrievers.bm25 import BM25Retriever, create_bm25_retriever
+from factsynth_ultimate.services.retrievers.index import (
+    IndexFormatError,
+    MmapBM25Retriever,
+    build_index,
+)
+from factsynth_ultimate.services.retrievers.local import Fixture
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+FIXTURES = [
+    Fixture(id="kyiv", text="Kyiv is the capital of Ukraine"),
+    Fixture(id="київ", text="Київ є столицею України"),
+    Fixture(id="city", text="The capital city hosts the capital region capital offices"),
+    Fixture(id="lviv", text="Lviv is a city in western Ukraine"),
+    Fixture(id="empty", text=""),
+]
+
+
+def _write_corpus(path, fixtures):
+    path.write_text(
+        "\n".join(json.dumps({"id": fix.id, "text": fix.text}) for fix in fixtures) + "\n\n"
+    )
+
+
+@pytest.mark.parametrize("delta", [0.0, 1.0])
+@pytest.mark.parametrize("query", ["capital of Ukraine", "city", "столицею", "missing", ""])
+def test_mmap_index_matches_in_memory_retriever(tmp_path, query, delta):
+    build_index(FIXTURES, tmp_path / "idx")
+    memory = BM25Retriever(FIXTURES, delta=delta)
+    mapped = MmapBM25Retriever(tmp_path / "idx", delta=delta)
+
+    expected = memory.search(query, k=10)
+    found = mapped.search(query, k=10)
+
+    assert [(doc.id, doc.text) for doc in found] == [(doc.id, doc.text) for doc in expected]
+    assert [doc.score for doc in found] == pytest.approx([doc.score for doc in expected])
+    mapped.close()
+
+
+def test_cli_builds_index_from_jsonl(tmp_path, capsys):
+    corpus = tmp_path / "corpus.jsonl"
+    _write_corpus(corpus, FIXTURES)
+
+    exit_code = fsctl_main(["index", "build", str(corpus), "-o", str(tmp_path / "idx")])
+
+    assert exit_code == 0
+    assert "Indexed 5 documents" in capsys.readouterr().out
+    meta = json.loads((tmp_path / "idx" / "meta.json").read_text())
+    assert meta["format"] == "factsynth-bm25"
+    assert meta["version"] == 1
+    assert MmapBM25Retriever(tmp_path / "idx").search("Lviv", k=1)[0].id == "lviv"
+
+
+def test_cli_reports_invalid_corpus(tmp_path, capsys):
+    corpus = tmp_path / "corpus.jsonl"
+    corpus.write_text('{"id": "a", "text": "ok"}\n{"id": "b"}\n')
+
+    assert fsctl_main(["index", "build", str(corpus), "-o", str(tmp_path / "idx")]) == 2
+    assert "corpus.jsonl:2" in capsys.readouterr().err
+    assert fsctl_main(["index", "build", str(tmp_path / "nope"), "-o", str(tmp_path)]) == 2
+
+
+def test_incomplete_or_unknown_index_is_rejected(tmp_path):
+    with pytest.raises(IndexFormatError):
+        MmapBM25Retriever(tmp_path)
+
+    build_index(FIXTURES, tmp_path)
+    meta = json.loads((tmp_path / "meta.json").read_text())
+    (tmp_path / "meta.json").write_text(json.dumps({**meta, "version": 99}))
+    with pytest.raises(IndexFormatError, match="version 99"):
+        MmapBM25Retriever(tmp_path)
+
+
+def test_empty_corpus_index(tmp_path):
+    build_index([], tmp_path)
+
+    assert MmapBM25Retriever(tmp_path).search("anything") == []
+
+
+def test_factory_serves_configured_index(tmp_path, monkeypatch):
+    build_index(FIXTURES, tmp_path)
+    monkeypatch.setenv("RETRIEVER_INDEX_PATH", str(tmp_path))
+
+    retriever = create_bm25_retriever()
+
+    assert isinstance(retriever, MmapBM25Retriever)
+    assert retriever.search("Kyiv capital", k=1)[0].id == "kyiv"
+
+
+def test_open_time_does_not_depend_on_corpus_size(tmp_path):
+    fixtures = [Fixture(id=str(i), text=f"token{i % 997} shared words {i}") for i in range(20_000)]
+    build_index(fixtures, tmp_path)
+
+    started = time.perf_counter()
+    retriever = MmapBM25Retriever(tmp_path)
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.05
+    assert len(retriever) == 20_000
+    assert retriever.search("token5", k=3)[0].id == "5"
@@ -0,0 +1,111 @@
+import math
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from factsynth_ultimate.services.retrievers.bm25 import (
+    BM25Retriever,
+    BM25Scorer,
+    create_bm25_retriever,
+)
+from factsynth_ultimate.services.retrievers.local import Fixture
+from factsynth_ultimate.tokenization import tokenize
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+FIXTURES = [
+    Fixture(id="a", text="Kyiv is the capital of Ukraine"),
+    Fixture(id="b", text="The capital city hosts the capital region capital offices"),
+    Fixture(id="c", text="Lviv is a city in western Ukraine"),
+    Fixture(id="d", text="Coffee houses"),
+    Fixture(id="e", text=""),
+]
+
+
+def _reference(fixtures, query, *, k1=1.2, b=0.75, delta=0.0):
+    docs = [Counter(t.lower() for t in tokenize(fix.text)) for fix in fixtures]
+    avg = sum(sum(doc.values()) for doc in docs) / len(docs)
+    scores = {}
+    for fix, doc in zip(fixtures, docs):
+        score = 0.0
+        for term in dict.fromkeys(t.lower() for t in tokenize(query)):
+            tf = doc.get(term, 0)
+            if not tf:
+                continue
+            df = sum(1 for other in docs if term in other)
+            idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+            norm = k1 * (1 - b + b * sum(doc.values()) / avg)
+            score += idf * (tf * (k1 + 1) / (tf + norm) + delta)
+        if score > 0:
+            scores[fix.id] = score
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+@pytest.mark.parametrize("delta", [0.0, 1.0])
+@pytest.mark.parametrize("query", ["capital of Ukraine", "city", "Lviv coffee", "unknown"])
+def test_scores_match_reference_formula(query, delta):
+    retriever = BM25Retriever(FIXTURES, delta=delta)
+
+    found = [(doc.id, doc.score) for doc in retriever.search(query, k=10)]
+    expected = _reference(FIXTURES, query, delta=delta)
+
+    assert [doc_id for doc_id, _ in found] == [doc_id for doc_id, _ in expected]
+    assert [score for _, score in found] == pytest.approx([score for _, score in expected])
+
+
+def test_bm25_plus_lifts_long_matching_documents():
+    fixtures = [
+        Fixture(id="short", text="capital"),
+        Fixture(id="long", text="capital " + " ".join(f"filler{i}" for i in range(200))),
+        Fixture(id="other", text="nothing here"),
+    ]
+    plain = {doc.id: doc.score for doc in BM25Retriever(fixtures).search("capital")}
+    plus = {doc.id: doc.score for doc in BM25Retriever(fixtures, delta=1.0).search("capital")}
+
+    assert plus["long"] - plain["long"] == pytest.approx(plus["short"] - plain["short"])
+    assert plus["long"] > plain["long"]
+
+
+def test_top_k_is_ordered_with_ties_in_document_order():
+    fixtures = [Fixture(id=str(i), text="same words" if i % 2 else "other") for i in range(20)]
+    retriever = BM25Retriever(fixtures)
+
+    results = retriever.search("same", k=3)
+
+    assert [doc.id for doc in results] == ["1", "3", "5"]
+    assert retriever.search("same", k=0) == []
+
+
+@pytest.mark.anyio
+async def test_async_search_and_entry_point_factory():
+    retriever = create_bm25_retriever()
+
+    results = await retriever.asearch("alpha letter", k=2)
+
+    assert [doc.id for doc in results] == ["default"]
+    assert retriever.score_sorted
+
+
+def test_registered_as_entry_point():
+    pyproject = (Path(__file__).resolve().parents[1] / "pyproject.toml").read_text()
+    section = pyproject.split('[project.entry-points."factsynth_ultimate.retrievers"]')[1]
+
+    assert 'bm25 = "factsynth_ultimate.services.retrievers.bm25:create_bm25_retriever"' in section
+
+
+@pytest.mark.parametrize("options", [{"k1": -1}, {"b": 1.5}, {"delta": -0.1}])
+def test_invalid_parameters_are_rejected(options):
+    with pytest.raises(ValueError):
+        BM25Retriever(FIXTURES, **options)
+
+
+def test_scorer_subclass_missing_hooks_fails_on_creation():
+    class Partial(BM25Scorer):
+        def __len__(self):
+            return 0
+
+    with pytest.raises(TypeError, match="abstract"):
+        Partial()
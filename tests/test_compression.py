@@ -0,0 +1,93 @@
+from http import HTTPStatus
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.responses import StreamingResponse
+from httpx import ASGITransport, AsyncClient
+
+from factsynth_ultimate.core import compression
+from factsynth_ultimate.core.compression import compressed_route, negotiate_encoding
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        (None, None),
+        ("", None),
+        ("gzip", "gzip"),
+        ("deflate, gzip;q=0.5", "gzip"),
+        ("gzip;q=0", None),
+        ("*", "gzip"),
+        ("*;q=0.1, gzip;q=0", None),
+        ("identity", None),
+    ],
+)
+def test_negotiate_encoding(header, expected):
+    assert negotiate_encoding(header, {"gzip": compression._gzip}) == expected
+
+
+def test_negotiate_prefers_server_order_on_ties():
+    encodings = {"br": compression._gzip, "gzip": compression._gzip}
+    assert negotiate_encoding("gzip, br", encodings) == "br"
+    assert negotiate_encoding("gzip, br;q=0.5", encodings) == "gzip"
+
+
+def _app(**overrides) -> FastAPI:
+    router = APIRouter(route_class=compressed_route(**overrides))
+
+    @router.get("/big")
+    def big() -> dict[str, list[float]]:
+        return {"values": [i / 7 for i in range(2000)]}
+
+    @router.get("/small")
+    def small() -> dict[str, str]:
+        return {"status": "ok"}
+
+    @router.get("/stream")
+    def stream() -> StreamingResponse:
+        return StreamingResponse(iter(["data: x\n\n"] * 500), media_type="text/event-stream")
+
+    app = FastAPI()
+    app.include_router(router)
+    return app
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("offload_size", [0, 10**9])
+async def test_large_bodies_are_gzipped(offload_size):
+    transport = ASGITransport(app=_app(offload_size=offload_size))
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/big", headers={"accept-encoding": "gzip"})
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert len(response.json()["values"]) == 2000
+
+
+@pytest.mark.anyio
+async def test_small_streaming_and_identity_responses_untouched():
+    transport = ASGITransport(app=_app())
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        small = await client.get("/small", headers={"accept-encoding": "gzip"})
+        stream = await client.get("/stream", headers={"accept-encoding": "gzip"})
+        identity = await client.get("/big", headers={"accept-encoding": "identity"})
+    assert "content-encoding" not in small.headers
+    assert "content-encoding" not in stream.headers
+    assert "content-encoding" not in identity.headers
+
+
+def test_compressed_route_rejects_unknown_options():
+    with pytest.raises(TypeError):
+        compressed_route(threshold=10)
+
+
+@pytest.mark.anyio
+async def test_score_batch_is_compressed(client, base_headers):
+    items = [{"text": f"payload number {i}"} for i in range(200)]
+    headers = {**base_headers, "accept-encoding": "gzip"}
+    response = await client.post("/v1/score/batch", headers=headers, json={"items": items})
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.json()["count"] == 200
@@ -0,0 +1,158 @@
+import asyncio
+
+import pytest
+
+from facts import FactPipeline
+from factsynth_ultimate.core.metrics import RETRIEVER_OUTCOMES
+from factsynth_ultimate.services.retrievers.base import PartialResults, RetrievedDoc, is_partial
+from factsynth_ultimate.services.retrievers.fanout import (
+    FanoutRetriever,
+    normalized_score_fusion,
+    reciprocal_rank_fusion,
+)
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+
+def _doc(doc_id: str, score: float) -> RetrievedDoc:
+    return RetrievedDoc(id=doc_id, text=f"{doc_id} text", score=score)
+
+
+class Backend:
+    def __init__(self, docs, *, delays=(0.0,), error=None):
+        self.docs = docs
+        self.delays = list(delays)
+        self.error = error
+        self.calls = 0
+        self.closed = False
+
+    def search(self, query, k=5):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return list(self.docs)
+
+    async def asearch(self, query, k=5):
+        delay = self.delays[min(self.calls, len(self.delays) - 1)]
+        self.calls += 1
+        await asyncio.sleep(delay)
+        if self.error:
+            raise self.error
+        return list(self.docs)
+
+    async def aclose(self):
+        self.closed = True
+
+
+class PartialBackend(Backend):
+    async def asearch(self, query, k=5):
+        return PartialResults(await super().asearch(query, k))
+
+
+def _outcome(backend, outcome):
+    return RETRIEVER_OUTCOMES.labels(backend, outcome)._value.get()
+
+
+def test_reciprocal_rank_fusion_rewards_consensus():
+    fused = reciprocal_rank_fusion(
+        {
+            "lexical": [_doc("a", 9.0), _doc("b", 5.0), _doc("c", 1.0)],
+            "vector": [_doc("b", 0.9), _doc("c", 0.8)],
+        },
+        k=60,
+    )
+    assert [doc.id for doc in fused] == ["b", "c", "a"]
+    assert fused[0].score == pytest.approx(1 / 62 + 1 / 61)
+
+
+def test_normalized_fusion_respects_weights():
+    rankings = {
+        "lexical": [_doc("a", 10.0), _doc("b", 0.0)],
+        "vector": [_doc("b", 0.9), _doc("a", 0.1)],
+    }
+    assert normalized_score_fusion(rankings)[0].score == pytest.approx(1.0)
+    weighted = normalized_score_fusion(rankings, weights={"vector": 2.0})
+    assert [doc.id for doc in weighted] == ["b", "a"]
+
+
+@pytest.mark.anyio
+async def test_fanout_drops_stragglers_and_failures():
+    fast = Backend([_doc("a", 1.0), _doc("b", 0.5)])
+    slow = Backend([_doc("z", 1.0)], delays=(5.0,))
+    broken = Backend([], error=ConnectionError("down"))
+    retriever = FanoutRetriever(
+        {"fast": fast, "slow": slow, "broken": broken}, deadline=0.05
+    )
+    timeouts = _outcome("slow", "timeout")
+    errors = _outcome("broken", "error")
+
+    docs = await retriever.asearch("q", k=5)
+
+    assert [doc.id for doc in docs] == ["a", "b"]
+    assert docs.partial
+    assert _outcome("slow", "timeout") == timeouts + 1
+    assert _outcome("broken", "error") == errors + 1
+
+
+@pytest.mark.anyio
+async def test_fanout_keeps_partial_flag_of_backends():
+    complete = FanoutRetriever({"one": Backend([_doc("b", 1.0)])})
+    mixed = FanoutRetriever(
+        {"one": Backend([_doc("b", 1.0)]), "two": PartialBackend([_doc("a", 1.0)])}
+    )
+
+    assert not is_partial(await complete.asearch("q"))
+    assert is_partial(await mixed.asearch("q"))
+
+
+@pytest.mark.anyio
+async def test_fanout_hedges_slow_backends():
+    flaky = Backend([_doc("a", 1.0)], delays=(5.0, 0.0))
+    retriever = FanoutRetriever({"flaky": flaky}, deadline=0.5, hedge_after=0.02)
+    hedged = _outcome("flaky", "hedged")
+
+    docs = await retriever.asearch("q")
+
+    assert [doc.id for doc in docs] == ["a"]
+    assert flaky.calls == 2
+    assert _outcome("flaky", "hedged") == hedged + 1
+
+
+@pytest.mark.anyio
+async def test_fanout_raises_when_no_backend_answers():
+    retriever = FanoutRetriever(
+        [Backend([], error=ConnectionError("down")), Backend([], delays=(5.0,))],
+        deadline=0.02,
+    )
+    with pytest.raises(RuntimeError):
+        await retriever.asearch("q")
+    timed_out = FanoutRetriever([Backend([], delays=(5.0,))], deadline=0.02)
+    with pytest.raises(TimeoutError):
+        await timed_out.asearch("q")
+
+
+def test_fanout_sync_search_fuses_backends():
+    retriever = FanoutRetriever(
+        {"one": Backend([_doc("a", 1.0)]), "two": Backend([_doc("b", 1.0), _doc("a", 0.5)])}
+    )
+    assert [doc.id for doc in retriever.search("q")] == ["a", "b"]
+
+
+@pytest.mark.anyio
+async def test_pipeline_uses_fused_results():
+    one, two = Backend([_doc("a", 1.0)]), Backend([_doc("a", 0.2), _doc("b", 0.1)])
+    retriever = FanoutRetriever({"one": one, "two": two})
+    pipeline = FactPipeline(retriever=retriever, top_k=2)
+    assert await pipeline.arun("q") == "a text. b text."
+    assert retriever.cache_id == "fanout[rrf](one,two)"
+    await retriever.aclose()
+    assert one.closed and two.closed
+
+
+def test_fanout_validates_options():
+    with pytest.raises(ValueError):
+        FanoutRetriever([])
+    with pytest.raises(ValueError):
+        FanoutRetriever([Backend([])], fusion="borda")
+    with pytest.raises(ValueError):
+        FanoutRetriever([Backend([])], deadline=1.0, hedge_after=2.0)
@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+
+from facts import FactPipeline
+from factsynth_ultimate.services.retrievers.base import RetrievedDoc
+from factsynth_ultimate.services.retrievers.fanout import FanoutRetriever
+from factsynth_ultimate.services.retrievers.hybrid import HybridRetriever, fusion_context
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+
+def _doc(doc_id: str, score: float) -> RetrievedDoc:
+    return RetrievedDoc(id=doc_id, text=f"{doc_id} text", score=score)
+
+
+class Side:
+    def __init__(self, docs, *, delay=0.0, blocking=None):
+        self.docs = docs
+        self.delay = delay
+        self.calls = []
+        self.closed = False
+        if blocking is not None:
+            self.blocking = blocking
+
+    def search(self, query, k=5):
+        self.calls.append(k)
+        return list(self.docs)[:k]
+
+    async def asearch(self, query, k=5):
+        self.calls.append(k)
+        await asyncio.sleep(self.delay)
+        return list(self.docs)[:k]
+
+    def close(self):
+        self.closed = True
+
+
+def _ids(docs):
+    return [doc.id for doc in docs]
+
+
+def test_fuses_with_weighted_rrf_and_calibrates_scores():
+    lexical = Side([_doc("a", 9.0), _doc("b", 5.0), _doc("c", 1.0)])
+    dense = Side([_doc("a", 0.9), _doc("c", 0.8), _doc("d", 0.7)])
+    retriever = HybridRetriever(lexical, dense)
+
+    docs = retriever.search("q", k=3)
+
+    assert _ids(docs) == ["a", "c", "b"]
+    assert docs[0].score == pytest.approx(1.0)
+    assert all(0 < doc.score <= 1 for doc in docs)
+    assert lexical.calls == [9] and dense.calls == [9]
+
+
+@pytest.mark.anyio
+async def test_sides_run_concurrently():
+    lexical = Side([_doc("a", 1.0)], delay=0.1)
+    dense = Side([_doc("b", 1.0)], delay=0.1)
+    retriever = HybridRetriever(lexical, dense, weights={"dense": 2.0})
+
+    started = asyncio.get_running_loop().time()
+    docs = await retriever.asearch("q", k=2)
+
+    assert asyncio.get_running_loop().time() - started < 0.19
+    assert _ids(docs) == ["b", "a"]
+
+
+@pytest.mark.anyio
+async def test_blocking_side_runs_in_executor():
+    lexical = Side([_doc("a", 1.0)], blocking=True)
+    dense = Side([_doc("b", 1.0)])
+    docs = await HybridRetriever(lexical, dense).asearch("q", k=2)
+    assert set(_ids(docs)) == {"a", "b"}
+
+
+@pytest.mark.anyio
+async def test_request_and_tenant_weights_override_defaults():
+    lexical = Side([_doc("a", 1.0)])
+    dense = Side([_doc("b", 1.0)])
+    retriever = HybridRetriever(
+        lexical, dense, weights={"lexical": 2.0}, tenant_weights={"acme": {"dense": 3.0}}
+    )
+
+    assert _ids(await retriever.asearch("q", k=2)) == ["a", "b"]
+    default_key = retriever.cache_id
+    with fusion_context(tenant="acme"):
+        assert retriever.resolve_weights() == {"lexical": 2.0, "dense": 3.0}
+        assert _ids(await retriever.asearch("q", k=2)) == ["b", "a"]
+        assert retriever.cache_id != default_key
+        with fusion_context(tenant="acme", weights={"dense": 0.0}):
+            assert _ids(await retriever.asearch("q", k=2)) == ["a"]
+    assert retriever.cache_id == default_key
+
+    with pytest.raises(ValueError, match="unknown fusion sides"):
+        with fusion_context(weights={"sparse": 1.0}):
+            pass
+
+
+@pytest.mark.anyio
+async def test_confident_lexical_results_skip_dense():
+    lexical = Side([_doc("a", 12.0), _doc("b", 11.0), _doc("c", 2.0)])
+    dense = Side([_doc("z", 0.9)])
+    retriever = HybridRetriever(lexical, dense, lexical_confidence=10.0)
+
+    docs = await retriever.asearch("q", k=2)
+    assert _ids(docs) == ["a", "b"]
+    assert docs[0].score == pytest.approx(1.0)
+    assert dense.calls == []
+
+    assert "z" in _ids(await retriever.asearch("q", k=3))
+    assert dense.calls == [9]
+    assert _ids(retriever.search("q", k=2)) == ["a", "b"]
+    assert dense.calls == [9]
+
+
+@pytest.mark.anyio
+async def test_pipeline_and_fanout_cache_keys_follow_weights():
+    retriever = HybridRetriever(Side([_doc("a", 1.0)]), Side([_doc("b", 1.0)]))
+    pipeline = FactPipeline(retriever=FanoutRetriever({"hybrid": retriever}), top_k=1)
+
+    assert await pipeline.arun("q") in {"a text.", "b text."}
+    with fusion_context(weights={"dense": 5.0}):
+        assert await pipeline.arun("q") == "b text."
+        weighted = pipeline.cache_key("q")
+    assert pipeline.cache_key("q") != weighted
+
+    await retriever.aclose()
+    assert all(side.closed for side in retriever.sides.values())
@@ -0,0 +1,77 @@
+import json
+import re
+
+import pytest
+
+from factsynth_ultimate.services.lexicon import DEFAULT_LEXICON, Lexicon, _trie_pattern
+from factsynth_ultimate.services.retrievers.local import Fixture, LocalFixtureRetriever
+from factsynth_ultimate.tokenization import tokenize
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+
+def _reference(entries, text):
+    # The per-entry substitution loop the lexicon replaces.
+    out = text.lower()
+    for source, target in sorted(entries.items(), key=lambda item: -len(item[0])):
+        out = re.sub(rf"\b{re.escape(source)}\b", target, out)
+    return out
+
+
+def test_translate_matches_per_entry_substitution():
+    entries = {f"слово{i}": f"word{i}" for i in range(2000)}
+    entries.update({"хмара": "cloud", "штучний інтелект": "artificial intelligence"})
+    lexicon = Lexicon(entries)
+    text = "Слово17 і слово1999, хмара та штучний інтелект; слово170x"
+
+    assert lexicon.translate(text) == _reference(entries, text)
+    assert len(lexicon) == 2002
+    assert "ХМАРА" in lexicon and "дощ" not in lexicon
+
+
+def test_longest_phrase_wins_and_words_stay_whole():
+    lexicon = Lexicon({"машинне": "machine", "машинне навчання": "machine learning"})
+    assert lexicon.translate("машинне навчання") == "machine learning"
+    assert lexicon.translate("машинне") == "machine"
+    assert lexicon.translate("машинненавчання") == "машинненавчання"
+    assert re.fullmatch(_trie_pattern(["ab", "abc", "ad"]), "abc")
+
+
+def test_translate_tokens_handles_words_and_phrases():
+    lexicon = Lexicon({"хмара": "cloud", "штучний інтелект": "artificial intelligence"})
+    tokens = tokenize("Штучний інтелект у хмара сервісах")
+    assert lexicon.translate_tokens(tokens) == [
+        "artificial",
+        "intelligence",
+        "у",
+        "cloud",
+        "сервісах",
+    ]
+
+
+@pytest.mark.parametrize(
+    "name, body",
+    [
+        ("lexicon.json", json.dumps({"дощ": "rain"})),
+        ("lexicon.yaml", "дощ: rain\n"),
+        ("lexicon.tsv", "# UA\tEN\nдощ\train\n"),
+    ],
+)
+def test_load_formats(tmp_path, name, body):
+    path = tmp_path / name
+    path.write_text(body, encoding="utf-8")
+    assert Lexicon.load(path).translate("Дощ") == "rain"
+
+
+def test_load_rejects_malformed_tsv(tmp_path):
+    path = tmp_path / "lexicon.tsv"
+    path.write_text("дощ rain\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="lexicon.tsv:1"):
+        Lexicon.load(path)
+
+
+def test_retriever_uses_custom_lexicon():
+    fixtures = [Fixture(id="rain", text="Rain in spring"), Fixture(id="sun", text="Sunny day")]
+    retriever = LocalFixtureRetriever(fixtures, lexicon=Lexicon({"дощ": "rain"}))
+    assert retriever.search("Дощ", k=1)[0].id == "rain"
+    assert LocalFixtureRetriever(fixtures).lexicon is DEFAULT_LEXICON
@@ -1,9 +1,12 @@
+import random
+
 import pytest
 
 from factsynth_ultimate.services.retrievers.local import (
     Fixture,
     LocalFixtureRetriever,
 )
+from factsynth_ultimate.tokenization import tokenize
 
 
 @pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
@@ -51,3 +54,47 @@ def test_ukrainian_keywords_translated(query, expected_id, expected_translation)
     top_doc = results[0]
     assert top_doc.id == expected_id
     assert top_doc.score > 0
+
+
+def _brute_force(retriever, query, k):
+    q_tokens = {t.lower() for t in tokenize(retriever._translate_query(query))}
+    results = []
+    for fix in retriever.fixtures:
+        f_tokens = {t.lower() for t in tokenize(fix.text)}
+        union = q_tokens | f_tokens
+        score = len(q_tokens & f_tokens) / len(union) if union else 0.0
+        results.append((fix.id, score))
+    results.sort(key=lambda item: item[1], reverse=True)
+    return results[:k]
+
+
+@pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+def test_indexed_search_matches_full_scan():
+    rng = random.Random(41)
+    words = ["cloud", "alpha", "beta", "service", "мікросервіс", "data", "node", "graph"]
+    fixtures = [
+        Fixture(id=f"f{i}", text=" ".join(rng.choices(words, k=rng.randint(0, 6))))
+        for i in range(300)
+    ]
+    retriever = LocalFixtureRetriever(fixtures)
+
+    for query in ["cloud data", "Що таке хмара?", "graph node beta", "", "unknown", "ALPHA"]:
+        for k in (1, 5, 40, 400):
+            found = [(doc.id, doc.score) for doc in retriever.search(query, k=k)]
+            assert found == _brute_force(retriever, query, k)
+
+
+@pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+def test_zero_score_fixtures_fill_remaining_slots_in_order():
+    fixtures = [
+        Fixture(id="a", text="red apple"),
+        Fixture(id="b", text="green pear"),
+        Fixture(id="c", text="apple pie"),
+        Fixture(id="d", text="blue plum"),
+    ]
+    retriever = LocalFixtureRetriever(fixtures)
+
+    results = retriever.search("apple", k=3)
+
+    assert [(doc.id, doc.score) for doc in results] == [("a", 0.5), ("c", 0.5), ("b", 0.0)]
+    assert retriever.search("apple", k=0) == []
@@ -0,0 +1,67 @@
+import asyncio
+import logging
+import time
+
+import anyio.to_thread
+import pytest
+
+from factsynth_ultimate.core.loop_monitor import LoopMonitor
+from factsynth_ultimate.core.metrics import (
+    EVENT_LOOP_STALLS,
+    THREADPOOL_ACTIVE,
+    THREADPOOL_CAPACITY,
+)
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+
+def _blocking_handler() -> None:
+    time.sleep(0.3)
+
+
+@pytest.mark.anyio
+async def test_monitor_logs_stack_of_blocking_code(caplog):
+    monitor = LoopMonitor(interval=0.02, threshold=0.1)
+    stalls_before = EVENT_LOOP_STALLS._value.get()
+    with caplog.at_level(logging.WARNING, logger="factsynth_ultimate.core.loop_monitor"):
+        monitor.start()
+        try:
+            await asyncio.sleep(0.05)
+            _blocking_handler()
+            await asyncio.sleep(0.05)
+        finally:
+            await monitor.stop()
+
+    assert not monitor.running
+    assert EVENT_LOOP_STALLS._value.get() > stalls_before
+    blocked = [r for r in caplog.records if "Event loop blocked" in r.getMessage()]
+    assert blocked, "watchdog did not report the stall"
+    assert "_blocking_handler" in blocked[0].getMessage()
+
+
+@pytest.mark.anyio
+async def test_monitor_samples_threadpool():
+    monitor = LoopMonitor(interval=0.01, threshold=1.0)
+    release = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    def worker() -> None:
+        asyncio.run_coroutine_threadsafe(release.wait(), loop).result()
+
+    monitor.start()
+    try:
+        task = asyncio.ensure_future(anyio.to_thread.run_sync(worker))
+        await asyncio.sleep(0.05)
+        assert THREADPOOL_ACTIVE._value.get() >= 1
+        assert THREADPOOL_CAPACITY._value.get() > 0
+        release.set()
+        await task
+    finally:
+        await monitor.stop()
+
+
+def test_monitor_rejects_invalid_intervals():
+    with pytest.raises(ValueError):
+        LoopMonitor(interval=0)
+    with pytest.raises(ValueError):
+        LoopMonitor(threshold=0)
@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from factsynth_ultimate.core import metrics
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+WORKER = """
+from factsynth_ultimate.core.metrics import SSE_TOKENS, UP
+SSE_TOKENS.inc(3)
+UP.set(1)
+"""
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    metrics.clear_metrics_cache()
+    yield
+    metrics.clear_metrics_cache()
+
+
+def _run_worker(directory) -> None:
+    env = {**os.environ, metrics.MULTIPROC_ENV: str(directory)}
+    subprocess.run([sys.executable, "-c", WORKER], env=env, check=True)
+
+
+def test_metrics_aggregate_across_workers(tmp_path, monkeypatch):
+    _run_worker(tmp_path)
+    _run_worker(tmp_path)
+    assert len(list(tmp_path.glob("counter_*.db"))) == 2
+    assert len(list(tmp_path.glob("gauge_livemax_*.db"))) == 2
+
+    monkeypatch.setenv(metrics.MULTIPROC_ENV, str(tmp_path))
+    text = metrics.metrics_bytes().decode()
+    assert "factsynth_sse_tokens_total 6.0" in text
+    assert "factsynth_up 1.0" in text
+
+
+def test_mark_worker_dead_removes_live_gauges(tmp_path, monkeypatch):
+    monkeypatch.setenv(metrics.MULTIPROC_ENV, str(tmp_path))
+    live = tmp_path / "gauge_livemax_4242.db"
+    live.write_bytes(b"")
+    metrics.mark_worker_dead(4242)
+    assert not live.exists()
+
+
+def test_mark_worker_dead_noop_without_multiprocess(monkeypatch):
+    monkeypatch.delenv(metrics.MULTIPROC_ENV, raising=False)
+    metrics.mark_worker_dead()
+
+
+def test_metrics_cached_within_ttl(monkeypatch):
+    monkeypatch.delenv(metrics.MULTIPROC_ENV, raising=False)
+    first = metrics.metrics_bytes(max_age=60.0)
+    metrics.SSE_TOKENS.inc()
+    assert metrics.metrics_bytes(max_age=60.0) is first
+    assert metrics.metrics_bytes() != first
+    metrics.clear_metrics_cache()
+    assert metrics.metrics_bytes(max_age=60.0) is not first
@@ -0,0 +1,147 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from factsynth_ultimate.core.metrics import RETRIEVER_QUEUE_TIME, RETRIEVER_REJECTED
+from factsynth_ultimate.services.retrievers.base import RetrievedDoc
+from factsynth_ultimate.services.retrievers.local import (
+    Fixture,
+    LocalFixtureRetriever,
+    create_fixture_retriever,
+)
+from factsynth_ultimate.services.retrievers.offload import (
+    OffloadedRetriever,
+    RetrieverBusyError,
+    is_blocking,
+    offload_blocking,
+)
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+
+class SleepyRetriever:
+    def __init__(self, delay: float = 0.1) -> None:
+        self.delay = delay
+        self.release = threading.Event()
+        self.release.set()
+
+    def search(self, query, k=5):
+        self.release.wait(5)
+        time.sleep(self.delay)
+        return [RetrievedDoc(id="a", text=query, score=1.0)]
+
+
+class AsyncRetriever:
+    async def asearch(self, query, k=5):
+        return []
+
+    def search(self, query, k=5):
+        return []
+
+
+def _samples(metric, label, suffix):
+    return next(
+        sample.value
+        for family in metric.labels(label).collect()
+        for sample in family.samples
+        if sample.name.endswith(suffix)
+    )
+
+
+def test_blocking_detection():
+    assert is_blocking(SleepyRetriever())
+    assert is_blocking(create_fixture_retriever())
+    assert not is_blocking(AsyncRetriever())
+    async_retriever = AsyncRetriever()
+    assert offload_blocking(async_retriever) is async_retriever
+    wrapped = offload_blocking(SleepyRetriever())
+    assert isinstance(wrapped, OffloadedRetriever)
+    assert offload_blocking(wrapped) is wrapped
+
+
+@pytest.mark.anyio
+async def test_offloaded_search_keeps_event_loop_responsive():
+    retriever = OffloadedRetriever(SleepyRetriever(0.1), name="sleepy")
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.005)
+            ticks += 1
+
+    observed = _samples(RETRIEVER_QUEUE_TIME, "sleepy", "_count")
+    task = asyncio.ensure_future(ticker())
+    try:
+        docs = await retriever.asearch("query")
+    finally:
+        task.cancel()
+        retriever.close()
+
+    assert [doc.text for doc in docs] == ["query"]
+    assert ticks >= 5
+    assert _samples(RETRIEVER_QUEUE_TIME, "sleepy", "_count") == observed + 1
+
+
+@pytest.mark.anyio
+async def test_back_pressure_rejects_when_queue_stays_full():
+    blocked = SleepyRetriever(0.0)
+    blocked.release.clear()
+    retriever = OffloadedRetriever(
+        blocked, max_workers=1, max_pending=1, queue_timeout=0.05, name="busy"
+    )
+    rejected = RETRIEVER_REJECTED.labels("busy")._value.get()
+
+    first = asyncio.ensure_future(retriever.asearch("one"))
+    await asyncio.sleep(0.01)
+    with pytest.raises(RetrieverBusyError):
+        await retriever.asearch("two")
+    blocked.release.set()
+    assert [doc.text for doc in await first] == ["one"]
+    assert RETRIEVER_REJECTED.labels("busy")._value.get() == rejected + 1
+    retriever.close()
+
+
+@pytest.mark.anyio
+async def test_process_pool_offload():
+    fixtures = [Fixture(id="cloud", text="cloud platforms scale")]
+    retriever = OffloadedRetriever(LocalFixtureRetriever(fixtures), kind="process", max_workers=1)
+    try:
+        docs = await retriever.asearch("хмара", k=1)
+    finally:
+        await retriever.aclose()
+    assert [doc.id for doc in docs] == ["cloud"]
+    assert retriever.score_sorted
+    assert retriever.cache_id.endswith("LocalFixtureRetriever")
+
+
+PICKLED = []
+
+
+class PickleCountingRetriever(LocalFixtureRetriever):
+    def __getstate__(self):
+        PICKLED.append(1)
+        return self.__dict__
+
+
+@pytest.mark.anyio
+async def test_process_pool_installs_retriever_once_per_worker():
+    fixtures = [Fixture(id="cloud", text="cloud platforms scale")]
+    PICKLED.clear()
+    retriever = OffloadedRetriever(PickleCountingRetriever(fixtures), kind="process", max_workers=1)
+    try:
+        for _ in range(5):
+            docs = await retriever.asearch("cloud", k=1)
+    finally:
+        await retriever.aclose()
+    assert [doc.id for doc in docs] == ["cloud"]
+    assert len(PICKLED) == 1
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError):
+        OffloadedRetriever(SleepyRetriever(), kind="fiber")
+    with pytest.raises(ValueError):
+        OffloadedRetriever(SleepyRetriever(), max_pending=0)
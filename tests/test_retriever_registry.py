@@ -0,0 +1,150 @@
+import asyncio
+from importlib import metadata
+
+import pytest
+from fastapi.testclient import TestClient
+
+from factsynth_ultimate.api.v1 import generate
+from factsynth_ultimate.app import create_app
+from factsynth_ultimate.services.evaluator import evaluate_claim
+from factsynth_ultimate.services.retrievers import registry as registry_module
+from factsynth_ultimate.services.retrievers.base import RetrievedDoc
+from factsynth_ultimate.services.retrievers.registry import RetrieverRegistry, get_registry
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+CREATED = []
+
+
+class CountingRetriever:
+    def __init__(self):
+        self.closed = 0
+        CREATED.append(self)
+
+    def search(self, query, k=5):
+        return [RetrievedDoc(id="counted", text="counted text", score=1.0)]
+
+    async def asearch(self, query, k=5):
+        return self.search(query, k=k)
+
+    def close(self):
+        self.closed += 1
+
+    async def aclose(self):
+        self.close()
+
+
+def create_counting_retriever():
+    return CountingRetriever()
+
+
+@pytest.fixture
+def counting_entry_point(monkeypatch):
+    ep = metadata.EntryPoint(
+        name="counting",
+        value=f"{__name__}:create_counting_retriever",
+        group=registry_module.RETRIEVER_GROUP,
+    )
+    scans = []
+
+    def fake_scan(group):
+        scans.append(group)
+        return [ep]
+
+    monkeypatch.setattr(registry_module, "_scan_entry_points", fake_scan)
+    CREATED.clear()
+    return scans
+
+
+def test_acquire_shares_instance_and_closes_on_last_release(counting_entry_point):
+    registry = RetrieverRegistry()
+
+    first = registry.acquire("counting")
+    second = registry.acquire("counting")
+
+    assert first is second
+    assert len(CREATED) == 1
+    assert registry.refcount("counting") == 2
+    registry.release("counting")
+    assert first.closed == 0
+    registry.release("counting")
+    assert first.closed == 1
+    assert registry.loaded() == []
+
+    with registry.lease("counting") as third:
+        assert third is not first
+    assert counting_entry_point == [registry_module.RETRIEVER_GROUP]
+    with pytest.raises(KeyError):
+        registry.release("counting")
+
+
+def test_unknown_retriever_rescans_once(counting_entry_point):
+    registry = RetrieverRegistry()
+    with pytest.raises(LookupError, match="'missing' not found"):
+        registry.acquire("missing")
+    assert len(counting_entry_point) == 2
+
+
+def test_concurrent_acquire_loads_once(counting_entry_point):
+    registry = RetrieverRegistry()
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(
+            *(loop.run_in_executor(None, registry.acquire, "counting") for _ in range(8))
+        )
+
+    instances = asyncio.run(main())
+    assert len({id(instance) for instance in instances}) == 1
+    assert registry.refcount("counting") == 8
+
+
+def test_evaluate_claim_reuses_warm_retriever(counting_entry_point, monkeypatch):
+    registry = RetrieverRegistry()
+    monkeypatch.setattr("factsynth_ultimate.services.evaluator.get_registry", lambda: registry)
+    warm = registry.acquire("counting")
+
+    for _ in range(3):
+        result = evaluate_claim("claim", retriever="counting")
+        assert result["evidence"][0]["source"] == "counted"
+
+    assert len(CREATED) == 1
+    assert warm.closed == 0
+    assert registry.refcount("counting") == 1
+
+
+def test_lifespan_preloads_and_releases(monkeypatch):
+    monkeypatch.setenv("RETRIEVER_PRELOAD", "fixture")
+    registry = get_registry()
+    with TestClient(create_app()):
+        assert registry.refcount("fixture") == 1
+    assert registry.refcount("fixture") == 0
+
+
+def test_lifespan_releases_pipeline_retrievers(counting_entry_point, monkeypatch):
+    monkeypatch.setenv("PIPELINE_RETRIEVERS", "counting")
+    monkeypatch.setenv("RETRIEVER_PRELOAD", "counting")
+    generate._pipeline_singleton.cache_clear()
+    registry = get_registry()
+    with TestClient(create_app()):
+        generate.get_fact_pipeline()
+        assert registry.refcount("counting") == 2
+    assert registry.refcount("counting") == 0
+    assert [retriever.closed for retriever in CREATED] == [1]
+    assert generate._pipeline_singleton.cache_info().currsize == 0
+
+
+@pytest.mark.anyio
+async def test_scheduled_aclose_is_kept_until_done():
+    closed = asyncio.Event()
+
+    class AsyncOnly:
+        async def aclose(self):
+            await asyncio.sleep(0)
+            closed.set()
+
+    registry_module.close_retriever(AsyncOnly())
+    assert len(registry_module._CLOSING) == 1
+    await asyncio.wait_for(closed.wait(), 1)
+    await asyncio.sleep(0)
+    assert not registry_module._CLOSING
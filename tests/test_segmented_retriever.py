@@ -0,0 +1,142 @@
+import random
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from factsynth_ultimate.services.minhash import DEFAULT_MINHASH
+from factsynth_ultimate.services.retrievers.bm25 import BM25Retriever
+from factsynth_ultimate.services.retrievers.index import MmapBM25Retriever, build_index
+from factsynth_ultimate.services.retrievers.local import Fixture
+from factsynth_ultimate.services.retrievers.segments import SegmentedBM25Retriever
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+WORDS = ["kyiv", "lviv", "capital", "city", "river", "coffee", "museum", "bridge", "park"]
+
+
+def _corpus(count, seed=0, prefix="d"):
+    rng = random.Random(seed)
+    return [
+        Fixture(id=f"{prefix}{i}", text=" ".join(rng.choices(WORDS, k=rng.randint(1, 8))))
+        for i in range(count)
+    ]
+
+
+def _ranked(retriever, query, k=10):
+    return [(doc.id, doc.score) for doc in retriever.search(query, k=k)]
+
+
+def _assert_same(left, right):
+    assert [doc_id for doc_id, _ in left] == [doc_id for doc_id, _ in right]
+    assert [score for _, score in left] == pytest.approx([score for _, score in right])
+
+
+def test_matches_single_index_across_segments():
+    docs = _corpus(60)
+    retriever = SegmentedBM25Retriever(docs[:20], flush_threshold=7, background=False)
+    retriever.ingest(docs[20:])
+    assert len(retriever.segments) > 1
+
+    reference = BM25Retriever(docs)
+    for query in ("kyiv capital", "coffee museum park", "bridge"):
+        _assert_same(_ranked(retriever, query), _ranked(reference, query))
+
+
+def test_ingested_documents_are_visible_immediately():
+    retriever = SegmentedBM25Retriever(_corpus(10), flush_threshold=100)
+    before = retriever.cache_id
+    retriever.ingest([Fixture(id="new", text="odesa harbour")])
+
+    assert [doc.id for doc in retriever.search("harbour")] == ["new"]
+    assert len(retriever.segments) == 1
+    assert retriever.cache_id != before
+
+
+def test_updates_and_removals_hide_old_versions():
+    docs = _corpus(30)
+    retriever = SegmentedBM25Retriever(docs, flush_threshold=4, background=False)
+    retriever.ingest([Fixture(id="d3", text="odesa harbour")])
+    retriever.remove(["d5", "d6"])
+    retriever.flush()
+    retriever.ingest([Fixture(id="d5", text="harbour lighthouse")])
+
+    hits = retriever.search("harbour", k=5)
+    assert {doc.id for doc in hits} == {"d3", "d5"}
+    live = {doc.id for doc in retriever.search("kyiv lviv capital city river", k=100)}
+    assert not live & {"d3", "d5", "d6"}
+
+    retriever.merge()
+    assert len(retriever.segments) == 1
+    assert retriever._tombstones == {}
+    survivors = [fix for fix in docs if fix.id not in {"d3", "d5", "d6"}] + [
+        Fixture(id="d3", text="odesa harbour"),
+        Fixture(id="d5", text="harbour lighthouse"),
+    ]
+    for query in ("harbour", "coffee city", "kyiv"):
+        expected = _ranked(BM25Retriever(survivors), query, k=50)
+        _assert_same(sorted(_ranked(retriever, query, k=50)), sorted(expected))
+
+
+def test_fresh_ids_leave_no_tombstones():
+    retriever = SegmentedBM25Retriever(_corpus(20), flush_threshold=8, background=False)
+    for i in range(200):
+        retriever.ingest([Fixture(id=f"new{i}", text=f"harbour number {i}")])
+    retriever.remove(["never-seen"])
+    assert retriever._tombstones == {}
+    assert len(retriever.search("harbour", k=3)) == 3
+
+    retriever.ingest([Fixture(id="d4", text="odesa harbour"), Fixture(id="new3", text="x")])
+    assert set(retriever._tombstones) == {"d4", "new3"}
+    assert sum(retriever._masked.values()) == 2
+    retriever.merge()
+    assert retriever._tombstones == {}
+    assert retriever._masked == {}
+
+
+def test_background_merge_bounds_segment_count():
+    retriever = SegmentedBM25Retriever(flush_threshold=2, max_segments=3, merge_factor=2)
+    docs = _corpus(40)
+    for start in range(0, len(docs), 2):
+        retriever.ingest(docs[start : start + 2])
+    deadline = time.monotonic() + 5
+    while len(retriever.segments) > 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(retriever.segments) <= 3
+
+    reference = BM25Retriever(docs)
+    _assert_same(_ranked(retriever, "river bridge"), _ranked(reference, "river bridge"))
+    retriever.close()
+
+
+def test_mmap_base_segment(tmp_path):
+    docs = _corpus(15)
+    build_index(docs, tmp_path / "index")
+    base = MmapBM25Retriever(tmp_path / "index")
+    retriever = SegmentedBM25Retriever(base, background=False)
+    retriever.remove(["d0"])
+    retriever.ingest([Fixture(id="x", text="museum museum")])
+
+    assert retriever.search("museum", k=1)[0].id == "x"
+    assert "d0" not in {doc.id for doc in retriever.search(docs[0].text, k=20)}
+    retriever.close()
+
+    with pytest.raises(ValueError, match="BM25 parameters"):
+        SegmentedBM25Retriever(BM25Retriever(docs, k1=2.0))
+
+
+def test_mmap_base_keeps_stored_signatures(tmp_path):
+    docs = _corpus(15)
+    build_index(docs, tmp_path / "index")
+    retriever = SegmentedBM25Retriever(MmapBM25Retriever(tmp_path / "index"), background=False)
+    retriever.ingest([Fixture(id="x", text="museum museum")])
+
+    found = retriever.search("museum", k=20)
+    retriever.close()
+
+    by_id = {doc.id: doc for doc in found}
+    assert by_id["x"].signature is None
+    stored = [doc for doc in found if doc.id != "x"]
+    assert stored
+    assert all(doc.signature == DEFAULT_MINHASH.signature(doc.text) for doc in stored)
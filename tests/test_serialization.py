@@ -0,0 +1,64 @@
+import json
+from http import HTTPStatus
+
+import pytest
+
+from factsynth_ultimate.core import serialization
+from factsynth_ultimate.core.problem_details import ProblemDetails
+from factsynth_ultimate.core.serialization import FastJSONResponse
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+
+@pytest.fixture(autouse=True)
+def _restore_backend():
+    yield
+    serialization.set_json_backend("auto")
+
+
+@pytest.mark.parametrize("backend", ["stdlib", "orjson"])
+def test_backends_produce_compact_utf8(backend):
+    if serialization.set_json_backend(backend) != backend:
+        pytest.skip(f"{backend} backend unavailable")
+    payload = {"text": "Київ", "results": [{"score": 0.5}], "count": 1}
+    raw = serialization.dumps(payload)
+    assert raw == '{"text":"Київ","results":[{"score":0.5}],"count":1}'.encode()
+    assert serialization.dumps_str(payload) == raw.decode()
+
+
+def test_orjson_falls_back_for_unsupported_values():
+    if serialization.set_json_backend("orjson") != "orjson":
+        pytest.skip("orjson backend unavailable")
+    assert json.loads(serialization.dumps({"big": 2**70})) == {"big": 2**70}
+
+
+def test_unknown_backend_rejected():
+    with pytest.raises(ValueError):
+        serialization.set_json_backend("simdjson")
+
+
+def test_problem_details_uses_fast_response():
+    response = ProblemDetails(title="t", detail="d", status=400).to_response()
+    assert isinstance(response, FastJSONResponse)
+    assert response.media_type == "application/problem+json"
+    assert json.loads(response.body)["status"] == HTTPStatus.BAD_REQUEST
+
+
+@pytest.mark.anyio
+async def test_batch_scores_served_with_default_response_class(
+    client, base_headers, monkeypatch
+):
+    encoded = []
+    encoder = serialization._ENCODER
+
+    def spy(content):
+        encoded.append(content)
+        return encoder(content)
+
+    monkeypatch.setattr(serialization, "_ENCODER", spy)
+    items = [{"text": f"item {i}"} for i in range(50)]
+    response = await client.post("/v1/score/batch", headers=base_headers, json={"items": items})
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()["count"] == 50
+    assert [payload.get("count") for payload in encoded] == [50]
+    assert response.content == encoder(encoded[0])
@@ -0,0 +1,173 @@
+import json
+import threading
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from facts import FactPipeline, MemoryResultCache
+from factsynth_ultimate.cli import main as fsctl_main
+from factsynth_ultimate.services.retrievers import shards as shards_module
+from factsynth_ultimate.services.retrievers.bm25 import BM25Retriever
+from factsynth_ultimate.services.retrievers.index import IndexFormatError
+from factsynth_ultimate.services.retrievers.local import Fixture
+from factsynth_ultimate.services.retrievers.shards import (
+    ShardedBM25Retriever,
+    build_sharded_index,
+)
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+WORDS = ["kyiv", "lviv", "capital", "city", "river", "ukraine", "port", "market", "old"]
+FIXTURES = [
+    Fixture(id=f"doc{i}", text=" ".join(WORDS[(i * j) % len(WORDS)] for j in range(1, i % 5 + 3)))
+    for i in range(40)
+]
+
+
+@pytest.fixture
+def sharded(tmp_path):
+    build_sharded_index(FIXTURES, tmp_path / "shards", shards=3)
+    return tmp_path / "shards"
+
+
+@pytest.mark.parametrize("query", ["capital of ukraine", "old river port", "city", "missing"])
+def test_sharded_search_matches_single_index(sharded, query):
+    retriever = ShardedBM25Retriever(sharded, kind="thread")
+    expected = BM25Retriever(FIXTURES).search(query, k=7)
+    try:
+        found = retriever.search(query, k=7)
+    finally:
+        retriever.close()
+
+    assert [doc.id for doc in found] == [doc.id for doc in expected]
+    assert [doc.score for doc in found] == pytest.approx([doc.score for doc in expected])
+    assert not found.partial
+
+
+@pytest.mark.anyio
+async def test_process_workers_serve_shards(sharded):
+    retriever = ShardedBM25Retriever(sharded, shard_timeout=30.0)
+    expected = BM25Retriever(FIXTURES).search("kyiv market", k=5)
+    try:
+        retriever.start()
+        found = await retriever.asearch("kyiv market", k=5)
+    finally:
+        await retriever.aclose()
+
+    assert [doc.id for doc in found] == [doc.id for doc in expected]
+    assert found.missing == ()
+
+
+@pytest.mark.anyio
+async def test_slow_shard_yields_partial_results(sharded, monkeypatch):
+    release = threading.Event()
+    search_shard = shards_module._search_shard
+
+    def slow_first_shard(spec, terms, k):
+        if spec.directory.endswith("shard-000"):
+            release.wait(5)
+        return search_shard(spec, terms, k)
+
+    monkeypatch.setattr(shards_module, "_search_shard", slow_first_shard)
+    retriever = ShardedBM25Retriever(sharded, kind="thread", shard_timeout=0.2)
+    try:
+        found = await retriever.asearch("capital city", k=5)
+        blocking = retriever.search("capital city", k=5)
+    finally:
+        release.set()
+        retriever.close()
+
+    for result in (found, blocking):
+        assert result.partial
+        assert result.missing == (0,)
+        assert result and all(int(doc.id[3:]) >= 13 for doc in result)
+
+
+@pytest.mark.anyio
+async def test_stuck_shard_does_not_delay_later_queries(sharded, monkeypatch):
+    release = threading.Event()
+    stuck = []
+    search_shard = shards_module._search_shard
+
+    def stick_once(spec, terms, k):
+        if spec.directory.endswith("shard-000") and not stuck:
+            stuck.append(spec)
+            release.wait(5)
+        return search_shard(spec, terms, k)
+
+    monkeypatch.setattr(shards_module, "_search_shard", stick_once)
+    retriever = ShardedBM25Retriever(sharded, kind="thread", shard_timeout=0.2)
+    expected = BM25Retriever(FIXTURES).search("capital city", k=5)
+    try:
+        first = await retriever.asearch("capital city", k=5)
+        later = [await retriever.asearch("capital city", k=5), retriever.search("capital city")]
+    finally:
+        release.set()
+        retriever.close()
+
+    assert first.missing == (0,)
+    for result in later:
+        assert not result.partial
+        assert [doc.id for doc in result] == [doc.id for doc in expected]
+
+
+@pytest.mark.anyio
+async def test_cached_pipeline_skips_partial_results(sharded, monkeypatch):
+    release = threading.Event()
+    stuck = []
+    search_shard = shards_module._search_shard
+
+    def stick_twice(spec, terms, k):
+        if spec.directory.endswith("shard-000") and len(stuck) < 2:
+            stuck.append(spec)
+            release.wait(5)
+        return search_shard(spec, terms, k)
+
+    monkeypatch.setattr(shards_module, "_search_shard", stick_twice)
+    retriever = ShardedBM25Retriever(sharded, kind="thread", shard_timeout=0.2)
+    cache = MemoryResultCache()
+    pipeline = FactPipeline(retriever=retriever, cache=cache, top_k=5)
+    try:
+        partial = await pipeline.arun("capital city")
+        streamed = [fragment async for fragment in pipeline.astream("capital city")]
+        assert await cache.get(pipeline.cache_key("capital city")) is None
+        assert await cache.get(pipeline.stream_cache_key("capital city")) is None
+        complete = await pipeline.arun("capital city")
+    finally:
+        release.set()
+        retriever.close()
+
+    assert type(partial) is str
+    assert streamed
+    assert complete != partial
+    assert (await cache.get(pipeline.cache_key("capital city"))).value == complete
+
+
+def test_failing_shards_raise(sharded, monkeypatch):
+    def broken(spec, terms, k):
+        raise OSError("disk gone")
+
+    monkeypatch.setattr(shards_module, "_search_shard", broken)
+    retriever = ShardedBM25Retriever(sharded, kind="thread")
+    with pytest.raises(RuntimeError, match="All shards"):
+        retriever.search("city")
+    retriever.close()
+
+
+def test_cli_builds_sharded_index(tmp_path, capsys):
+    corpus = tmp_path / "corpus.jsonl"
+    corpus.write_text(
+        "\n".join(json.dumps({"id": fix.id, "text": fix.text}) for fix in FIXTURES) + "\n"
+    )
+    out = tmp_path / "idx"
+
+    assert fsctl_main(["index", "build", str(corpus), "-o", str(out), "--shards", "4"]) == 0
+    assert "in 4 shards" in capsys.readouterr().out
+    retriever = ShardedBM25Retriever(out, kind="thread")
+    assert len(retriever) == len(FIXTURES)
+    assert len(retriever.specs) == 4
+    retriever.close()
+
+    with pytest.raises(IndexFormatError):
+        ShardedBM25Retriever(tmp_path)
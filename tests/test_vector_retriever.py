@@ -0,0 +1,122 @@
+import asyncio
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from factsynth_ultimate.cli import main as fsctl_main
+from factsynth_ultimate.services.retrievers.local import Fixture
+from factsynth_ultimate.services.retrievers.vector import (
+    HashingEmbedder,
+    VectorIndex,
+    VectorRetriever,
+    build_vector_index,
+    load_embedder,
+    quantize,
+)
+
+pytestmark = pytest.mark.httpx_mock(assert_all_responses_were_requested=False)
+
+FIXTURES = [
+    Fixture(id="kyiv", text="Kyiv is the capital of Ukraine"),
+    Fixture(id="lviv", text="Lviv is a city in western Ukraine"),
+    Fixture(id="coffee", text="Coffee houses in Lviv"),
+    Fixture(id="river", text="The Dnipro river flows through Kyiv"),
+]
+
+
+class CountingEmbedder:
+    def __init__(self, dim=16, seed=0):
+        self.table = np.random.default_rng(seed).normal(size=(1000, dim)).astype(np.float32)
+        self.calls = []
+
+    def __call__(self, texts):
+        self.calls.append(list(texts))
+        return np.stack([self.table[int(text)] for text in texts])
+
+
+def _random_corpus(count):
+    return [Fixture(id=f"d{i}", text=str(i)) for i in range(count)]
+
+
+def _brute_force(embedder, fixtures, query, k):
+    docs = embedder([fix.text for fix in fixtures])
+    docs /= np.linalg.norm(docs, axis=1, keepdims=True)
+    q = embedder([query])[0]
+    scores = docs @ (q / np.linalg.norm(q))
+    order = [i for i in np.argsort(-scores, kind="stable") if scores[i] > 0][:k]
+    return [(fixtures[i].id, float(scores[i])) for i in order]
+
+
+def test_exact_search_matches_brute_force(monkeypatch):
+    monkeypatch.setattr(VectorIndex, "block_rows", 50)
+    embedder = CountingEmbedder()
+    corpus = _random_corpus(300)
+    retriever = VectorRetriever(VectorIndex.build(corpus, embedder, batch_size=64), embedder)
+    for query in ("500", "501", "502"):
+        found = [(doc.id, doc.score) for doc in retriever.search(query, k=7)]
+        expected = _brute_force(embedder, corpus, query, 7)
+        assert [doc_id for doc_id, _ in found] == [doc_id for doc_id, _ in expected]
+        assert [s for _, s in found] == pytest.approx([s for _, s in expected], rel=1e-5)
+
+
+def test_int8_and_ivf_recall(tmp_path):
+    embedder = CountingEmbedder(dim=32)
+    corpus = _random_corpus(800)
+    build_vector_index(corpus, tmp_path / "idx", embedder=embedder, int8=True, n_lists=16)
+    index = VectorIndex.open(tmp_path / "idx")
+    assert index.vectors.dtype == np.int8
+    assert isinstance(index.vectors, np.memmap)
+
+    full_probe = VectorRetriever(index, embedder, n_probe=16)
+    partial = VectorRetriever(index, embedder, n_probe=4)
+    recall = []
+    for query in range(900, 920):
+        vector = embedder([str(query)])
+        vector /= np.linalg.norm(vector)
+        expected = {index.ids[row] for row, _ in index.search(vector, 10)[0]}
+        assert {doc.id for doc in full_probe.search(str(query), k=10)} == expected
+        recall.append(len(expected & {doc.id for doc in partial.search(str(query), k=10)}))
+    assert sum(recall) / (10 * len(recall)) > 0.5
+    full_probe.close()
+
+
+def test_quantize_round_trip():
+    vectors = np.random.default_rng(1).normal(size=(5, 8)).astype(np.float32)
+    codes, scales = quantize(vectors)
+    assert codes.dtype == np.int8
+    assert codes * scales[:, None] == pytest.approx(vectors, abs=float(scales.max()))
+
+
+@pytest.mark.anyio
+async def test_concurrent_asearch_is_batched():
+    embedder = CountingEmbedder()
+    index = VectorIndex.build(_random_corpus(100), embedder)
+    retriever = VectorRetriever(index, embedder, batch_window=0.05)
+    embedder.calls.clear()
+
+    results = await asyncio.gather(*(retriever.asearch(str(q), k=3) for q in range(200, 205)))
+
+    assert embedder.calls == [[str(q) for q in range(200, 205)]]
+    for query, docs in zip(range(200, 205), results):
+        single = retriever.search(str(query), k=3)
+        assert [doc.id for doc in docs] == [doc.id for doc in single]
+        assert [doc.score for doc in docs] == pytest.approx([doc.score for doc in single])
+    await retriever.aclose()
+
+
+def test_hashing_embedder_and_cli(tmp_path, capsys):
+    corpus = tmp_path / "corpus.jsonl"
+    corpus.write_text("".join(json.dumps({"id": f.id, "text": f.text}) + "\n" for f in FIXTURES))
+
+    assert fsctl_main(["index", "vectors", str(corpus), "-o", str(tmp_path / "idx")]) == 0
+    assert "Embedded 4 documents" in capsys.readouterr().out
+    retriever = VectorRetriever(VectorIndex.open(tmp_path / "idx"), HashingEmbedder())
+    assert retriever.search("Dnipro river", k=1)[0].id == "river"
+    assert retriever.cache_id.startswith("vector-index:")
+    retriever.close()
+
+    assert isinstance(load_embedder(None), HashingEmbedder)
+    with pytest.raises(ValueError, match="module:attribute"):
+        load_embedder("no-colon")
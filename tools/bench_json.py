@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""Benchmark JSON backends on large ``/v1/score/batch`` style responses."""
+
+import argparse
+import random
+import timeit
+
+from factsynth_ultimate.core import serialization
+
+
+def batch_payload(items: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    results = [{"score": round(rng.random(), 4)} for _ in range(items)]
+    return {"results": results, "count": len(results)}
+
+
+def series_payload(steps: int, channels: int = 7, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    return {
+        "t": [i / steps for i in range(steps)],
+        "y": [[rng.random() for _ in range(channels)] for _ in range(steps)],
+    }
+
+
+def bench(payload: dict, repeat: int, number: int) -> dict[str, float]:
+    timings: dict[str, float] = {}
+    for backend in ("stdlib", "orjson"):
+        effective = serialization.set_json_backend(backend)
+        if effective != backend:
+            continue
+        best = min(timeit.repeat(lambda: serialization.dumps(payload), repeat=repeat, number=number))
+        timings[backend] = best / number
+    serialization.set_json_backend("auto")
+    return timings
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--items", type=int, nargs="+", default=[100, 1000, 10000])
+    ap.add_argument("--steps", type=int, default=1000, help="ISR simulate time steps")
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--number", type=int, default=50)
+    args = ap.parse_args()
+
+    cases = [(f"score_batch[{n}]", batch_payload(n)) for n in args.items]
+    cases.append((f"isr_simulate[{args.steps}]", series_payload(args.steps)))
+    print(f"{'payload':<22}{'backend':<10}{'per call (ms)':>14}{'speedup':>10}")
+    for name, payload in cases:
+        timings = bench(payload, args.repeat, args.number)
+        base = timings.get("stdlib")
+        for backend, seconds in timings.items():
+            speedup = base / seconds if base else 1.0
+            print(f"{name:<22}{backend:<10}{seconds * 1000:>14.3f}{speedup:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""Benchmark the Jaccard fixture retriever against the BM25 retriever."""
+
+import argparse
+import random
+import time
+from itertools import accumulate
+
+from factsynth_ultimate.services.retrievers.bm25 import BM25Retriever
+from factsynth_ultimate.services.retrievers.local import Fixture, LocalFixtureRetriever
+
+
+def _zipf(vocab: int) -> tuple[list[str], list[float]]:
+    # Zipf-like weights give a realistic mix of common and rare terms.
+    words = [f"w{i}" for i in range(vocab)]
+    return words, list(accumulate(1.0 / (rank + 1) for rank in range(vocab)))
+
+
+def corpus(docs: int, vocab: int, length: int, seed: int = 0) -> list[Fixture]:
+    rng = random.Random(seed)
+    words, cumulative = _zipf(vocab)
+    return [
+        Fixture(id=str(i), text=" ".join(rng.choices(words, cum_weights=cumulative, k=length)))
+        for i in range(docs)
+    ]
+
+
+def queries(count: int, vocab: int, terms: int, seed: int = 1) -> list[str]:
+    rng = random.Random(seed)
+    words, cumulative = _zipf(vocab)
+    return [" ".join(rng.choices(words, cum_weights=cumulative, k=terms)) for _ in range(count)]
+
+
+def bench(retriever, batch: list[str], k: int) -> float:
+    started = time.perf_counter()
+    for query in batch:
+        retriever.search(query, k=k)
+    return (time.perf_counter() - started) / len(batch)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--docs", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--vocab", type=int, default=50_000)
+    ap.add_argument("--length", type=int, default=24, help="tokens per document")
+    ap.add_argument("--queries", type=int, default=50)
+    ap.add_argument("--terms", type=int, default=4, help="tokens per query")
+    ap.add_argument("-k", type=int, default=10)
+    args = ap.parse_args()
+
+    batch = queries(args.queries, args.vocab, args.terms)
+    print(f"{'docs':>10}{'retriever':>12}{'build (s)':>12}{'query (ms)':>12}{'speedup':>10}")
+    for size in args.docs:
+        fixtures = corpus(size, args.vocab, args.length)
+        timings: dict[str, float] = {}
+        for name, factory in (("jaccard", LocalFixtureRetriever), ("bm25", BM25Retriever)):
+            started = time.perf_counter()
+            retriever = factory(fixtures)
+            build = time.perf_counter() - started
+            timings[name] = bench(retriever, batch, args.k)
+            speedup = timings["jaccard"] / timings[name]
+            print(
+                f"{size:>10}{name:>12}{build:>12.2f}{timings[name] * 1000:>12.3f}"
+                f"{speedup:>9.2f}x",
+                flush=True,
+            )
+
+
+if __name__ == "__main__":
+    main()